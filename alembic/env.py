@@ -17,6 +17,7 @@ from app.core.database import Base  # type: ignore
 from app.core.config import settings  # type: ignore
 from app.models.user import User  # noqa
 from app.models.note import Note  # noqa
+from app.models.summary_cache import SummaryCacheEntry  # noqa
 
 target_metadata = Base.metadata
 
@@ -0,0 +1,29 @@
+"""note leases
+
+Revision ID: 0002_note_leases
+Revises: 0001_init
+Create Date: 2025-10-01
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0002_note_leases'
+down_revision = '0001_init'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('notes') as batch:
+        batch.add_column(sa.Column('lease_owner', sa.String(length=128), nullable=True))
+        batch.add_column(sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_notes_status_created_at', 'notes', ['status', 'created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_notes_status_created_at', table_name='notes')
+    with op.batch_alter_table('notes') as batch:
+        batch.drop_column('lease_expires_at')
+        batch.drop_column('lease_owner')
@@ -0,0 +1,26 @@
+"""notes keyset pagination indexes
+
+Revision ID: 0003_notes_keyset_indexes
+Revises: 0002_note_leases
+Create Date: 2025-10-03
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0003_notes_keyset_indexes'
+down_revision = '0002_note_leases'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_notes_owner_status_created_id', 'notes', ['owner_id', 'status', 'created_at', 'id']
+    )
+    op.create_index('ix_notes_owner_created_id', 'notes', ['owner_id', 'created_at', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_notes_owner_created_id', table_name='notes')
+    op.drop_index('ix_notes_owner_status_created_id', table_name='notes')
@@ -0,0 +1,38 @@
+"""notes full-text search
+
+Revision ID: 0004_notes_search
+Revises: 0003_notes_keyset_indexes
+Create Date: 2025-10-06
+
+"""
+from alembic import op
+from app.models.note import POSTGRES_SEARCH_DDL, SQLITE_SEARCH_DDL
+
+# revision identifiers, used by Alembic.
+revision = '0004_notes_search'
+down_revision = '0003_notes_keyset_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for stmt in POSTGRES_SEARCH_DDL:
+            op.execute(stmt)
+    elif dialect == 'sqlite':
+        for stmt in SQLITE_SEARCH_DDL:
+            op.execute(stmt)
+        # Index the rows that existed before the triggers
+        op.execute("INSERT INTO notes_fts(notes_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_notes_search_vector")
+        op.execute("ALTER TABLE notes DROP COLUMN IF EXISTS search_vector")
+    elif dialect == 'sqlite':
+        for trigger in ('notes_fts_ai', 'notes_fts_ad', 'notes_fts_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS notes_fts")
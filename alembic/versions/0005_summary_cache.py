@@ -0,0 +1,28 @@
+"""summary cache
+
+Revision ID: 0005_summary_cache
+Revises: 0004_notes_search
+Create Date: 2025-10-08
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0005_summary_cache'
+down_revision = '0004_notes_search'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'summary_cache',
+        sa.Column('key', sa.String(length=64), primary_key=True),
+        sa.Column('summary', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    op.drop_table('summary_cache')
@@ -0,0 +1,29 @@
+"""note retry schedule
+
+Revision ID: 0006_note_retry_schedule
+Revises: 0005_summary_cache
+Create Date: 2025-10-15
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0006_note_retry_schedule'
+down_revision = '0005_summary_cache'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('notes') as batch:
+        batch.add_column(sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=True))
+        batch.add_column(sa.Column('last_error', sa.Text(), nullable=True))
+    op.create_index('ix_notes_status_next_attempt_at', 'notes', ['status', 'next_attempt_at'])
+
+
+def downgrade():
+    op.drop_index('ix_notes_status_next_attempt_at', table_name='notes')
+    with op.batch_alter_table('notes') as batch:
+        batch.drop_column('last_error')
+        batch.drop_column('next_attempt_at')
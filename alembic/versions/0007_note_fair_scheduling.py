@@ -0,0 +1,42 @@
+"""note priority lanes and fair ranks
+
+Revision ID: 0007_note_fair_scheduling
+Revises: 0006_note_retry_schedule
+Create Date: 2025-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.models.note import NotePriority
+
+# revision identifiers, used by Alembic.
+revision = '0007_note_fair_scheduling'
+down_revision = '0006_note_retry_schedule'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    priority = sa.Enum(NotePriority, name='notepriority')
+    priority.create(op.get_bind(), checkfirst=True)
+    with op.batch_alter_table('notes') as batch:
+        batch.add_column(
+            sa.Column('priority', priority, nullable=False, server_default=NotePriority.interactive.value)
+        )
+        batch.add_column(sa.Column('fair_rank', sa.BigInteger(), nullable=False, server_default='0'))
+    # The claim query now orders by fair_rank within a lane
+    op.drop_index('ix_notes_status_created_at', table_name='notes')
+    op.create_index('ix_notes_status_priority_rank', 'notes', ['status', 'priority', 'fair_rank'])
+    op.create_index(
+        'ix_notes_owner_status_priority_rank', 'notes', ['owner_id', 'status', 'priority', 'fair_rank']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_notes_owner_status_priority_rank', table_name='notes')
+    op.drop_index('ix_notes_status_priority_rank', table_name='notes')
+    op.create_index('ix_notes_status_created_at', 'notes', ['status', 'created_at'])
+    with op.batch_alter_table('notes') as batch:
+        batch.drop_column('fair_rank')
+        batch.drop_column('priority')
+    sa.Enum(NotePriority, name='notepriority').drop(op.get_bind(), checkfirst=True)
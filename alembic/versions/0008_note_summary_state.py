@@ -0,0 +1,25 @@
+"""note summary state
+
+Revision ID: 0008_note_summary_state
+Revises: 0007_note_fair_scheduling
+Create Date: 2025-10-20
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0008_note_summary_state'
+down_revision = '0007_note_fair_scheduling'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('notes') as batch:
+        batch.add_column(sa.Column('summary_state', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('notes') as batch:
+        batch.drop_column('summary_state')
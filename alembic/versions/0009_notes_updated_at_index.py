@@ -0,0 +1,22 @@
+"""notes updated_at index
+
+Revision ID: 0009_notes_updated_at_index
+Revises: 0008_note_summary_state
+Create Date: 2025-10-27
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0009_notes_updated_at_index'
+down_revision = '0008_note_summary_state'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_notes_updated_at', 'notes', ['updated_at'])
+
+
+def downgrade():
+    op.drop_index('ix_notes_updated_at', table_name='notes')
@@ -21,19 +21,122 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24
     ALGORITHM: str = "HS256"
 
+    # Password hashing: bcrypt cost (stored hashes with another cost are rehashed on login)
+    # and the thread pool that keeps it off the event loop (0 = hash inline)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_THREADS: int | None = None  # None = CPU count, at most 4
+    PASSWORD_HASH_MAX_PENDING: int = 64  # beyond this, auth endpoints answer 503
+
+    # Authenticated identity (id/email/role) cached per user id; 0 disables.
+    # Dropped when this process commits a change to the user; changes made
+    # elsewhere show up once the entry expires
+    AUTH_CACHE_TTL_SECONDS: int = 30
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+
+    # GET /notes?count=estimate on databases without planner estimates (SQLite)
+    COUNT_CACHE_TTL_SECONDS: int = 30
+    COUNT_CACHE_MAX_ENTRIES: int = 10000
+
+    # GET /notes/{id}: done notes served from an in-process cache, dropped when a
+    # note event reports a change (0 entries disables it; ETag/304 always apply)
+    NOTE_CACHE_TTL_SECONDS: int = 300
+    NOTE_CACHE_MAX_ENTRIES: int = 1000
+
+    # POST /notes/bulk: rows per INSERT/commit, and the largest single item accepted (UTF-8 bytes)
+    BULK_INSERT_CHUNK_SIZE: int = 1000
+    BULK_MAX_ITEM_BYTES: int = 64 * 1024
+    # GET /notes/export: rows fetched from the server-side cursor per round trip
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # PATCH /notes/{id}: longest a note may grow to through appends
+    NOTE_MAX_CHARS: int = 200_000
+
+    # GET /notes/events (Server-Sent Events)
+    SSE_HEARTBEAT_SECONDS: int = 15
+    SSE_QUEUE_SIZE: int = 256  # events buffered per subscriber before it must resync
+    # Without Postgres LISTEN, how often changed notes are polled for subscribers
+    SSE_POLL_SECONDS: float = 1.0
+
+    # Prometheus metrics: GET /metrics on the API; the worker serves them on
+    # WORKER_METRICS_PORT when set
+    METRICS_ENABLED: bool = True
+    WORKER_METRICS_PORT: int | None = None
+
     # SQLite for local; override with Postgres DATABASE_URL in prod
     DATABASE_URL: str = "sqlite+aiosqlite:///./app.db"
 
+    # Connection pool per process role: the API serves many short requests, the
+    # worker holds few sessions (it commits before summarizing)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    WORKER_DB_POOL_SIZE: int = 4
+    WORKER_DB_MAX_OVERFLOW: int = 4
+    DB_POOL_TIMEOUT_SECONDS: float = 10.0  # wait for a free connection before failing
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # replace connections older than this
+    DB_POOL_PRE_PING: bool = True  # test connections on checkout (drops after DB/proxy restarts)
+    DB_STATEMENT_CACHE_SIZE: int = 256  # asyncpg prepared statements cached per connection
+    # Behind PgBouncer in transaction mode: no server-side prepared statements, and
+    # LISTEN (needs a session) goes straight to Postgres via DATABASE_LISTEN_URL
+    DB_PGBOUNCER: bool = False
+    DATABASE_LISTEN_URL: str | None = None
+
     WORKER_POLL_INTERVAL_SECONDS: int = 2
+    # Postgres: workers LISTEN for new notes and only poll this often as a safety net
+    WORKER_SAFETY_POLL_SECONDS: int = 30
     MAX_RETRIES: int = 3
+    # Failed attempts are retried after base * 2**(attempts - 1) seconds (capped), with jitter
+    RETRY_BACKOFF_BASE_SECONDS: float = 2.0
+    RETRY_BACKOFF_MAX_SECONDS: float = 60.0
+
+    # Job claiming: each worker leases a batch of notes and renews the lease every
+    # third of WORKER_LEASE_SECONDS while summarizing; expired leases are re-queued
+    WORKER_ID: str | None = None  # defaults to "<hostname>:<pid>"
+    WORKER_BATCH_SIZE: int = 5
+    WORKER_LEASE_SECONDS: int = 300
+    WORKER_REAP_INTERVAL_SECONDS: int = 30
+    # Share of each claim per lane while both have work (owners are interleaved within a lane)
+    WORKER_INTERACTIVE_WEIGHT: int = 4
+    WORKER_BULK_WEIGHT: int = 1
+
+    # Executor stage: extractive runs in a process pool, LLM calls with bounded concurrency
+    WORKER_MAX_IN_FLIGHT: int = 16  # notes summarized concurrently per worker
+    WORKER_SUMMARY_PROCESSES: int | None = None  # None = CPU count; 0 = no pool (thread)
+    WORKER_LLM_CONCURRENCY: int = 4
+
+    # Worker processes (python -m app.supervisor): one per core by default, each
+    # with its own event loop and DB pool. On SIGTERM a worker stops claiming,
+    # finishes in-flight notes for up to WORKER_DRAIN_TIMEOUT_SECONDS and hands
+    # the rest back to the queue. Workers start once the database is migrated.
+    WORKER_PROCESSES: int | None = None  # None = CPU count
+    WORKER_DRAIN_TIMEOUT_SECONDS: float = 60.0
+    WORKER_DB_READY_TIMEOUT_SECONDS: float = 120.0
 
     # Summarizer limits
     SUMMARY_MAX_CHARS: int = 300
     SUMMARY_MAX_SENTENCES: int = 3
     SUMMARY_MIN_SENT_CHARS: int = 20
+    # "python" | "numpy" | "auto" (numpy if installed). NumPy is opt-in: it is
+    # only ~1.3x faster than the pure-Python engine on typical notes
+    SUMMARY_EXTRACTIVE_ENGINE: str = "python"
+    # Long notes are summarized in chunks (map-reduce): chunk size in estimated
+    # LLM tokens (~4 chars each), and the most chunks used per note
+    SUMMARY_CHUNK_TOKENS: int = 1500
+    SUMMARY_MAX_CHUNKS: int = 16
+
+    # Summary cache keyed by normalized text + summarizer config (in-process LRU + DB table)
+    SUMMARY_CACHE_ENABLED: bool = True
+    SUMMARY_CACHE_MEMORY_ENTRIES: int = 10000
+    SUMMARY_CACHE_MEMORY_TTL_SECONDS: int = 3600
 
     # Ollama host (used for optional LLM summarization)
     OLLAMA_HOST: str = "http://localhost:11434"
+    OLLAMA_MAX_CONNECTIONS: int = 8
+    OLLAMA_REQUEST_TIMEOUT_SECONDS: float = 60.0  # connect/read, per streamed chunk
+    OLLAMA_TOTAL_TIMEOUT_SECONDS: float = 120.0  # whole generation
+    # Circuit breaker: after this many consecutive failures notes get the extractive
+    # fallback without a request; one probe request goes out per cooldown
+    OLLAMA_BREAKER_FAILURES: int = 5
+    OLLAMA_BREAKER_COOLDOWN_SECONDS: float = 30.0
 
     # Summarization via LLM (optional)
     SUMMARIZE_PROVIDER: str = "extractive"  # "extractive" | "ollama"
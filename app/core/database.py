@@ -1,8 +1,13 @@
 import sys
 import asyncio
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+import time
+import uuid
+from sqlalchemy import exc, inspect
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from .config import settings
+from . import metrics
 
 
 # Ensure a compatible event loop on Windows for psycopg async
@@ -17,10 +22,110 @@ class Base(DeclarativeBase):
     pass
 
 
-engine = create_async_engine(settings.db_url, echo=False, future=True)
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited (and timeouts)."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            metrics.db_pool_timeouts.inc()
+            raise
+        finally:
+            metrics.db_pool_wait.observe(time.perf_counter() - start)
+
+
+def pool_profile(role: str) -> tuple[int, int]:
+    """(pool_size, max_overflow) for a process role: "web" or "worker"."""
+    if role == "worker":
+        return settings.WORKER_DB_POOL_SIZE, settings.WORKER_DB_MAX_OVERFLOW
+    if role == "web":
+        return settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW
+    raise ValueError(f"Unknown process role: {role}")
+
+
+def engine_options(role: str, url: str | None = None) -> dict:
+    """create_async_engine keyword arguments for `role` on `url` (default DATABASE_URL)."""
+    url = url or settings.db_url
+    if ":memory:" in url:
+        return {}  # a single shared in-memory connection; nothing to size
+    size, overflow = pool_profile(role)
+    options: dict = {
+        "poolclass": TimedQueuePool,
+        "pool_size": size,
+        "max_overflow": overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    connect_args: dict = {}
+    if url.startswith("postgresql+asyncpg"):
+        # Per-connection prepared statement caches (asyncpg's and SQLAlchemy's);
+        # PgBouncer in transaction mode cannot keep server-side statements
+        cache = 0 if settings.DB_PGBOUNCER else settings.DB_STATEMENT_CACHE_SIZE
+        connect_args.update(statement_cache_size=cache, prepared_statement_cache_size=cache)
+        if settings.DB_PGBOUNCER:
+            # Statements asyncpg still prepares must not collide across server connections
+            connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid.uuid4()}__"
+    elif url.startswith("postgresql+psycopg") and settings.DB_PGBOUNCER:
+        connect_args["prepare_threshold"] = None  # psycopg: never prepare server-side
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+
+def _create_engine(role: str) -> AsyncEngine:
+    new_engine = create_async_engine(settings.db_url, echo=False, future=True, **engine_options(role))
+    metrics.instrument_engine(new_engine)
+    return new_engine
+
+
+role = "web"
+engine = _create_engine(role)
 SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False, class_=AsyncSession)
 
 
+def init_engine(process_role: str) -> AsyncEngine:
+    """Rebuild the engine with `process_role`'s pool profile; call before any connection is made."""
+    global engine, role
+    if process_role != role:
+        pool_profile(process_role)  # validate before replacing anything
+        old, engine, role = engine, _create_engine(process_role), process_role
+        SessionLocal.configure(bind=engine)
+        old.sync_engine.dispose(close=False)
+    return engine
+
+
+async def wait_until_ready(timeout: float) -> None:
+    """Wait until the database accepts connections and has every mapped table.
+
+    Replaces a fixed sleep at worker start: returns as soon as migrations have
+    run, retrying with backoff; raises TimeoutError after `timeout` seconds.
+    """
+    deadline = time.monotonic() + timeout
+    delay = 0.5
+    reported = None
+    while True:
+        try:
+            async with engine.connect() as conn:
+                present = await conn.run_sync(lambda sync_conn: set(inspect(sync_conn).get_table_names()))
+            missing = sorted(set(Base.metadata.tables) - present)
+            if not missing:
+                return
+            reason = f"missing tables: {', '.join(missing)}"
+        except (OSError, exc.DBAPIError) as e:
+            reason = f"{type(e).__name__}: {e}".splitlines()[0]
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"Database not ready after {timeout:.0f}s ({reason})")
+        if reason != reported:
+            print(f"Waiting for the database ({reason})...")
+            reported = reason
+        await asyncio.sleep(min(delay, remaining))
+        delay = min(delay * 2, 5.0)
+
+
 async def get_db() -> AsyncSession:
     async with SessionLocal() as session:
         yield session
@@ -1,8 +1,12 @@
+from dataclasses import dataclass
+from itertools import chain
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import event, select
+from sqlalchemy.orm import ORMExecuteState, Session, UOWTransaction
+from .cache import TTLCache
 from .config import settings
 from .database import get_db
 from ..models.user import User, Role
@@ -11,7 +15,64 @@ from ..models.user import User, Role
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> User:
+@dataclass(frozen=True, slots=True)
+class CurrentUser:
+    """Identity of the authenticated caller; deliberately not an ORM object."""
+
+    id: int
+    email: str
+    role: Role
+
+
+# user id -> identity, so most requests authenticate without a DB round-trip
+_principal_cache: TTLCache[int, CurrentUser] = TTLCache(
+    settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL_SECONDS
+)
+
+
+def invalidate_user(user_id: int | None = None) -> None:
+    """Drop cached identity for one user (e.g. after a role change), or all users."""
+    if user_id is None:
+        _principal_cache.clear()
+    else:
+        _principal_cache.pop(user_id)
+
+
+# Users changed in this process are dropped from the cache once the change
+# commits; changes made by other processes age out after AUTH_CACHE_TTL_SECONDS
+_CHANGED_USERS = "auth.changed_users"  # session.info key: user ids, None = all
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session: Session, flush_context: UOWTransaction) -> None:
+    changed = {obj.id for obj in chain(session.dirty, session.deleted) if isinstance(obj, User)}
+    if changed:
+        session.info.setdefault(_CHANGED_USERS, set()).update(changed)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_user_changes(state: ORMExecuteState) -> None:
+    # update(User) / delete(User): which rows match is unknown, so drop everyone
+    if (state.is_update or state.is_delete) and any(m.class_ is User for m in state.all_mappers):
+        state.session.info.setdefault(_CHANGED_USERS, set()).add(None)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session: Session) -> None:
+    changed = session.info.pop(_CHANGED_USERS, ())
+    if None in changed:
+        invalidate_user()
+    else:
+        for user_id in changed:
+            invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_users(session: Session) -> None:
+    session.info.pop(_CHANGED_USERS, None)
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> CurrentUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -22,17 +83,25 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
         sub: str | None = payload.get("sub")
         if sub is None:
             raise credentials_exception
-    except JWTError:
+        user_id = int(sub)
+    except (JWTError, ValueError):
         raise credentials_exception
 
-    result = await db.execute(select(User).where(User.id == int(sub)))
-    user = result.scalars().first()
-    if not user:
+    cached = _principal_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    # Column-only select: never loads relationships such as User.notes
+    result = await db.execute(select(User.id, User.email, User.role).where(User.id == user_id))
+    row = result.first()
+    if not row:
         raise credentials_exception
+    user = CurrentUser(id=row.id, email=row.email, role=row.role)
+    _principal_cache.set(user_id, user)
     return user
 
 
-async def require_admin(user: User = Depends(get_current_user)) -> User:
+async def require_admin(user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     if user.role != Role.ADMIN:
         raise HTTPException(status_code=403, detail="Admin required")
     return user
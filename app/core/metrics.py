@@ -0,0 +1,308 @@
+"""
+Minimal Prometheus metrics (text exposition format 0.0.4) without a client library.
+
+Metrics are module-level objects; `.labels(...)` returns a child that is created
+once and cached, so hot paths bind their children up front and an update is a
+couple of attribute writes. With METRICS_ENABLED=false updates are no-ops.
+Collectors registered with `on_collect` refresh values right before rendering.
+"""
+
+from __future__ import annotations
+
+import time
+from bisect import bisect_left
+from typing import Awaitable, Callable, Sequence
+
+from .config import settings
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_metrics: list["_Metric"] = []
+_collectors: list[Callable[[], Awaitable[None] | None]] = []
+
+
+class _State:
+    enabled = settings.METRICS_ENABLED
+
+
+def set_enabled(enabled: bool) -> None:
+    _State.enabled = enabled
+
+
+def is_enabled() -> bool:
+    return _State.enabled
+
+
+def on_collect(func: Callable[[], Awaitable[None] | None]) -> Callable[[], Awaitable[None] | None]:
+    """Register `func` (sync or async) to run before every render."""
+    _collectors.append(func)
+    return func
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+    value = float(value)
+    if value == float("inf"):
+        return "+Inf"
+    if value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+        _metrics.append(self)
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            key = tuple(str(v) for v in values)
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children.get(key) or self._new_child()
+            self._children[key] = child
+        return child
+
+    def _new_child(self):  # pragma: no cover - abstract
+        raise NotImplementedError
+
+    def _label_str(self, key: tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        children = self._children or ({(): self._new_child()} if not self.labelnames else {})
+        for key, child in list(children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key, child) -> list[str]:
+        return [f"{self.name}{self._label_str(key)} {_fmt(child.value)}"]
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        if _State.enabled:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        if _State.enabled:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        if _State.enabled:
+            self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot: above the largest bound
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        if _State.enabled:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.sum += value
+
+    def time(self) -> "_Timer":
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("child", "start")
+
+    def __init__(self, child: _HistogramValue) -> None:
+        self.child = child
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.child.observe(time.perf_counter() - self.start)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _render_child(self, key, child) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+            cumulative += count
+            le = 'le="' + _fmt(bound) + '"'
+            lines.append(f"{self.name}_bucket{self._label_str(key, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{self._label_str(key)} {_fmt(child.sum)}")
+        lines.append(f"{self.name}_count{self._label_str(key)} {cumulative}")
+        return lines
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every request by its route template (not the raw path)."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not _State.enabled:
+            await self.app(scope, receive, send)
+            return
+        status = "500"
+
+        async def send_wrapper(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_request_duration.labels(scope["method"], _route_template(scope), status).observe(
+                time.perf_counter() - start
+            )
+
+
+def _route_template(scope) -> str:
+    # Routes of an included router keep their router-relative path; FastAPI
+    # records the full (prefixed) template on the effective route context.
+    context = (scope.get("fastapi") or {}).get("effective_route_context")
+    path = getattr(context, "path", None) or getattr(scope.get("route"), "path", None)
+    return path or "<unmatched>"
+
+
+def instrument_engine(engine) -> None:
+    """Time every statement on `engine` (an AsyncEngine or Engine)."""
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+    ops = {op: db_query_duration.labels(op.lower()) for op in ("SELECT", "INSERT", "UPDATE", "DELETE")}
+    other = db_query_duration.labels("other")
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany) -> None:
+        if context is not None:
+            context._metrics_start = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany) -> None:
+        start = getattr(context, "_metrics_start", None)
+        if start is None:
+            return
+        child = other
+        for op, candidate in ops.items():
+            if statement.startswith(op):
+                child = candidate
+                break
+        child.observe(time.perf_counter() - start)
+
+
+async def render() -> str:
+    """Run the collectors, then render every metric."""
+    for collect in _collectors:
+        # A failing collector (e.g. database down) must not take the scrape with it
+        try:
+            result = collect()
+            if result is not None:
+                await result
+        except Exception as e:
+            print(f"Metrics collector {getattr(collect, '__name__', collect)} failed: {e}")
+    lines: list[str] = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- Application metrics -----------------------------------------------------
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route", "status")
+)
+db_query_duration = Histogram(
+    "db_query_duration_seconds", "Database statement execution time", ("operation",)
+)
+db_pool_wait = Histogram("db_pool_wait_seconds", "Time to check a connection out of the pool")
+db_pool_timeouts = Counter("db_pool_timeouts_total", "Checkouts that gave up waiting for a connection")
+db_pool_connections = Gauge(
+    "db_pool_connections", "Pool connections by state (refreshed at scrape time)", ("role", "state")
+)
+notes_by_status = Gauge("notes", "Notes by status (refreshed at scrape time)", ("status",))
+note_queue_wait = Histogram(
+    "note_queue_wait_seconds", "Time from queuing a note to its first claim, by lane", ("priority",)
+)
+note_claim_to_done = Histogram(
+    "note_claim_to_done_seconds", "Time from a worker claiming a note to storing its outcome", ("outcome",)
+)
+summarizer_duration = Histogram(
+    "summarizer_batch_duration_seconds", "Summarizer call latency per batch", ("provider",)
+)
+worker_in_flight = Gauge("worker_in_flight_notes", "Notes the worker is summarizing right now")
+summarizer_notes = Counter("summarizer_notes_total", "Notes sent to the summarizer", ("provider",))
+ollama_fallbacks = Counter(
+    "ollama_fallbacks_total", "LLM summaries replaced by the extractive fallback", ("reason",)
+)
+summarizer_circuit_open = Gauge(
+    "summarizer_circuit_open", "1 while a provider's circuit breaker is open", ("provider",)
+)
+note_reads = Counter(
+    "note_reads_total", "GET /notes/{id} by how it was answered", ("source",)
+)
+note_failures = Counter(
+    "note_failures_total", "Failed summarization attempts by what happened to the note", ("outcome",)
+)
@@ -1,9 +1,28 @@
+import os
 from datetime import datetime, timedelta, timezone
+from typing import Callable, TypeVar
+
+import anyio
+import sniffio
+from fastapi import HTTPException, status
 from jose import jwt
 from passlib.context import CryptContext
 from ..core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+T = TypeVar("T")
+
+# Hashes with any other cost are upgraded on the next successful login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+# bcrypt releases the GIL, so a small thread pool keeps hashing off the event loop
+_limiters: dict[str, anyio.CapacityLimiter] = {}
+_stats = {"pending": 0, "completed": 0, "failed": 0, "rejected": 0, "rehashed": 0}
 
 
 def hash_password(password: str) -> str:
@@ -14,6 +33,60 @@ def verify_password(password: str, hashed: str) -> bool:
     return pwd_context.verify(password, hashed)
 
 
+def password_hash_stats() -> dict[str, int]:
+    return dict(_stats)
+
+
+def _hash_threads() -> int:
+    if settings.PASSWORD_HASH_THREADS is not None:
+        return settings.PASSWORD_HASH_THREADS
+    return min(4, os.cpu_count() or 1)
+
+
+def _limiter() -> anyio.CapacityLimiter:
+    # One limiter per async library (the test suite runs under asyncio and trio)
+    library = sniffio.current_async_library()
+    limiter = _limiters.get(library)
+    if limiter is None:
+        limiter = _limiters[library] = anyio.CapacityLimiter(_hash_threads())
+    return limiter
+
+
+async def _offload(func: Callable[..., T], *args) -> T:
+    if _hash_threads() <= 0:
+        return func(*args)
+    # Bounded queue: shed load instead of letting a login storm pile up requests
+    if _stats["pending"] >= settings.PASSWORD_HASH_MAX_PENDING:
+        _stats["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many authentication requests, retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    _stats["pending"] += 1
+    try:
+        result = await anyio.to_thread.run_sync(func, *args, limiter=_limiter())
+    except Exception:
+        _stats["failed"] += 1
+        raise
+    finally:
+        _stats["pending"] -= 1
+    _stats["completed"] += 1
+    return result
+
+
+async def hash_password_async(password: str) -> str:
+    return await _offload(pwd_context.hash, password)
+
+
+async def verify_and_update_password(password: str, hashed: str) -> tuple[bool, str | None]:
+    """Verify off the event loop; also returns a new hash when the stored one is outdated."""
+    ok, new_hash = await _offload(pwd_context.verify_and_update, password, hashed)
+    if new_hash:
+        _stats["rehashed"] += 1
+    return ok, new_hash
+
+
 def create_access_token(subject: str) -> str:
     expire = datetime.now(tz=timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode = {"sub": subject, "exp": expire}
@@ -1,10 +1,11 @@
 import sys
 import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from .core.config import settings
+from .core import metrics
 from .core.migrations import upgrade_head
 import os
 from .core.exceptions import (
@@ -13,6 +14,8 @@ from .core.exceptions import (
     general_exception_handler
 )
 from .routers import auth, notes
+from .services import telemetry  # noqa: F401 - registers the scrape-time collectors
+from .services.events import broker
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
@@ -26,6 +29,7 @@ async def lifespan(_: FastAPI):
     if os.getenv("RUN_MIGRATIONS_ON_STARTUP", "false").lower() in {"1", "true", "yes"}:
         upgrade_head()
     yield
+    await broker.aclose()
 
 
 app = FastAPI(
@@ -41,6 +45,7 @@ app = FastAPI(
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
 app.add_exception_handler(Exception, general_exception_handler)
 
+app.add_middleware(metrics.MetricsMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -58,6 +63,13 @@ def health():
     return {"status": "ok", "env": settings.ENV, "version": "0.1.0"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    if not metrics.is_enabled():
+        return Response(status_code=404)
+    return Response(await metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.get("/")
 def root():
     return {
@@ -1,4 +1,5 @@
 from .user import User, Role
 from .note import Note, NoteStatus
+from .summary_cache import SummaryCacheEntry
 
-__all__ = ["User", "Role", "Note", "NoteStatus"]
+__all__ = ["User", "Role", "Note", "NoteStatus", "SummaryCacheEntry"]
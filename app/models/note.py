@@ -1,4 +1,4 @@
-from sqlalchemy import String, Integer, DateTime, Enum, Text, ForeignKey
+from sqlalchemy import DDL, BigInteger, String, Integer, DateTime, Enum, Text, ForeignKey, Index, event
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime, UTC
 import enum
@@ -12,8 +12,27 @@ class NoteStatus(str, enum.Enum):
     failed = "failed"
 
 
+class NotePriority(str, enum.Enum):
+    """Scheduling lane: interactive notes (POST /notes) get most worker capacity, bulk imports the rest."""
+    interactive = "interactive"
+    bulk = "bulk"
+
+
 class Note(Base):
     __tablename__ = "notes"
+    __table_args__ = (
+        # Serves the worker's claim query (lowest fair_rank first, per lane)
+        Index("ix_notes_status_priority_rank", "status", "priority", "fair_rank"),
+        # Latest fair_rank an owner holds in a lane (see app/services/scheduling.py)
+        Index("ix_notes_owner_status_priority_rank", "owner_id", "status", "priority", "fair_rank"),
+        # Keyset pagination of GET /notes, with and without a status filter
+        Index("ix_notes_owner_status_created_id", "owner_id", "status", "created_at", "id"),
+        Index("ix_notes_owner_created_id", "owner_id", "created_at", "id"),
+        # Earliest pending retry (app/worker.py next_retry_in)
+        Index("ix_notes_status_next_attempt_at", "status", "next_attempt_at"),
+        # Change polling for GET /notes/events without Postgres LISTEN
+        Index("ix_notes_updated_at", "updated_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     owner_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), index=True, nullable=False)
@@ -23,6 +42,26 @@ class Note(Base):
     status: Mapped[NoteStatus] = mapped_column(Enum(NoteStatus, name="notestatus"), default=NoteStatus.queued, nullable=False)
     attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
 
+    # Fair scheduling: lane, and a virtual finish rank that interleaves owners within it
+    priority: Mapped[NotePriority] = mapped_column(
+        Enum(NotePriority, name="notepriority"), default=NotePriority.interactive, nullable=False
+    )
+    fair_rank: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+
+    # Set while a worker holds the note in `processing`; an expired lease is re-queued
+    lease_owner: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    # A failed attempt re-queues the note with a backoff: it is not claimed before
+    # next_attempt_at (NULL = right away). last_error keeps the latest failure.
+    next_attempt_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    # Incremental re-summarization after appends (see app/services/incremental.py);
+    # NULL until the note is first edited. Deferred: it can be larger than the
+    # note, and only the worker and PATCH need it (they undefer it)
+    summary_state: Mapped[str | None] = mapped_column(Text, nullable=True, deferred=True)
+
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=lambda: datetime.now(UTC), nullable=False
     )
@@ -34,3 +73,33 @@ class Note(Base):
     )
 
     owner = relationship("User", back_populates="notes")
+
+
+# Full-text search over raw_text + summary (see app/services/search.py). Not mapped on the
+# model because the structures are dialect-specific; migration 0004 runs the same DDL.
+POSTGRES_SEARCH_DDL = (
+    "ALTER TABLE notes ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple'::regconfig, coalesce(summary, '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, raw_text), 'B')) STORED",
+    "CREATE INDEX ix_notes_search_vector ON notes USING GIN (search_vector)",
+)
+
+SQLITE_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE notes_fts USING fts5("
+    "raw_text, summary, content='notes', content_rowid='id', tokenize='unicode61')",
+    "CREATE TRIGGER notes_fts_ai AFTER INSERT ON notes BEGIN "
+    "INSERT INTO notes_fts(rowid, raw_text, summary) VALUES (new.id, new.raw_text, new.summary); END",
+    "CREATE TRIGGER notes_fts_ad AFTER DELETE ON notes BEGIN "
+    "INSERT INTO notes_fts(notes_fts, rowid, raw_text, summary) "
+    "VALUES ('delete', old.id, old.raw_text, old.summary); END",
+    "CREATE TRIGGER notes_fts_au AFTER UPDATE OF raw_text, summary ON notes BEGIN "
+    "INSERT INTO notes_fts(notes_fts, rowid, raw_text, summary) "
+    "VALUES ('delete', old.id, old.raw_text, old.summary); "
+    "INSERT INTO notes_fts(rowid, raw_text, summary) VALUES (new.id, new.raw_text, new.summary); END",
+)
+
+for _stmt in POSTGRES_SEARCH_DDL:
+    event.listen(Note.__table__, "after_create", DDL(_stmt).execute_if(dialect="postgresql"))
+for _stmt in SQLITE_SEARCH_DDL:
+    event.listen(Note.__table__, "after_create", DDL(_stmt).execute_if(dialect="sqlite"))
+event.listen(Note.__table__, "before_drop", DDL("DROP TABLE IF EXISTS notes_fts").execute_if(dialect="sqlite"))
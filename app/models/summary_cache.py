@@ -0,0 +1,17 @@
+from sqlalchemy import String, DateTime, Text
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime, UTC
+from ..core.database import Base
+
+
+class SummaryCacheEntry(Base):
+    """Summary of a normalized note text under one summarizer configuration."""
+
+    __tablename__ = "summary_cache"
+
+    # sha256 hex of normalized text + provider/model/limits (see app/services/summary_cache.py)
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    summary: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(UTC), nullable=False
+    )
@@ -21,4 +21,5 @@ class User(Base):
         DateTime(timezone=True), default=lambda: datetime.now(UTC), nullable=False
     )
 
-    notes = relationship("Note", back_populates="owner", lazy="selectin")
+    # Never loaded implicitly: an agent can own tens of thousands of notes
+    notes = relationship("Note", back_populates="owner", lazy="raise")
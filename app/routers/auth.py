@@ -3,13 +3,25 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from ..core.database import get_db
-from ..core.security import hash_password, verify_password, create_access_token
+from ..core.security import hash_password_async, verify_and_update_password, create_access_token
 from ..models.user import User, Role
 from ..schemas.auth import SignupRequest, LoginRequest, TokenResponse
 
 router = APIRouter()
 
 
+async def _check_password(db: AsyncSession, user: User, password: str) -> bool:
+    # End the read transaction first: a login storm must not pin pooled connections
+    # while bcrypt runs
+    await db.commit()
+    ok, new_hash = await verify_and_update_password(password, user.hashed_password)
+    if ok and new_hash:
+        # Cost parameters changed since this hash was made: upgrade it transparently
+        user.hashed_password = new_hash
+        await db.commit()
+    return ok
+
+
 @router.post("/signup", response_model=TokenResponse)
 async def signup(data: SignupRequest, db: AsyncSession = Depends(get_db)):
     """Register a new user with email and password"""
@@ -24,7 +36,7 @@ async def signup(data: SignupRequest, db: AsyncSession = Depends(get_db)):
     # Create new user
     user = User(
         email=data.email, 
-        hashed_password=hash_password(data.password), 
+        hashed_password=await hash_password_async(data.password), 
         role=Role(data.role)
     )
     db.add(user)
@@ -42,7 +54,7 @@ async def login(data: LoginRequest, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(User).where(User.email == data.email))
     user = result.scalars().first()
     
-    if not user or not verify_password(data.password, user.hashed_password):
+    if not user or not await _check_password(db, user, data.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, 
             detail="Invalid email or password"
@@ -58,7 +70,7 @@ async def token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSessi
     result = await db.execute(select(User).where(User.email == form_data.username))
     user = result.scalars().first()
 
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await _check_password(db, user, form_data.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid username or password",
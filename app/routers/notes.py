@@ -1,72 +1,480 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+import base64
+import csv
+import io
+import json
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from ..core.database import get_db
-from ..core.deps import get_current_user
-from ..models.user import User, Role
-from ..models.note import Note, NoteStatus
-from ..schemas.note import NoteCreate, NoteOut
+from sqlalchemy import insert, select, func, tuple_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import undefer
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from ..core.cache import TTLCache
+from ..core import metrics
+from ..core.config import settings
+from ..core.database import SessionLocal, get_db
+from ..core.deps import CurrentUser, get_current_user
+from ..models.user import Role
+from ..models.note import Note, NotePriority, NoteStatus
+from ..schemas.note import BulkItemError, BulkNotesOut, NoteCreate, NoteOut, NoteUpdate
+from ..services.events import broker, note_event, publish_note_events
+from ..services.incremental import APPEND_SEPARATOR, initial_state
+from ..services.ingest import BulkBodyError, ItemError, iter_items
+from ..services.note_cache import CachedNote, etag, is_conditional, last_modified, not_modified, note_cache
+from ..services.notify import notify_queued
+from ..services.scheduling import next_fair_rank
+from ..services.search import ranked_search, search_clause
 
 router = APIRouter()
 
 
 @router.post("", response_model=NoteOut, status_code=201)
-async def create_note(payload: NoteCreate, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
+async def create_note(payload: NoteCreate, db: AsyncSession = Depends(get_db), user: CurrentUser = Depends(get_current_user)):
     """Create a new note and queue it for summarization"""
     if not payload.raw_text.strip():
         raise HTTPException(status_code=400, detail="Note text cannot be empty")
     
-    note = Note(owner_id=user.id, raw_text=payload.raw_text, status=NoteStatus.queued)
+    priority = NotePriority(payload.priority)
+    note = Note(
+        owner_id=user.id,
+        raw_text=payload.raw_text,
+        status=NoteStatus.queued,
+        priority=priority,
+        fair_rank=await next_fair_rank(db, user.id, priority),
+    )
     db.add(note)
+    await db.flush()
+    await publish_note_events(db, [note_event(note)])
+    await notify_queued(db)
     await db.commit()
     await db.refresh(note)
     return NoteOut.model_validate(note)
 
 
-@router.get("/{note_id}", response_model=NoteOut)
-async def get_note(note_id: int, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
-    """Get a specific note by ID (role-based access)"""
+@router.post("/bulk", response_model=BulkNotesOut)
+async def create_notes_bulk(request: Request, db: AsyncSession = Depends(get_db), user: CurrentUser = Depends(get_current_user)):
+    """Create many notes from a streamed NDJSON or JSON array body of `NoteCreate` items.
+
+    Items are validated as they arrive and inserted in chunks of
+    BULK_INSERT_CHUNK_SIZE rows, each committed (and announced to the
+    workers and event subscribers) on its own. Invalid items are reported by index and skipped.
+    Imported notes are queued in the `bulk` lane.
+    """
+    ids: list[int | None] = []
+    errors: list[BulkItemError] = []
+    batch: list[tuple[int, str]] = []
+
+    async def flush() -> None:
+        rank = await next_fair_rank(db, user.id, NotePriority.bulk)
+        result = await db.execute(
+            insert(Note).returning(
+                Note.id, Note.owner_id, Note.status, Note.attempts, sort_by_parameter_order=True
+            ),
+            [
+                {
+                    "owner_id": user.id,
+                    "raw_text": text,
+                    "status": NoteStatus.queued,
+                    "priority": NotePriority.bulk,
+                    "fair_rank": rank + i,
+                }
+                for i, (_, text) in enumerate(batch)
+            ],
+        )
+        rows = result.all()
+        for (index, _), row in zip(batch, rows):
+            ids[index] = row.id
+        await publish_note_events(db, [note_event(row) for row in rows])
+        await notify_queued(db)
+        await db.commit()
+        batch.clear()
+
+    try:
+        async for item in iter_items(request.stream(), max_item_bytes=settings.BULK_MAX_ITEM_BYTES):
+            index = len(ids)
+            ids.append(None)
+            if isinstance(item, ItemError):
+                errors.append(BulkItemError(index=index, detail=str(item)))
+                continue
+            try:
+                payload = NoteCreate.model_validate(item)
+            except ValidationError as e:
+                errors.append(BulkItemError(index=index, detail=e.errors()[0]["msg"]))
+                continue
+            if not payload.raw_text.strip():
+                errors.append(BulkItemError(index=index, detail="Note text cannot be empty"))
+                continue
+            batch.append((index, payload.raw_text))
+            if len(batch) >= settings.BULK_INSERT_CHUNK_SIZE:
+                await flush()
+    except BulkBodyError as e:
+        # Nothing after this point can be parsed; what came before is still stored
+        errors.append(BulkItemError(index=len(ids), detail=str(e)))
+    if batch:
+        await flush()
+
+    if not ids and not errors:
+        raise HTTPException(status_code=400, detail="No notes in request body")
+    return BulkNotesOut(created=sum(i is not None for i in ids), ids=ids, errors=errors)
+
+
+_EXPORT_COLUMNS = (
+    Note.id, Note.owner_id, Note.status, Note.attempts, Note.raw_text, Note.summary, Note.created_at, Note.updated_at,
+)
+_EXPORT_FIELDS = [c.key for c in _EXPORT_COLUMNS]
+
+
+def _export_records(rows) -> list[dict]:
+    return [
+        {
+            **row._asdict(),
+            "status": row.status.value,
+            "created_at": row.created_at.isoformat(),
+            "updated_at": row.updated_at.isoformat(),
+        }
+        for row in rows
+    ]
+
+
+def _encode_ndjson(rows) -> bytes:
+    return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in _export_records(rows)).encode()
+
+
+def _encode_csv(rows, header: bool) -> bytes:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=_EXPORT_FIELDS)
+    if header:
+        writer.writeheader()
+    writer.writerows(_export_records(rows))
+    return buf.getvalue().encode()
+
+
+@router.get("/export")
+async def export_notes(
+    user: CurrentUser = Depends(get_current_user),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    status: str | None = Query(None, pattern="^(queued|processing|done|failed)$"),
+    q: str | None = Query(None, min_length=1, max_length=200),
+):
+    """Stream every visible note as NDJSON or CSV, oldest first (role-based visibility).
+
+    Rows come from a server-side cursor in batches of EXPORT_BATCH_SIZE and are
+    written out as they arrive, so memory stays flat for any export size.
+    """
+
+    async def body():
+        # Own session: the response outlives the request's dependencies
+        async with SessionLocal() as session:
+            filters = _note_filters(user, status, q, session.bind.dialect.name)
+            stmt = (
+                select(*_EXPORT_COLUMNS)
+                .where(*filters)
+                .order_by(Note.id)
+                .execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+            )
+            result = await session.stream(stmt)
+            if format == "csv":
+                yield _encode_csv([], header=True)
+            async for rows in result.partitions():
+                yield _encode_csv(rows, header=False) if format == "csv" else _encode_ndjson(rows)
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="notes.{format}"'},
+    )
+
+
+def _sse(evt: dict) -> bytes:
+    return f"event: note\ndata: {json.dumps(evt, ensure_ascii=False)}\n\n".encode()
+
+
+@router.get("/events")
+async def note_events(
+    db: AsyncSession = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+    note_id: int | None = Query(None, gt=0, description="Watch a single note instead of all visible notes"),
+):
+    """Server-Sent Events stream of note status changes (role-based visibility).
+
+    Each `note` event carries id, owner_id, status, attempts and summary. When
+    watching one note, its current state is sent first. The stream ends if the
+    client falls too far behind; reconnecting resyncs it.
+    """
+    sub = await broker.subscribe(owner_id=None if user.role == Role.ADMIN else user.id, note_id=note_id)
+    try:
+        snapshot = []
+        if note_id is not None:
+            note = (await db.execute(select(Note).where(Note.id == note_id))).scalars().first()
+            if not note:
+                raise HTTPException(status_code=404, detail="Note not found")
+            if user.role != Role.ADMIN and note.owner_id != user.id:
+                raise HTTPException(status_code=403, detail="Access denied: insufficient permissions")
+            snapshot.append(note_event(note))
+        # Don't hold a pooled connection for the lifetime of the stream
+        await db.close()
+    except BaseException:
+        broker.unsubscribe(sub)
+        raise
+
+    async def stream():
+        try:
+            for evt in snapshot:
+                yield _sse(evt)
+            last = snapshot[-1] if snapshot else None
+            while not sub.lagged:
+                evt = await sub.get(settings.SSE_HEARTBEAT_SECONDS)
+                if evt is None:
+                    yield b": keep-alive\n\n"
+                elif evt != last:  # a change the snapshot already showed (polled events lag)
+                    last = evt
+                    yield _sse(evt)
+        finally:
+            broker.unsubscribe(sub)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _check_read_access(user: CurrentUser, owner_id: int) -> None:
+    if user.role != Role.ADMIN and owner_id != user.id:
+        raise HTTPException(status_code=403, detail="Access denied: insufficient permissions")
+
+
+def _conditional_response(request: Request, tag: str, updated_at: datetime, body: bytes | None = None) -> Response:
+    # Clients may keep the note but must revalidate it (304 while unchanged)
+    headers = {"ETag": tag, "Cache-Control": "private, no-cache"}
+    modified = last_modified(updated_at)
+    if modified is not None:
+        headers["Last-Modified"] = modified
+    if body is None or not_modified(request.headers, tag, updated_at):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get(
+    "/{note_id}",
+    response_model=NoteOut,
+    responses={304: {"description": "Not modified since the ETag / Last-Modified the client sent"}},
+)
+async def get_note(
+    note_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    """Get a specific note by ID (role-based access)
+
+    Responses carry `ETag` and `Last-Modified`; send them back as
+    `If-None-Match` / `If-Modified-Since` to get 304 while the note is unchanged.
+    Done notes are served from an in-process cache.
+    """
     if note_id <= 0:
         raise HTTPException(status_code=400, detail="Invalid note ID")
-        
+
+    cached = note_cache.get(note_id)
+    if cached is not None:
+        _check_read_access(user, cached.owner_id)
+        response = _conditional_response(request, cached.etag, cached.updated_at, cached.body)
+        metrics.note_reads.labels("not_modified" if response.status_code == 304 else "cache").inc()
+        return response
+
+    version = note_cache.version()
+    if is_conditional(request.headers):
+        # Revalidation: owner and version are enough to answer 304
+        row = (await db.execute(select(Note.owner_id, Note.updated_at).where(Note.id == note_id))).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Note not found")
+        _check_read_access(user, row.owner_id)
+        tag = etag(note_id, row.updated_at)
+        if not_modified(request.headers, tag, row.updated_at):
+            metrics.note_reads.labels("not_modified").inc()
+            return _conditional_response(request, tag, row.updated_at)
+
     result = await db.execute(select(Note).where(Note.id == note_id))
     note = result.scalars().first()
+    if not note:
+        raise HTTPException(status_code=404, detail="Note not found")
+    _check_read_access(user, note.owner_id)
+    tag = etag(note.id, note.updated_at)
+    entry = CachedNote(note.owner_id, tag, note.updated_at, NoteOut.model_validate(note).model_dump_json().encode())
+    if note.status == NoteStatus.done:
+        note_cache.put(note.id, entry, version)
+    metrics.note_reads.labels("database").inc()
+    return _conditional_response(request, tag, note.updated_at, entry.body)
+
+
+@router.patch("/{note_id}", response_model=NoteOut)
+async def update_note(
+    note_id: int,
+    payload: NoteUpdate,
+    db: AsyncSession = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    """Append to a note (or replace its text) and queue it for re-summarization.
+
+    Appended text is re-summarized incrementally: the worker folds only the new
+    text into the note's summary. A replacement is summarized from scratch. A
+    note that is being processed is taken back; the worker discards its result.
+    """
+    if note_id <= 0:
+        raise HTTPException(status_code=400, detail="Invalid note ID")
+    change = payload.append if payload.append is not None else payload.raw_text
+    if not change.strip():
+        raise HTTPException(status_code=400, detail="Note text cannot be empty")
+
+    # Row lock: concurrent appends to one note must not lose each other's text
+    result = await db.execute(
+        select(Note).where(Note.id == note_id).options(undefer(Note.summary_state)).with_for_update()
+    )
+    note = result.scalars().first()
     if not note:
         raise HTTPException(status_code=404, detail="Note not found")
     if user.role != Role.ADMIN and note.owner_id != user.id:
         raise HTTPException(status_code=403, detail="Access denied: insufficient permissions")
+
+    if payload.append is not None:
+        raw_text = note.raw_text + APPEND_SEPARATOR + change.strip()
+        # The summary so far covers the old text; notes edited before keep their state
+        summary_state = note.summary_state or (initial_state(len(note.raw_text)) if note.summary else None)
+    else:
+        raw_text, summary_state = change, None
+    if len(raw_text) > settings.NOTE_MAX_CHARS:
+        raise HTTPException(status_code=400, detail=f"Note text cannot exceed {settings.NOTE_MAX_CHARS} characters")
+
+    note.raw_text = raw_text
+    note.summary_state = summary_state
+    if summary_state is None:
+        note.summary = None
+    note.status = NoteStatus.queued
+    note.attempts = 0
+    note.lease_owner = None
+    note.lease_expires_at = None
+    note.next_attempt_at = None
+    note.last_error = None
+    note.fair_rank = await next_fair_rank(db, note.owner_id, note.priority)
+    await db.flush()
+    await publish_note_events(db, [note_event(note)])
+    await notify_queued(db)
+    await db.commit()
+    # Other processes learn about the edit from its event; this one reads its own write
+    note_cache.pop(note.id)
+    await db.refresh(note)
     return NoteOut.model_validate(note)
 
 
+class _ExplainJSON(Executable, ClauseElement):
+    """`EXPLAIN (FORMAT JSON) <select>`, so the planner's row estimate can be read."""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_ExplainJSON, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+# (scope, status, q) -> count, for the estimate mode on databases without planner stats
+_count_cache: TTLCache[tuple, int] = TTLCache(settings.COUNT_CACHE_MAX_ENTRIES, settings.COUNT_CACHE_TTL_SECONDS)
+
+
+def _encode_cursor(note: Note) -> str:
+    raw = json.dumps([note.created_at.isoformat(), note.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, note_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(note_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _note_filters(user: CurrentUser, status: str | None, q: str | None, dialect: str) -> list:
+    filters = []
+    if user.role != Role.ADMIN:
+        filters.append(Note.owner_id == user.id)
+    if status:
+        filters.append(Note.status == status)
+    if q:
+        filters.append(search_clause(q, dialect))
+    return filters
+
+
+async def _count_notes(db: AsyncSession, filters: list, mode: str, cache_key: tuple) -> int:
+    count_stmt = select(func.count()).select_from(Note).where(*filters)
+    if mode == "exact":
+        return (await db.execute(count_stmt)).scalar_one()
+
+    if db.bind.dialect.name == "postgresql":
+        plan = (await db.execute(_ExplainJSON(select(Note.id).where(*filters)))).scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    total = _count_cache.get(cache_key)
+    if total is None:
+        total = (await db.execute(count_stmt)).scalar_one()
+        _count_cache.set(cache_key, total)
+    return total
+
+
 @router.get("", response_model=list[NoteOut])
 async def list_notes(
     response: Response,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None, max_length=200, description="Opaque cursor from X-Next-Cursor"),
     status: str | None = Query(None, pattern="^(queued|processing|done|failed)$"),
     q: str | None = Query(None, min_length=1, max_length=200),
+    count: str | None = Query(
+        None,
+        pattern="^(exact|estimate)$",
+        description="Fill X-Total-Count: exact COUNT(*) or a cheap estimate",
+    ),
 ):
-    base = select(Note)
-    count_stmt = select(func.count())
-    if user.role != Role.ADMIN:
-        base = base.where(Note.owner_id == user.id)
-        count_stmt = count_stmt.select_from(Note).where(Note.owner_id == user.id)
-    else:
-        count_stmt = count_stmt.select_from(Note)
+    """List notes, newest first (role-based visibility).
 
-    if status:
-        base = base.where(Note.status == status)
-        count_stmt = count_stmt.where(Note.status == status)
+    Pass the `X-Next-Cursor` header of a page as `cursor` to fetch the next one;
+    keyset paging costs the same at any depth, unlike `offset`. With `q` the
+    results are full-text matches over text and summary, best match first, and
+    are paged with `offset`.
+    """
+    if cursor and offset:
+        raise HTTPException(status_code=400, detail="Use either cursor or offset, not both")
+    if cursor and q:
+        raise HTTPException(status_code=400, detail="Search results are paged with offset, not cursor")
+
+    dialect = db.bind.dialect.name
+    stmt = select(Note).where(*_note_filters(user, status, None, dialect))
     if q:
-        like = f"%{q}%"
-        base = base.where(Note.raw_text.ilike(like))
-        count_stmt = count_stmt.where(Note.raw_text.ilike(like))
-
-    total = (await db.execute(count_stmt)).scalar_one()
-    stmt = base.order_by(Note.created_at.desc()).limit(limit).offset(offset)
-    result = await db.execute(stmt)
-    notes = result.scalars().all()
-    response.headers["X-Total-Count"] = str(total)
+        stmt = ranked_search(stmt, q, dialect)
+    if cursor:
+        created_at, note_id = _decode_cursor(cursor)
+        stmt = stmt.where(tuple_(Note.created_at, Note.id) < tuple_(created_at, note_id))
+    stmt = stmt.order_by(Note.created_at.desc(), Note.id.desc()).limit(limit).offset(offset)
+    notes = (await db.execute(stmt)).scalars().all()
+
+    if count:
+        scope = None if user.role == Role.ADMIN else user.id
+        filters = _note_filters(user, status, q, dialect)
+        total = await _count_notes(db, filters, count, (scope, status, q))
+        response.headers["X-Total-Count"] = str(total)
+        if count == "estimate":
+            response.headers["X-Total-Count-Estimated"] = "true"
+    if len(notes) == limit and not q:
+        response.headers["X-Next-Cursor"] = _encode_cursor(notes[-1])
     return [NoteOut.model_validate(n) for n in notes]
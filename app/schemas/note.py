@@ -1,9 +1,28 @@
-from pydantic import BaseModel, Field
-from typing import Literal, Optional
+from datetime import datetime
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional
 
 
 class NoteCreate(BaseModel):
     raw_text: str = Field(..., min_length=1, max_length=10000, description="The text content to summarize")
+    priority: Literal["interactive", "bulk"] = Field(
+        "interactive", description="Scheduling lane; POST /notes/bulk always uses `bulk`"
+    )
+
+
+class NoteUpdate(BaseModel):
+    append: Optional[str] = Field(
+        None, min_length=1, max_length=10000, description="Text to add to the end of the note"
+    )
+    raw_text: Optional[str] = Field(
+        None, min_length=1, max_length=10000, description="Replacement text (re-summarized from scratch)"
+    )
+
+    @model_validator(mode="after")
+    def _one_change(self) -> "NoteUpdate":
+        if (self.append is None) == (self.raw_text is None):
+            raise ValueError("Provide exactly one of `append` or `raw_text`")
+        return self
 
 
 class NoteOut(BaseModel):
@@ -12,7 +31,21 @@ class NoteOut(BaseModel):
     summary: Optional[str] = None
     status: Literal["queued", "processing", "done", "failed"]
     attempts: int = 0
+    priority: Literal["interactive", "bulk"] = "interactive"
+    last_error: Optional[str] = Field(None, description="Latest failed attempt, if any")
+    next_attempt_at: Optional[datetime] = Field(None, description="When a queued retry becomes due")
 
     model_config = {
         "from_attributes": True,
     }
+
+
+class BulkItemError(BaseModel):
+    index: int = Field(..., description="Position of the item in the upload (0-based)")
+    detail: str
+
+
+class BulkNotesOut(BaseModel):
+    created: int
+    ids: List[Optional[int]] = Field(..., description="Note id per uploaded item, null where it was rejected")
+    errors: List[BulkItemError]
@@ -0,0 +1,252 @@
+"""
+Note status events for subscribers (GET /notes/events).
+
+Writers call `publish_note_events(session, events)` inside the transaction that
+changes the notes. On Postgres the events travel as NOTIFY on `note_events`, so
+every API process hears what any worker wrote. `broker` fans events out to
+matching subscriptions and to in-process watchers (e.g. the note read cache,
+which drops changed notes).
+
+Without LISTEN (SQLite, or PgBouncer without DATABASE_LISTEN_URL) the worker's
+changes never reach the API process directly. While anyone is subscribed, the
+broker then polls for notes whose `updated_at` moved, every SSE_POLL_SECONDS,
+and turns them into events; a note that changed several times between two
+polls is reported once, in its latest state. Events written in this process
+still reach its watchers right after commit.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import UTC, datetime, timedelta
+from typing import Any, Callable
+
+from sqlalchemy import event, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core import database
+from app.core.config import settings
+from app.models.note import Note
+from app.services.notify import listen_dsn, pg_listen
+
+CHANNEL = "note_events"
+_MAX_PAYLOAD_BYTES = 7900  # NOTIFY payloads must stay below 8000 bytes
+# Polling re-reads this much before the latest change it saw: a transaction
+# may commit a little after the updated_at it wrote
+_POLL_OVERLAP = timedelta(seconds=5)
+
+
+def note_event(note, **changes: Any) -> dict:
+    """Event for `note` (a Note or a row with the same fields), with `changes` applied."""
+    values = {key: getattr(note, key) for key in ("id", "owner_id", "status", "attempts", "summary") if hasattr(note, key)}
+    values.update((key, value) for key, value in changes.items() if key in ("status", "attempts", "summary"))
+    status = values.get("status")
+    values["status"] = getattr(status, "value", status)
+    values.setdefault("summary", None)
+    return values
+
+
+def _encode(evt: dict) -> str:
+    payload = json.dumps(evt, ensure_ascii=False)
+    if len(payload.encode()) > _MAX_PAYLOAD_BYTES:
+        # Too big for NOTIFY; subscribers can read the summary with GET /notes/{id}
+        payload = json.dumps({**evt, "summary": None, "summary_omitted": True})
+    return payload
+
+
+async def publish_note_events(session: AsyncSession, events: list[dict]) -> None:
+    """Queue `events` for subscribers; they are sent when `session` commits."""
+    if not events:
+        return
+    if session.bind.dialect.name == "postgresql":
+        await session.execute(
+            text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+            {"channel": CHANNEL, "payloads": [_encode(e) for e in events]},
+        )
+    else:
+        session.info.setdefault(CHANNEL, []).extend(events)
+
+
+@event.listens_for(Session, "after_commit")
+def _deliver_local(session: Session) -> None:
+    # Subscribers get these from polling, which also sees other processes' changes
+    for evt in session.info.pop(CHANNEL, ()):
+        broker.publish(evt, subscribers=False)
+
+
+def _aware(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes (stored as UTC)
+    return value if value.tzinfo is not None else value.replace(tzinfo=UTC)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_local(session: Session) -> None:
+    session.info.pop(CHANNEL, None)
+
+
+class Subscription:
+    """Events for one owner's notes (all notes when `owner_id` is None), or one note."""
+
+    def __init__(self, owner_id: int | None, note_id: int | None) -> None:
+        self.owner_id = owner_id
+        self.note_id = note_id
+        self.lagged = False  # the queue overflowed; the subscriber must resync
+        self._queue: asyncio.Queue[dict] = asyncio.Queue(settings.SSE_QUEUE_SIZE)
+        self._loop = asyncio.get_running_loop()
+
+    def matches(self, evt: dict) -> bool:
+        if self.note_id is not None and evt.get("id") != self.note_id:
+            return False
+        return self.owner_id is None or evt.get("owner_id") == self.owner_id
+
+    def push(self, evt: dict) -> None:
+        try:
+            same_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            same_loop = False
+        if same_loop:
+            self._put(evt)
+        elif not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._put, evt)
+
+    def _put(self, evt: dict) -> None:
+        try:
+            self._queue.put_nowait(evt)
+        except asyncio.QueueFull:
+            self.lagged = True
+
+    async def get(self, timeout: float) -> dict | None:
+        """Next event, or None when nothing arrived within `timeout`."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class NoteEventBroker:
+    def __init__(self) -> None:
+        self._subscriptions: set[Subscription] = set()
+        self._watchers: list[Callable[[dict], None]] = []
+        self._task: asyncio.Task | None = None
+        self._connected: asyncio.Event | None = None
+        self._poller: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    async def subscribe(self, *, owner_id: int | None, note_id: int | None = None) -> Subscription:
+        await self._ensure_listener()
+        sub = Subscription(owner_id, note_id)
+        self._subscriptions.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        self._subscriptions.discard(sub)
+
+    def watch(self, callback: Callable[[dict], None]) -> None:
+        """Call `callback(evt)` for every event this process receives; it must not block."""
+        self._watchers.append(callback)
+
+    def listening(self) -> bool:
+        """True while events from other processes arrive (Postgres LISTEN, started if needed)."""
+        return self._start_listener() and self._connected.is_set()
+
+    def publish(self, evt: dict, *, subscribers: bool = True) -> None:
+        for watcher in self._watchers:
+            watcher(evt)
+        if not subscribers:
+            return
+        for sub in list(self._subscriptions):
+            if sub.matches(evt):
+                sub.push(evt)
+
+    def _on_notify(self, payload: str) -> None:
+        try:
+            evt = json.loads(payload)
+        except ValueError:
+            return
+        self.publish(evt)
+
+    def _start_listener(self) -> bool:
+        dsn = listen_dsn()
+        if dsn is None:
+            return False
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False  # not running on asyncio (e.g. trio): no background LISTEN
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            connected = self._connected = asyncio.Event()
+            self._task = loop.create_task(
+                pg_listen(dsn, CHANNEL, self._on_notify, on_connect=connected.set, on_disconnect=connected.clear)
+            )
+        return True
+
+    async def _poll(self) -> None:
+        """Publish the notes whose updated_at moved, for as long as anyone is subscribed."""
+        started = since = datetime.now(UTC)
+        seen: dict[int, datetime] = {}  # note -> updated_at already handled
+        while self._subscriptions:
+            try:
+                async with database.SessionLocal() as session:
+                    rows = (
+                        await session.execute(
+                            select(Note.id, Note.owner_id, Note.status, Note.attempts, Note.summary, Note.updated_at)
+                            .where(Note.updated_at > since - _POLL_OVERLAP)
+                            .order_by(Note.updated_at)
+                        )
+                    ).all()
+            except Exception as e:
+                print(f"Note event polling failed: {e}")
+                rows = []
+            for row in rows:
+                updated = _aware(row.updated_at)
+                if seen.get(row.id) == updated:
+                    continue
+                seen[row.id] = updated
+                since = max(since, updated)
+                if updated >= started:  # older changes predate every subscriber
+                    self.publish(note_event(row))
+            seen = {note_id: at for note_id, at in seen.items() if at > since - _POLL_OVERLAP}
+            await asyncio.sleep(settings.SSE_POLL_SECONDS)
+
+    def _start_poller(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # not running on asyncio (e.g. trio)
+        if self._poller is None or self._poller.done() or self._poller.get_loop() is not loop:
+            self._poller = loop.create_task(self._poll())
+
+    async def _ensure_listener(self) -> None:
+        if not self._start_listener():
+            self._start_poller()
+            return
+        # Subscribers take a snapshot right after subscribing; LISTEN must already be active
+        try:
+            await asyncio.wait_for(self._connected.wait(), 5)
+        except asyncio.TimeoutError:
+            pass
+
+    async def aclose(self) -> None:
+        self._subscriptions.clear()
+        task = self._task
+        if task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        poller, self._poller = self._poller, None
+        if poller is not None and not poller.done() and poller.get_loop() is asyncio.get_running_loop():
+            poller.cancel()
+            try:
+                await poller
+            except asyncio.CancelledError:
+                pass
+
+
+broker = NoteEventBroker()
@@ -0,0 +1,109 @@
+"""
+Execution stage for summarize() calls in the worker.
+
+- Summaries are produced by a provider (app.services.providers) chosen once
+  when the executor is built; it runs extractive batches across a process
+  pool and LLM requests over a pooled client, each within its own limit.
+- A claimed batch is summarized with one `summarize_many` call.
+- Every dispatched note holds an in-flight slot until it is written back. The
+  claim loop waits for free slots before leasing more notes (backpressure), so
+  a worker never holds more leases than it can actively work on.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Dict, List, Optional, Sequence, Union
+
+from app.core import metrics
+from app.core.config import settings
+from app.services.incremental import Item
+from app.services.providers import Provider, create_provider
+from app.services.summarizer import provider_name
+
+
+class SummaryExecutor:
+    def __init__(
+        self,
+        *,
+        provider: Union[str, Provider, None] = None,
+        processes: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+        llm_concurrency: Optional[int] = None,
+        stop: Optional[asyncio.Event] = None,
+    ) -> None:
+        if not isinstance(provider, Provider):
+            name = (provider or provider_name()).lower()
+            provider = create_provider(name, concurrency=processes if name == "extractive" else llm_concurrency)
+        self.summarizer = provider
+        self.provider = provider.name
+        self.max_in_flight = max(1, int(max_in_flight or settings.WORKER_MAX_IN_FLIGHT))
+
+        self._stop = stop  # set when the worker shuts down
+        self._tasks: Dict[asyncio.Task, int] = {}
+        self._in_flight = 0
+        self._slot_freed = asyncio.Event()
+
+    async def start(self) -> None:
+        """Warm the provider up (process pool, HTTP client) before the first batch."""
+        await self.summarizer.startup()
+
+    @property
+    def stopping(self) -> bool:
+        return self._stop is not None and self._stop.is_set()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def free_slots(self) -> int:
+        return max(0, self.max_in_flight - self._in_flight)
+
+    async def wait_for_slot(self) -> None:
+        while not self.free_slots:
+            self._slot_freed.clear()
+            await self._slot_freed.wait()
+
+    def spawn(self, job: Awaitable[None], slots: int = 1) -> asyncio.Task:
+        """Run `job` as a tracked task occupying `slots` in-flight slots (one per note)."""
+        task = asyncio.ensure_future(job)
+        self._tasks[task] = slots
+        self._in_flight += slots
+        metrics.worker_in_flight.set(self._in_flight)
+        task.add_done_callback(self._on_done)
+        return task
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._in_flight -= self._tasks.pop(task, 0)
+        metrics.worker_in_flight.set(self._in_flight)
+        self._slot_freed.set()
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Summary task crashed: {task.exception()}")
+
+    async def summarize_many(self, texts: Sequence[str]) -> List[Union[str, Exception]]:
+        """Summarize a batch; results keep input order, failures are returned per item."""
+        return await self.summarizer.summarize_many(texts)
+
+    async def resummarize_many(self, items: Sequence[Item]) -> List[object]:
+        """Re-summarize edited notes (app.services.incremental)."""
+        return await self.summarizer.resummarize_many(items)
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait for in-flight jobs to finish; False if some are still running after `timeout`."""
+        if not self._tasks:
+            return True
+        _, pending = await asyncio.wait(list(self._tasks), timeout=timeout)
+        return not pending
+
+    def shutdown(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        self.summarizer.terminate()
+
+    async def aclose(self) -> None:
+        tasks = list(self._tasks)
+        self.shutdown()
+        # Let cancelled jobs unwind (close their sessions) before returning
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.summarizer.shutdown()
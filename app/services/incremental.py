@@ -0,0 +1,415 @@
+"""
+Incremental re-summarization of notes that grow by appending (PATCH /notes/{id}).
+
+Extractive mode keeps a per-note state next to the summary, so an append only
+tokenizes the new text (plus the note's last sentence, which the new text may
+merge into) instead of the whole note:
+
+- `spans`: each sentence as [start, end, weight, score] over raw_text. The
+  score is an integer, sum(count * freq) over the sentence's content tokens;
+  weight is 4 for sentences shorter than SUMMARY_MIN_SENT_CHARS, else 5
+  (the summarizer's 0.8 length penalty). Dividing every score by the top
+  frequency doesn't change the ranking, so it is left out.
+- `freqs` / `postings`: note-wide term frequencies and, per term, the
+  sentences containing it as "index,count,index,count,..." (a string, so
+  loading the state doesn't parse postings an update never touches).
+- `top`: indexes of the best sentences, best first (see `_rank`).
+
+Appending only raises frequencies, so only sentences sharing a term with the
+appended text change score, and they only go up. Tokenizing and scoring cover
+the appended text plus the postings of its terms, not the whole note; the
+state itself is still decoded and re-encoded whole. Ties at the selection
+boundary are re-scored in float arithmetic, as `_summarize_extractive` does.
+
+Notes longer than one chunk (SUMMARY_CHUNK_TOKENS) are summarized like new
+ones, chunk by chunk and then the chunk summaries, so a PATCH gives the same
+summary as re-queueing the note. The state then keeps each chunk's summary
+keyed by a digest of its text instead: an append only summarizes the chunks
+whose text changed (normally the last one) and the reduce step; splitting the
+note into chunks is still a pass over the whole text.
+
+LLM mode summarizes the prior summary plus the appended text only.
+
+The state is JSON; `covered` is the length of raw_text already reflected in
+the summary. PATCH stores a bare {"covered": n} for notes that have none yet;
+the first extractive update then builds the full state once.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import heapq
+import json
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+from app.services.summarizer import (
+    _CHARS_PER_TOKEN,
+    _SENT_SPLIT_RE,
+    Vocabulary,
+    _asummarize_ollama_many,
+    _chunk_limits,
+    _join_selected,
+    _lead,
+    _limits,
+    _map_reduce,
+    _ollama_model,
+    _ollama_result,
+    _ollama_update_prompt,
+    _summarize_extractive,
+    provider_name,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    import asyncio
+    from app.services.ollama import OllamaClient
+
+# (raw_text, state, prior summary) of an edited note
+Item = Tuple[str, Optional[str], Optional[str]]
+
+STATE_VERSION = 1
+APPEND_SEPARATOR = "\n\n"
+
+# Sentences ranked beyond SUMMARY_MAX_SENTENCES; see `_rank`
+_TOP_SLACK = 8
+
+_TERMINALS = tuple(".!?…")
+
+
+def initial_state(covered: int) -> str:
+    """State for a note whose summary reflects the first `covered` characters of its text."""
+    return json.dumps({"covered": covered})
+
+
+def _parts(text: str, base: int = 0) -> List[Tuple[int, int]]:
+    # Spans of the stripped, non-empty pieces `_SENT_SPLIT_RE.split` yields
+    spans: List[Tuple[int, int]] = []
+    pos = 0
+    for m in _SENT_SPLIT_RE.finditer(text):
+        spans.append((pos, m.start()))
+        pos = m.end()
+    spans.append((pos, len(text)))
+    out: List[Tuple[int, int]] = []
+    for start, end in spans:
+        piece = text[start:end]
+        stripped = piece.strip()
+        if stripped:
+            start += len(piece) - len(piece.lstrip())
+            out.append((base + start, base + start + len(stripped)))
+    return out
+
+
+def _sentence_spans(text: str, base: int = 0) -> List[Tuple[int, int]]:
+    """Spans of `_sentences(text)` (short fragments merged the same way), offset by `base`."""
+    merged: List[Tuple[int, int]] = []
+    buf: Optional[Tuple[int, int]] = None
+    buf_len = 0  # length of the merged sentence: pieces joined by single spaces
+    buf_last = ""
+    for start, end in _parts(text, base):
+        if buf is None:
+            buf, buf_len = (start, end), end - start
+        elif buf_len < 40 or (not buf_last.endswith(_TERMINALS) and buf_len < 80):
+            buf, buf_len = (buf[0], end), buf_len + 1 + end - start
+        else:
+            merged.append(buf)
+            buf, buf_len = (start, end), end - start
+        buf_last = text[end - base - 1]
+    if buf is not None:
+        merged.append(buf)
+    return merged
+
+
+def _sentence_text(raw: str, span: Sequence[int]) -> str:
+    # The merged sentence exactly as `_sentences` builds it
+    text = raw[span[0]:span[1]]
+    return " ".join(text[a:b] for a, b in _parts(text))
+
+
+def _counts(text: str, vocab: Vocabulary) -> Dict[str, int]:
+    counts: Dict[int, int] = {}
+    for t in vocab.terms_of(text):
+        counts[t] = counts.get(t, 0) + 1
+    words = vocab.words
+    return {words[t]: c for t, c in counts.items()}
+
+
+def _rank(spans: List[list], ids, size: int) -> List[int]:
+    # Best first; ties keep the earlier sentence, like the summarizer's stable sort
+    return heapq.nsmallest(size, ids, key=lambda i: (-spans[i][3] * spans[i][2], i))
+
+
+def _decode(entries: str) -> List[int]:
+    return [int(v) for v in entries.split(",")] if entries else []
+
+
+def _encode(entries: List[int]) -> str:
+    return ",".join(map(str, entries))
+
+
+def _weight(length: int, min_sent_chars: int) -> int:
+    return 4 if length < min_sent_chars else 5
+
+
+def _build(raw: str, limits: Tuple[int, int, int], vocab: Vocabulary) -> dict:
+    max_sentences, min_sent_chars = limits[1], limits[2]
+    spans: List[list] = []
+    counts: List[Dict[str, int]] = []
+    freqs: Dict[str, int] = {}
+    postings: Dict[str, List[int]] = {}
+    for i, span in enumerate(_sentence_spans(raw)):
+        text = _sentence_text(raw, span)
+        c = _counts(text, vocab)
+        counts.append(c)
+        spans.append([span[0], span[1], _weight(len(text), min_sent_chars), 0])
+        for term, n in c.items():
+            freqs[term] = freqs.get(term, 0) + n
+            postings.setdefault(term, []).extend((i, n))
+    for span, c in zip(spans, counts):
+        span[3] = sum(n * freqs[term] for term, n in c.items())
+    return {
+        "v": STATE_VERSION,
+        "limits": list(limits),
+        "covered": len(raw),
+        "spans": spans,
+        "freqs": freqs,
+        "postings": {term: _encode(entries) for term, entries in postings.items()},
+        "top": _rank(spans, range(len(spans)), max_sentences + _TOP_SLACK),
+    }
+
+
+def _append(state: dict, raw: str, limits: Tuple[int, int, int], vocab: Vocabulary) -> dict:
+    """Fold raw[state["covered"]:] into `state` (in place)."""
+    max_sentences, min_sent_chars = limits[1], limits[2]
+    spans, freqs, postings = state["spans"], state["freqs"], state["postings"]
+
+    # The last sentence is re-split together with the new text: it may absorb it
+    tail = len(spans) - 1
+    tail_start = spans[tail][0]
+    tail_counts = _counts(_sentence_text(raw, spans[tail]), vocab)
+    new_spans = _sentence_spans(raw[tail_start:], tail_start)
+    new_texts = [_sentence_text(raw, span) for span in new_spans]
+    new_counts = [_counts(text, vocab) for text in new_texts]
+
+    # Frequency changes come from the appended text only (the tail is re-counted)
+    delta: Dict[str, int] = {}
+    for c in new_counts:
+        for term, n in c.items():
+            delta[term] = delta.get(term, 0) + n
+    for term, n in tail_counts.items():
+        delta[term] = delta.get(term, 0) - n
+    # Every term of the tail is in `delta`: these are all the postings to touch
+    lists = {term: _decode(postings.get(term, "")) for term in delta}
+    for term in tail_counts:
+        # The tail has the highest index, so its postings are last
+        lists[term][-2:] = []
+    spans.pop()
+
+    changed = set()
+    for term, d in delta.items():
+        freqs[term] = freqs.get(term, 0) + d
+        if not d:
+            continue
+        entries = lists[term]
+        for k in range(0, len(entries), 2):
+            spans[entries[k]][3] += entries[k + 1] * d
+            changed.add(entries[k])
+
+    for c, span, text in zip(new_counts, new_spans, new_texts):
+        i = len(spans)
+        spans.append([span[0], span[1], _weight(len(text), min_sent_chars), sum(n * freqs[t] for t, n in c.items())])
+        for term, n in c.items():
+            lists[term].extend((i, n))
+        changed.add(i)
+    postings.update((term, _encode(entries)) for term, entries in lists.items())
+
+    # `top` holds the true top-len(top) sentences (or all of them). A sentence
+    # outside it whose score didn't change still ranks behind every member but
+    # the removed tail, so the new top is found among `top` and changed ones.
+    top = state["top"]
+    complete = len(top) == tail + 1
+    keep = [i for i in top if i != tail]
+    depth = len(keep)
+    if complete:
+        state["top"] = _rank(spans, range(len(spans)), max_sentences + _TOP_SLACK)
+    elif depth > max_sentences:
+        state["top"] = _rank(spans, changed.union(keep), depth)
+    else:
+        # Too shallow to be sure about the summary: re-rank from the stored scores
+        state["top"] = _rank(spans, range(len(spans)), max_sentences + _TOP_SLACK)
+    state["covered"] = len(raw)
+    return state
+
+
+def _select(state: dict, raw: str, max_sentences: int, vocab: Vocabulary) -> List[int]:
+    # The summarizer's choice: integer keys, then boundary ties re-scored in floats
+    spans, top = state["spans"], state["top"]
+    if len(spans) <= max_sentences:
+        return list(range(len(spans)))
+
+    def key(i: int) -> int:
+        return spans[i][3] * spans[i][2]
+
+    boundary = key(top[max_sentences - 1])
+    selected = [i for i in top[:max_sentences] if key(i) > boundary]
+    room = max_sentences - len(selected)
+    if key(top[-1]) == boundary and len(top) < len(spans):
+        tied = [i for i in range(len(spans)) if key(i) == boundary]  # may run past `top`
+    else:
+        tied = sorted(i for i in top if key(i) == boundary)
+    if len(tied) <= room:
+        return selected + tied
+
+    freqs, words = state["freqs"], vocab.words
+    max_f = max(freqs.values())
+
+    def float_score(i: int) -> float:
+        score = 0.0
+        for t in vocab.terms_of(_sentence_text(raw, spans[i])):
+            score += freqs[words[t]] / max_f
+        return score * (0.8 if spans[i][2] == 4 else 1.0)
+
+    scores = {i: float_score(i) for i in tied}
+    return selected + sorted(tied, key=scores.__getitem__, reverse=True)[:room]
+
+
+def _render(state: dict, raw: str, limits: Tuple[int, int, int], vocab: Vocabulary) -> str:
+    max_chars, max_sentences, _ = limits
+    spans = state["spans"]
+    if not spans:
+        return ""
+    if not state["freqs"]:
+        return _lead([_sentence_text(raw, s) for s in spans[:max_sentences]], max_chars, max_sentences)
+    selected = _select(state, raw, max_sentences, vocab)
+    return _join_selected({i: _sentence_text(raw, spans[i]) for i in selected}, selected, max_chars)
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def _resummarize_chunked(
+    raw: str, loaded: dict, limits: Tuple[int, int, int], chunk_limits: Tuple[int, int], vocab: Vocabulary
+) -> Tuple[str, str]:
+    # Same map-reduce as a new note; chunks whose text is unchanged reuse their summary
+    usable = loaded.get("limits") == list(limits) and loaded.get("chunking") == list(chunk_limits)
+    previous: Dict[str, str] = loaded.get("chunks", {}) if usable else {}
+    used: Dict[str, str] = {}
+
+    def run(text: str) -> str:
+        key = _digest(text)
+        if key not in used:
+            used[key] = previous[key] if key in previous else _summarize_extractive(text, limits=limits, vocab=vocab)
+        return used[key]
+
+    summary = _map_reduce(raw, run, chunk_limits)
+    state = {
+        "v": STATE_VERSION,
+        "limits": list(limits),
+        "chunking": list(chunk_limits),
+        "covered": len(raw),
+        "chunks": used,
+    }
+    return summary, json.dumps(state, separators=(",", ":"), ensure_ascii=False)
+
+
+def resummarize_extractive(
+    raw: str,
+    state: Optional[str],
+    *,
+    limits: Optional[Tuple[int, int, int]] = None,
+    vocab: Optional[Vocabulary] = None,
+) -> Tuple[str, str]:
+    """(summary, new state) for `raw`, reusing `state` when it covers a prefix of it."""
+    limits = limits or _limits()
+    vocab = vocab or Vocabulary()
+    if not raw.strip():
+        return "", initial_state(len(raw))
+    loaded = json.loads(state) if state else {}
+    if loaded.get("v") != STATE_VERSION:
+        loaded = {}
+    chunk_limits = _chunk_limits()
+    if len(raw) > chunk_limits[0] * _CHARS_PER_TOKEN:
+        return _resummarize_chunked(raw, loaded, limits, chunk_limits, vocab)
+    usable = (
+        loaded.get("v") == STATE_VERSION
+        and loaded.get("limits") == list(limits)
+        and loaded.get("spans")
+        and loaded["covered"] <= len(raw)
+    )
+    if not usable:
+        current = _build(raw, limits, vocab)
+    elif loaded["covered"] == len(raw):
+        current = loaded
+    else:
+        current = _append(loaded, raw, limits, vocab)
+    return _render(current, raw, limits, vocab), json.dumps(current, separators=(",", ":"), ensure_ascii=False)
+
+
+def resummarize_many_extractive(items: Sequence[Item]) -> List[object]:
+    """Extractive batch; results are (summary, state) per item, or the exception."""
+    limits = _limits()
+    vocab = Vocabulary()
+    results: List[object] = []
+    for raw, state, _ in items:
+        try:
+            results.append(resummarize_extractive(raw, state, limits=limits, vocab=vocab))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def appended_text(raw: str, state: Optional[str]) -> Optional[str]:
+    """Text added since the summary in `state` was made, or None if unknown."""
+    covered = json.loads(state).get("covered") if state else None
+    if not isinstance(covered, int) or covered > len(raw):
+        return None
+    return raw[covered:]
+
+
+async def _resummarize_llm_many(
+    items: Sequence[Item],
+    *,
+    slots: Optional["asyncio.Semaphore"] = None,
+    client: Optional["OllamaClient"] = None,
+) -> List[object]:
+    from app.services.ollama import get_client
+
+    max_chars, max_sentences, _ = limits = _limits()
+    max_delta_chars = _chunk_limits()[0] * _CHARS_PER_TOKEN
+    client = client or get_client()
+    model = _ollama_model()
+    updates: Dict[int, str] = {}
+    for i, (raw, state, prior) in enumerate(items):
+        addition = appended_text(raw, state)
+        # Without a prior summary, or for an append bigger than a chunk, start over
+        if prior and addition is not None and len(addition) <= max_delta_chars:
+            updates[i] = _ollama_update_prompt(prior, addition.strip(), max_chars, max_sentences)
+    rest = [i for i in range(len(items)) if i not in updates]
+
+    outs = await client.generate_many(list(updates.values()), model=model, max_chars=max_chars, slots=slots)
+    full = await _asummarize_ollama_many([items[i][0] for i in rest], limits=limits, slots=slots, client=client)
+
+    results: List[object] = [None] * len(items)
+    vocab = Vocabulary()
+    for i, out in zip(updates, outs):
+        try:
+            # Same fallback as a first summary: extractive over the whole note
+            results[i] = _ollama_result(out, items[i][0], limits=limits, vocab=vocab)
+        except Exception as e:
+            results[i] = e
+    for i, out in zip(rest, full):
+        results[i] = out
+    for i, (raw, _, _) in enumerate(items):
+        if isinstance(results[i], str):
+            results[i] = (results[i], initial_state(len(raw)))
+    return results
+
+
+async def resummarize_many_async(
+    items: Sequence[Item], *, slots: Optional["asyncio.Semaphore"] = None
+) -> List[object]:
+    """Re-summarize edited notes; results keep input order, failures are returned per item."""
+    if not items:
+        return []
+    if provider_name() == "ollama":
+        return await _resummarize_llm_many(items, slots=slots)
+    return resummarize_many_extractive(items)
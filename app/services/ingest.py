@@ -0,0 +1,204 @@
+"""
+Incremental parsing of bulk upload bodies.
+
+`iter_items` turns a stream of byte chunks into JSON values without buffering
+the whole body. Two formats are accepted, detected from the first
+non-whitespace character:
+- NDJSON: one JSON value per line; a malformed or oversized line is reported
+  as an error for that item and parsing continues with the next line.
+- JSON array: `[{...}, {...}]`, decoded one element at a time; the array
+  syntax itself must be valid, a malformed element ends the upload. An
+  oversized element is reported as an error for that item and skipped over
+  without being decoded.
+
+Item sizes are counted in UTF-8 bytes, as sent. Memory is bounded by the
+chunk size plus `max_item_bytes`.
+"""
+
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from typing import Any, AsyncIterator
+
+_WHITESPACE = " \t\r\n"
+# What decides where a skipped array element ends
+_VALUE_SYNTAX = re.compile(r'[\[\]{},"\\]')
+
+
+class BulkBodyError(ValueError):
+    """The body cannot be parsed any further."""
+
+
+class ItemError(ValueError):
+    """A single item could not be decoded; the following items are still read."""
+
+
+def _oversized(text: str, limit: int) -> bool:
+    """Whether `text` takes more than `limit` bytes as UTF-8 (1 to 4 per character)."""
+    if len(text) > limit:
+        return True
+    return len(text) * 4 > limit and len(text.encode()) > limit
+
+
+async def _text_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        async for chunk in chunks:
+            text = decoder.decode(chunk)
+            if text:
+                yield text
+        tail = decoder.decode(b"", final=True)
+    except UnicodeDecodeError as e:
+        raise BulkBodyError("Body is not valid UTF-8") from e
+    if tail:
+        yield tail
+
+
+async def iter_items(chunks: AsyncIterator[bytes], *, max_item_bytes: int) -> AsyncIterator[Any]:
+    """Yield each JSON value of an NDJSON or JSON-array body (or an `ItemError`)."""
+    texts = _text_chunks(chunks)
+    buf = ""
+    async for text in texts:
+        buf += text
+        if buf.lstrip(_WHITESPACE):
+            break
+    else:
+        return
+
+    body = _iter_array if buf.lstrip(_WHITESPACE).startswith("[") else _iter_ndjson
+    async for item in body(buf, texts, max_item_bytes):
+        yield item
+
+
+async def _iter_ndjson(buf: str, texts: AsyncIterator[str], max_item_bytes: int) -> AsyncIterator[Any]:
+    skipping = False  # inside an oversized line, dropping input up to its newline
+
+    def parse(line: str) -> Any:
+        try:
+            return json.loads(line)
+        except ValueError as e:
+            return ItemError(f"Invalid JSON: {e}")
+
+    while True:
+        *lines, buf = buf.split("\n")
+        for line in lines:
+            if skipping:
+                skipping = False
+            elif _oversized(line, max_item_bytes):
+                yield ItemError(f"Item larger than {max_item_bytes} bytes")
+            elif line.strip(_WHITESPACE):
+                yield parse(line)
+        if not skipping and _oversized(buf, max_item_bytes):
+            yield ItemError(f"Item larger than {max_item_bytes} bytes")
+            skipping = True
+        if skipping:
+            buf = ""
+        text = await anext(texts, None)
+        if text is None:
+            break
+        buf += text
+
+    if not skipping and buf.strip(_WHITESPACE):
+        yield parse(buf)
+
+
+async def _skip_value(buf: str, pos: int, texts: AsyncIterator[str]) -> tuple[str, int]:
+    """Skip the array element starting at `buf[pos]`; returns the buffer and the
+    position of the ',' or ']' after it. Only the current chunk is kept."""
+    depth = 0
+    in_string = escaped = False
+    while True:
+        if escaped and pos < len(buf):
+            pos += 1
+            escaped = False
+        m = _VALUE_SYNTAX.search(buf, pos)
+        if m is None:
+            text = await anext(texts, None)
+            if text is None:
+                raise BulkBodyError("Unexpected end of JSON array")
+            buf, pos = text, 0
+            continue
+        char, pos = m.group(), m.start()
+        if in_string:
+            if char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "[{":
+            depth += 1
+        elif depth == 0 and char in ",]":
+            return buf, pos
+        elif char in "]}":
+            depth -= 1
+        pos += 1
+
+
+async def _iter_array(buf: str, texts: AsyncIterator[str], max_item_bytes: int) -> AsyncIterator[Any]:
+    decoder = json.JSONDecoder()
+    pos = buf.index("[") + 1
+    expect_item = True  # otherwise expecting "," or "]"
+    first = True
+    eof = False
+
+    while True:
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        if pos == len(buf):
+            if eof:
+                raise BulkBodyError("Unexpected end of JSON array")
+            buf, pos = "", 0
+            text = await anext(texts, None)
+            eof = text is None
+            buf = text or ""
+            continue
+
+        char = buf[pos]
+        if expect_item:
+            if first and char == "]":
+                pos += 1
+                break
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except ValueError as e:
+                value, end = e, None
+            # A value running up to the end of the buffer may continue in the next chunk
+            if end is None or (end == len(buf) and not eof):
+                if eof:
+                    raise BulkBodyError(f"Invalid JSON array item: {value}")
+                if _oversized(buf[pos:], max_item_bytes):
+                    yield ItemError(f"Item larger than {max_item_bytes} bytes")
+                    buf, pos = await _skip_value(buf, pos, texts)
+                    expect_item = first = False
+                    continue
+                text = await anext(texts, None)
+                eof = text is None
+                buf = buf[pos:] + (text or "")
+                pos = 0
+                continue
+            if _oversized(buf[pos:end], max_item_bytes):
+                yield ItemError(f"Item larger than {max_item_bytes} bytes")
+            else:
+                yield value
+            pos = end
+            expect_item = first = False
+        elif char == ",":
+            pos += 1
+            expect_item = True
+        elif char == "]":
+            pos += 1
+            break
+        else:
+            raise BulkBodyError(f"Expected ',' or ']' in JSON array, got {char!r}")
+
+    # Only whitespace may follow the closing bracket
+    while True:
+        if buf[pos:].strip(_WHITESPACE):
+            raise BulkBodyError("Unexpected data after JSON array")
+        text = None if eof else await anext(texts, None)
+        if text is None:
+            return
+        buf, pos = text, 0
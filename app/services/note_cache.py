@@ -0,0 +1,137 @@
+"""
+Conditional GET and a read-through cache for GET /notes/{id}.
+
+- Every response carries an ETag derived from the note's `updated_at`, which
+  moves on every write (API or worker). A request whose If-None-Match (or,
+  without one, If-Modified-Since) still matches gets 304 Not Modified: no
+  body, and only the note's owner and timestamp are read.
+- Last-Modified has 1 s resolution while a note can change several times a
+  second (queued -> processing -> done), so it is only sent once the second of
+  the last change is over; a later change then always has a later date.
+- Done notes do not change until they are edited, so their serialized
+  response is kept in process (NOTE_CACHE_MAX_ENTRIES, NOTE_CACHE_TTL_SECONDS)
+  and served without touching the database.
+- Any note event (app/services/events.py) drops that note's entry. Events of
+  every process (worker status changes, edits through another API instance)
+  only arrive over Postgres LISTEN, so the cache is used on Postgres while
+  LISTEN is connected; elsewhere, e.g. SQLite with several API processes, an
+  edit could go unnoticed, and nothing is cached.
+"""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Mapping, NamedTuple
+
+from app.core import database
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.services.events import broker
+
+_MAX_BODY_BYTES = 64 * 1024  # larger notes are always read from the database
+_EVICTED_TTL_SECONDS = 60.0
+
+
+class CachedNote(NamedTuple):
+    owner_id: int
+    etag: str
+    updated_at: datetime
+    body: bytes  # the serialized NoteOut
+
+
+def _aware(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes (stored as UTC)
+    return value if value.tzinfo is not None else value.replace(tzinfo=UTC)
+
+
+def etag(note_id: int, updated_at: datetime) -> str:
+    updated = _aware(updated_at)
+    micros = int(updated.timestamp()) * 1_000_000 + updated.microsecond
+    return f'"{note_id}-{micros:x}"'
+
+
+def _second(value: datetime) -> datetime:
+    return _aware(value).astimezone(UTC).replace(microsecond=0)
+
+
+def last_modified(updated_at: datetime, now: datetime | None = None) -> str | None:
+    """Last-Modified for a response served `now`; None while its second is not over."""
+    updated = _second(updated_at)
+    if _second(now or datetime.now(UTC)) < updated + timedelta(seconds=1):
+        return None  # another change this second would get the same date
+    return format_datetime(updated, usegmt=True)
+
+
+def is_conditional(headers: Mapping[str, str]) -> bool:
+    return "if-none-match" in headers or "if-modified-since" in headers
+
+
+def not_modified(headers: Mapping[str, str], tag: str, updated_at: datetime) -> bool:
+    """Whether the client's copy is current (RFC 9110: If-None-Match wins over If-Modified-Since)."""
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        return "*" in tags or tag in tags
+    since = headers.get("if-modified-since")
+    if since is None:
+        return False
+    try:
+        since_at = parsedate_to_datetime(since)
+    except (TypeError, ValueError):
+        return False  # unparseable dates are ignored
+    if since_at.tzinfo is None:
+        return False
+    # Dates we sent are only given out once their second is over, so a change
+    # after the client's copy always falls in a later second
+    return _second(updated_at) <= since_at
+
+
+class NoteCache:
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self._entries: TTLCache[int, CachedNote] = TTLCache(maxsize, ttl)
+        # Note id -> event sequence number of its last invalidation, so a read
+        # that raced with a change is not cached
+        self._evicted: TTLCache[int, int] = TTLCache(max(1, maxsize), _EVICTED_TTL_SECONDS)
+        self._seq = 0
+        broker.watch(self._on_event)
+
+    @property
+    def enabled(self) -> bool:
+        return self._entries.enabled
+
+    def _on_event(self, evt: dict) -> None:
+        note_id = evt.get("id")
+        if note_id is not None:
+            self.pop(note_id)
+
+    def version(self) -> int:
+        """Token to pass to `put` for a database read that starts now."""
+        return self._seq
+
+    def get(self, note_id: int) -> CachedNote | None:
+        return self._entries.get(note_id)
+
+    def put(self, note_id: int, entry: CachedNote, version: int) -> None:
+        """Cache a done note's response, read from the database after `version()` returned `version`."""
+        if not self.enabled or len(entry.body) > _MAX_BODY_BYTES:
+            return
+        if (self._evicted.get(note_id) or 0) > version:
+            return  # changed while it was being read
+        if database.engine.dialect.name != "postgresql" or not broker.listening():
+            return  # changes made by other processes would go unnoticed
+        self._entries.set(note_id, entry)
+
+    def pop(self, note_id: int) -> None:
+        self._seq += 1
+        self._entries.pop(note_id)
+        self._evicted.set(note_id, self._seq)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+note_cache = NoteCache(settings.NOTE_CACHE_MAX_ENTRIES, settings.NOTE_CACHE_TTL_SECONDS)
@@ -0,0 +1,195 @@
+"""
+Wake-up signal for workers when notes are queued.
+
+Producers call `notify_queued(session)` inside the transaction that queues the
+notes. On Postgres this adds a NOTIFY that every LISTENing worker receives when
+the transaction commits. After the commit, an in-process signal also wakes
+listeners in the same process, which is the only push path on SQLite.
+
+Workers block on `QueueListener.wait()` instead of sleeping, and keep polling
+only as a safety net (missed notifications, listener reconnects, separate
+API/worker processes on SQLite).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import weakref
+from typing import Callable, Mapping
+
+from sqlalchemy import event, make_url, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core import database
+from app.core.config import settings
+
+CHANNEL = "notes_queued"
+
+_listeners: "weakref.WeakSet[QueueListener]" = weakref.WeakSet()
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_local(session: Session) -> None:
+    if session.info.pop(CHANNEL, False):
+        for listener in list(_listeners):
+            listener.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_local(session: Session) -> None:
+    session.info.pop(CHANNEL, None)
+
+
+# Connection parameters libpq accepts in a URI; anything else in the query
+# string (asyncpg's or SQLAlchemy's own options) makes psycopg refuse the DSN
+_LIBPQ_PARAMS = frozenset({
+    "host", "hostaddr", "port", "dbname", "user", "password", "passfile", "require_auth",
+    "channel_binding", "connect_timeout", "client_encoding", "options", "application_name",
+    "fallback_application_name", "keepalives", "keepalives_idle", "keepalives_interval",
+    "keepalives_count", "tcp_user_timeout", "replication", "gssencmode", "sslmode", "sslnegotiation",
+    "requiressl", "sslcompression", "sslcert", "sslkey", "sslpassword", "sslcertmode", "sslrootcert",
+    "sslcrl", "sslcrldir", "sslsni", "requirepeer", "ssl_min_protocol_version",
+    "ssl_max_protocol_version", "krbsrvname", "gsslib", "gssdelegation", "service",
+    "target_session_attrs", "load_balance_hosts",
+})
+# asyncpg's `ssl` takes libpq's sslmode values, plus booleans
+_ASYNCPG_SSL = {"true": "require", "false": "disable"}
+
+
+def _libpq_query(query: Mapping[str, str | tuple[str, ...]]) -> dict[str, str | tuple[str, ...]]:
+    params = {key: value for key, value in query.items() if key in _LIBPQ_PARAMS}
+    ssl = query.get("ssl")
+    if isinstance(ssl, str) and "sslmode" not in params:
+        params["sslmode"] = _ASYNCPG_SSL.get(ssl.lower(), ssl)
+    return params
+
+
+def listen_dsn() -> str | None:
+    """libpq connection string for LISTEN connections; None when not on Postgres.
+
+    LISTEN needs a session-pooled connection, so behind PgBouncer in transaction
+    mode it uses DATABASE_LISTEN_URL (Postgres directly), or is skipped and the
+    workers fall back to polling. Query parameters of other drivers are dropped,
+    except asyncpg's `ssl`, which becomes `sslmode`.
+    """
+    if database.engine.dialect.name != "postgresql":
+        return None
+    if settings.DATABASE_LISTEN_URL:
+        url = make_url(settings.DATABASE_LISTEN_URL)
+    elif settings.DB_PGBOUNCER:
+        return None
+    else:
+        url = database.engine.url
+    url = url.set(drivername="postgresql", query=_libpq_query(url.query))
+    return url.render_as_string(hide_password=False)
+
+
+async def pg_listen(
+    dsn: str,
+    channel: str,
+    on_notify: Callable[[str], None],
+    *,
+    on_connect: Callable[[], None] | None = None,
+    on_disconnect: Callable[[], None] | None = None,
+) -> None:
+    """LISTEN on `channel` over a dedicated autocommit connection, forever.
+
+    Calls `on_notify(payload)` per notification and reconnects with backoff
+    when the connection drops; cancel the task to stop.
+    """
+    import psycopg
+
+    backoff = 1
+    while True:
+        try:
+            async with await psycopg.AsyncConnection.connect(dsn, autocommit=True) as conn:
+                await conn.execute(f"LISTEN {channel}")
+                backoff = 1
+                if on_connect is not None:
+                    on_connect()
+                async for notification in conn.notifies():
+                    on_notify(notification.payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"LISTEN {channel} error: {e}. Reconnecting in {backoff}s")
+        finally:
+            if on_disconnect is not None:
+                on_disconnect()
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, 30)
+
+
+async def notify_queued(session: AsyncSession) -> None:
+    """Signal that `session`'s transaction queues notes; delivered on commit."""
+    if session.bind.dialect.name == "postgresql":
+        await session.execute(text("SELECT pg_notify(:channel, '')"), {"channel": CHANNEL})
+    session.info[CHANNEL] = True
+
+
+class QueueListener:
+    """Receives queue notifications for one worker event loop."""
+
+    def __init__(self, dsn: str | None = None) -> None:
+        self._dsn = dsn
+        self._event = asyncio.Event()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task | None = None
+        self.connected = False
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        _listeners.add(self)
+        self._dsn = self._dsn or listen_dsn()
+        if self._dsn is not None:
+            self._task = asyncio.create_task(
+                pg_listen(
+                    self._dsn,
+                    CHANNEL,
+                    lambda _: self._event.set(),
+                    on_connect=self._on_connect,
+                    on_disconnect=self._on_disconnect,
+                )
+            )
+
+    def wake(self) -> None:
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            same_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            same_loop = False
+        if same_loop:
+            self._event.set()
+        else:
+            loop.call_soon_threadsafe(self._event.set)
+
+    async def wait(self, timeout: float) -> bool:
+        """Block until notes were queued or `timeout` passed; True when woken."""
+        if not self._event.is_set():
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return False
+        self._event.clear()
+        return True
+
+    def _on_connect(self) -> None:
+        self.connected = True
+        # Anything queued while we were not listening is picked up by a poll
+        self._event.set()
+
+    def _on_disconnect(self) -> None:
+        self.connected = False
+
+    async def aclose(self) -> None:
+        _listeners.discard(self)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
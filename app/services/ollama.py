@@ -0,0 +1,173 @@
+"""
+Async client for a local Ollama server.
+
+- One pooled `httpx.AsyncClient` per process: keep-alive connections with a
+  configurable ceiling, per-request (connect/read) and total timeouts.
+- Generation is streamed and cut off as soon as the caller's character budget
+  is reached, so we never wait for text that would be truncated anyway.
+- `generate_many` fans several prompts out over the shared pool.
+- With a circuit breaker (see app.services.providers), requests fail fast with
+  `CircuitOpenError` while it is open, and every outcome is reported to it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import TYPE_CHECKING, List, Optional, Sequence, Union
+
+import httpx
+
+if TYPE_CHECKING:  # pragma: no cover
+    from app.services.providers import CircuitBreaker
+
+try:
+    from app.core.config import settings  # type: ignore
+except Exception:  # pragma: no cover - fallback when settings import not available
+    settings = None  # type: ignore
+
+
+_DEFAULT_HOST = "http://localhost:11434"
+_DEFAULT_MAX_CONNECTIONS = 8
+_DEFAULT_REQUEST_TIMEOUT = 60.0
+_DEFAULT_TOTAL_TIMEOUT = 120.0
+
+
+class OllamaError(RuntimeError):
+    """Raised when Ollama is unreachable, times out or returns an error."""
+
+
+class CircuitOpenError(OllamaError):
+    """Raised without a request while the client's circuit breaker is open."""
+
+
+def _setting(name: str, default):
+    value = getattr(settings, name, None) if settings else None
+    return default if value is None else value
+
+
+class OllamaClient:
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        *,
+        max_connections: Optional[int] = None,
+        request_timeout: Optional[float] = None,
+        total_timeout: Optional[float] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        breaker: Optional["CircuitBreaker"] = None,
+    ) -> None:
+        self.breaker = breaker
+        self.host = str(host or _setting("OLLAMA_HOST", _DEFAULT_HOST)).rstrip("/")
+        max_connections = int(max_connections or _setting("OLLAMA_MAX_CONNECTIONS", _DEFAULT_MAX_CONNECTIONS))
+        request_timeout = float(request_timeout or _setting("OLLAMA_REQUEST_TIMEOUT_SECONDS", _DEFAULT_REQUEST_TIMEOUT))
+        self.total_timeout = float(total_timeout or _setting("OLLAMA_TOTAL_TIMEOUT_SECONDS", _DEFAULT_TOTAL_TIMEOUT))
+        self._client = httpx.AsyncClient(
+            base_url=self.host,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            # read timeout applies between streamed chunks, not to the whole generation
+            timeout=httpx.Timeout(request_timeout, connect=min(request_timeout, 5.0)),
+            transport=transport,
+        )
+
+    async def generate(
+        self,
+        prompt: str,
+        *,
+        model: str,
+        temperature: float = 0.2,
+        max_chars: Optional[int] = None,
+    ) -> str:
+        breaker = self.breaker
+        if breaker is not None and not breaker.allow():
+            raise CircuitOpenError("Ollama circuit breaker is open")
+        try:
+            out = await asyncio.wait_for(
+                self._generate(prompt, model=model, temperature=temperature, max_chars=max_chars),
+                timeout=self.total_timeout,
+            )
+        except (asyncio.TimeoutError, httpx.HTTPError, ValueError, OllamaError) as e:
+            if breaker is not None:
+                breaker.record_failure()
+            if isinstance(e, asyncio.TimeoutError):
+                raise OllamaError(f"generation exceeded {self.total_timeout}s") from e
+            if isinstance(e, httpx.HTTPError):
+                raise OllamaError(str(e) or e.__class__.__name__) from e
+            if not isinstance(e, OllamaError):  # malformed response body
+                raise OllamaError(f"invalid response: {e}") from e
+            raise
+        if breaker is not None:
+            breaker.record_success()
+        return out
+
+    async def _generate(self, prompt: str, *, model: str, temperature: float, max_chars: Optional[int]) -> str:
+        options = {"temperature": temperature}
+        if max_chars:
+            # A token is at least one character, so this bounds generation server-side too
+            options["num_predict"] = int(max_chars)
+        payload = {"model": model, "prompt": prompt, "stream": True, "options": options}
+
+        parts: List[str] = []
+        size = 0
+        async with self._client.stream("POST", "/api/generate", json=payload) as resp:
+            if resp.status_code >= 400:
+                await resp.aread()
+                raise OllamaError(f"HTTP {resp.status_code}: {resp.text[:200]}")
+            async for line in resp.aiter_lines():
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise OllamaError(str(chunk["error"]))
+                piece = chunk.get("response") or ""
+                parts.append(piece)
+                size += len(piece)
+                # Leaving the stream early closes the connection instead of
+                # draining it; cheaper than waiting for the rest of the generation.
+                if chunk.get("done") or (max_chars and size >= max_chars):
+                    break
+        return "".join(parts)
+
+    async def generate_many(
+        self,
+        prompts: Sequence[str],
+        *,
+        model: str,
+        temperature: float = 0.2,
+        max_chars: Optional[int] = None,
+        slots: Optional[asyncio.Semaphore] = None,
+    ) -> List[Union[str, Exception]]:
+        """Generate for several prompts over the shared pool; results keep input order.
+
+        `slots` bounds concurrent requests; pass a shared semaphore to bound them
+        across several batches.
+        """
+        if slots is None:
+            slots = asyncio.Semaphore(int(_setting("OLLAMA_MAX_CONNECTIONS", _DEFAULT_MAX_CONNECTIONS)))
+
+        async def one(prompt: str) -> str:
+            async with slots:
+                return await self.generate(prompt, model=model, temperature=temperature, max_chars=max_chars)
+
+        return await asyncio.gather(*(one(p) for p in prompts), return_exceptions=True)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+_client: Optional[OllamaClient] = None
+
+
+def get_client() -> OllamaClient:
+    """Process-wide client so connections are reused across notes."""
+    global _client
+    if _client is None:
+        _client = OllamaClient()
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
@@ -0,0 +1,239 @@
+"""
+Summarizer providers: long-lived objects the worker selects once at boot.
+
+- A provider keeps what it needs warm between batches and owns its lifecycle
+  (`startup` / `shutdown`): the extractive provider its process pool, the
+  Ollama provider its pooled HTTP client and circuit breaker.
+- `concurrency` is the provider's own limit: processes for extractive,
+  parallel requests for Ollama.
+- `register_provider(name, factory)` adds a provider; `create_provider()`
+  builds the one named by SUMMARIZE_PROVIDER.
+
+The Ollama circuit breaker opens after OLLAMA_BREAKER_FAILURES consecutive
+failed requests. While open, requests fail immediately and notes get the
+extractive fallback instead of waiting out a timeout each; every
+OLLAMA_BREAKER_COOLDOWN_SECONDS one request is let through to probe, and a
+success closes the breaker again.
+"""
+
+from __future__ import annotations
+
+import abc
+import asyncio
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Union
+
+import httpx
+
+from app.core import metrics
+from app.core.config import settings
+from app.services.incremental import Item, _resummarize_llm_many, resummarize_many_extractive
+from app.services.ollama import OllamaClient
+from app.services.summarizer import _asummarize_ollama_many, _extractive_many, _limits, provider_name
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a timed half-open probe."""
+
+    def __init__(self, name: str, failures: int, cooldown: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.threshold = max(1, int(failures))
+        self.cooldown = cooldown
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._gauge = metrics.summarizer_circuit_open.labels(name)
+
+    @property
+    def open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        """Whether a request may go out now; while open, one probe per cooldown."""
+        if self._opened_at is None:
+            return True
+        now = self._clock()
+        if now - self._opened_at >= self.cooldown:
+            self._opened_at = now  # the next probe waits another cooldown
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        if self._opened_at is not None:
+            self._opened_at = None
+            self._gauge.set(0)
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._failures >= self.threshold and self._opened_at is None:
+            self._opened_at = self._clock()
+            self._gauge.set(1)
+            print(f"Summarizer circuit opened after {self._failures} consecutive failures")
+
+
+class Provider(abc.ABC):
+    name = ""
+
+    def __init__(self, concurrency: int) -> None:
+        self.concurrency = concurrency
+        self._started = False
+
+    async def startup(self) -> None:
+        self._started = True
+
+    async def shutdown(self) -> None:
+        self._started = False
+
+    def terminate(self) -> None:
+        """Stop at once, without waiting for work in progress (`shutdown` still follows)."""
+
+    async def _ready(self) -> None:
+        if not self._started:
+            await self.startup()
+
+    @abc.abstractmethod
+    async def summarize_many(self, texts: Sequence[str]) -> List[Union[str, Exception]]:
+        """Summarize a batch; results keep input order, failures are returned per item."""
+
+    @abc.abstractmethod
+    async def resummarize_many(self, items: Sequence[Item]) -> List[object]:
+        """Re-summarize edited notes (see app.services.incremental)."""
+
+
+def _ignore_stop_signals() -> None:
+    # Pool processes belong to their worker: a SIGTERM/SIGINT sent to the whole
+    # process group must not kill them while the worker drains
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _extract_many(texts: Sequence[str]) -> List[Union[str, Exception]]:
+    # Extractive whatever SUMMARIZE_PROVIDER says: the provider was chosen already
+    return _extractive_many(texts, _limits())
+
+
+def _warm_up() -> None:
+    # Run in each pool process at startup: imports and engine selection happen
+    # before the first note rather than during it
+    _extract_many(["Warm-up note. The summarizer is ready."])
+
+
+class ExtractiveProvider(Provider):
+    """CPU-bound pure Python: a process pool spreads a batch across every core."""
+
+    name = "extractive"
+
+    def __init__(self, concurrency: Optional[int] = None) -> None:
+        if concurrency is None:
+            concurrency = settings.WORKER_SUMMARY_PROCESSES
+        if concurrency is None:
+            concurrency = os.cpu_count() or 1
+        super().__init__(max(0, int(concurrency)))  # 0 = no pool, one thread
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    async def startup(self) -> None:
+        if self.concurrency > 0 and self._pool is None:
+            # "spawn" keeps children free of the parent's event loop and DB sockets
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.concurrency,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_ignore_stop_signals,
+            )
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*(loop.run_in_executor(self._pool, _warm_up) for _ in range(self.concurrency)))
+        await super().startup()
+
+    async def shutdown(self) -> None:
+        self.terminate()
+        await super().shutdown()
+
+    def terminate(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def summarize_many(self, texts: Sequence[str]) -> List[Union[str, Exception]]:
+        if not texts:
+            return []
+        await self._ready()
+        if self._pool is None:
+            return await asyncio.to_thread(_extract_many, texts)
+        loop = asyncio.get_running_loop()
+        size = -(-len(texts) // self.concurrency)  # ceil: one chunk per process at most
+        chunks = [list(texts[i:i + size]) for i in range(0, len(texts), size)]
+        parts = await asyncio.gather(
+            *(loop.run_in_executor(self._pool, _extract_many, chunk) for chunk in chunks)
+        )
+        return [result for part in parts for result in part]
+
+    async def resummarize_many(self, items: Sequence[Item]) -> List[object]:
+        if not items:
+            return []
+        await self._ready()
+        if self._pool is None:
+            return await asyncio.to_thread(resummarize_many_extractive, items)
+        # Updates are small: the whole batch is one task
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, resummarize_many_extractive, list(items))
+
+
+class OllamaProvider(Provider):
+    """I/O-bound: async requests over one pooled client, at most `concurrency` at once."""
+
+    name = "ollama"
+
+    def __init__(self, concurrency: Optional[int] = None, *, transport: Optional[httpx.AsyncBaseTransport] = None) -> None:
+        super().__init__(max(1, int(concurrency or settings.WORKER_LLM_CONCURRENCY)))
+        self._transport = transport
+        self.breaker = CircuitBreaker(
+            self.name, settings.OLLAMA_BREAKER_FAILURES, settings.OLLAMA_BREAKER_COOLDOWN_SECONDS
+        )
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._client: Optional[OllamaClient] = None
+
+    async def startup(self) -> None:
+        if self._client is None:
+            self._client = OllamaClient(breaker=self.breaker, transport=self._transport)
+        await super().startup()
+
+    async def shutdown(self) -> None:
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.aclose()
+        await super().shutdown()
+
+    async def summarize_many(self, texts: Sequence[str]) -> List[Union[str, Exception]]:
+        if not texts:
+            return []
+        await self._ready()
+        return await _asummarize_ollama_many(texts, limits=_limits(), slots=self._slots, client=self._client)
+
+    async def resummarize_many(self, items: Sequence[Item]) -> List[object]:
+        if not items:
+            return []
+        await self._ready()
+        return await _resummarize_llm_many(items, slots=self._slots, client=self._client)
+
+
+_registry: Dict[str, Callable[..., Provider]] = {}
+
+
+def register_provider(name: str, factory: Callable[..., Provider]) -> None:
+    """Make `factory(concurrency=None)` available as SUMMARIZE_PROVIDER=`name`."""
+    _registry[name.lower()] = factory
+
+
+def create_provider(name: Optional[str] = None, *, concurrency: Optional[int] = None) -> Provider:
+    name = (name or provider_name()).lower()
+    factory = _registry.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown summarizer provider: {name} (known: {', '.join(sorted(_registry))})")
+    return factory(concurrency=concurrency)
+
+
+register_provider(ExtractiveProvider.name, ExtractiveProvider)
+register_provider(OllamaProvider.name, OllamaProvider)
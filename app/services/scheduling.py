@@ -0,0 +1,34 @@
+"""
+Per-owner fair ordering of the summarization queue.
+
+Within a lane (NotePriority) the worker claims queued notes by ascending
+`fair_rank`, which producers stamp at insert time like a virtual finish time in
+weighted fair queuing: an owner's next note ranks one step after the later of
+
+- the lane's virtual time, i.e. the lowest rank still queued in it, and
+- the owner's own last queued rank in the lane.
+
+An agent importing 100k notes therefore gets ranks V+1 .. V+100000, while a
+colleague's note queued a minute later ranks right behind the import's head
+instead of behind its tail: owners with work waiting are served round-robin.
+Both lookups are single index seeks, and the claim query stays an ordered
+index range scan. Once an owner's backlog drains, its clock restarts at the
+lane's virtual time, so past volume earns no penalty.
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.note import Note, NotePriority, NoteStatus
+
+
+async def next_fair_rank(session: AsyncSession, owner_id: int, priority: NotePriority) -> int:
+    """Rank for `owner_id`'s next note in `priority`'s lane; a batch takes consecutive ranks from it."""
+    queued = (Note.status == NoteStatus.queued, Note.priority == priority)
+    lane_head = select(func.min(Note.fair_rank)).where(*queued).scalar_subquery()
+    owner_tail = select(func.max(Note.fair_rank)).where(*queued, Note.owner_id == owner_id).scalar_subquery()
+    head, tail = (await session.execute(select(lane_head, owner_tail))).one()
+    # Concurrent inserts by one owner may share ranks; ties fall back to created_at
+    return max(head or 0, tail or 0) + 1
@@ -0,0 +1,72 @@
+"""
+Full-text search for the `q` parameter of the notes endpoints.
+
+- Postgres: `notes.search_vector`, a generated tsvector over summary (weight A)
+  and raw_text (weight B) with a GIN index, ranked by ts_rank_cd.
+- SQLite: the `notes_fts` FTS5 table (external content, trigger-maintained),
+  ranked by bm25.
+- Anything else falls back to an unindexed ILIKE.
+
+Queries are reduced to their word tokens and every token must match as a
+prefix, so both backends behave alike and user input never reaches the query
+syntax of either engine.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import List
+
+from sqlalchemy import Select, false, func, literal_column, or_, select
+from sqlalchemy.sql import ColumnElement, column, table
+
+from app.models.note import Note
+
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+_fts = table("notes_fts", column("rowid"))
+_fts_match_target = literal_column("notes_fts")
+_search_vector = literal_column("notes.search_vector")
+
+
+def _terms(q: str) -> List[str]:
+    return _WORD_RE.findall(q.lower())
+
+
+def _pg_query(terms: List[str]):
+    return func.to_tsquery(literal_column("'simple'::regconfig"), " & ".join(f"{t}:*" for t in terms))
+
+
+def _sqlite_query(terms: List[str]) -> str:
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+def search_clause(q: str, dialect: str) -> ColumnElement[bool]:
+    """Filter-only form, for counts and exports."""
+    terms = _terms(q)
+    if not terms:
+        return false()
+    if dialect == "postgresql":
+        return _search_vector.op("@@")(_pg_query(terms))
+    if dialect == "sqlite":
+        return Note.id.in_(select(_fts.c.rowid).where(_fts_match_target.op("MATCH")(_sqlite_query(terms))))
+    like = f"%{q}%"
+    return or_(Note.raw_text.ilike(like), Note.summary.ilike(like))
+
+
+def ranked_search(stmt: Select, q: str, dialect: str) -> Select:
+    """Restrict `stmt` (a select of Note) to matches, best ranked first."""
+    terms = _terms(q)
+    if not terms:
+        return stmt.where(false())
+    if dialect == "postgresql":
+        query = _pg_query(terms)
+        return stmt.where(_search_vector.op("@@")(query)).order_by(func.ts_rank_cd(_search_vector, query).desc())
+    if dialect == "sqlite":
+        return (
+            stmt.join(_fts, _fts.c.rowid == Note.id)
+            .where(_fts_match_target.op("MATCH")(_sqlite_query(terms)))
+            # bm25() is lower-is-better
+            .order_by(func.bm25(_fts_match_target))
+        )
+    return stmt.where(search_clause(q, dialect))
@@ -2,32 +2,74 @@
 [NLP - Natural Language Processing]
 
 Simple, deterministic extractive summarizer (no external services) with optional LLM-based summarization via local Ollama.
+The async entry point (`summarize_async`) talks to Ollama over a pooled, streaming client (see app.services.ollama).
 
 Approach (summarize):
 - Split into sentences using punctuation boundaries.
 - Build word frequencies (lowercased, basic stopword removal).
 - Score each sentence by sum of its token frequencies.
 - Pick top sentences (preserving original order) within limits.
+
+The same algorithm can run vectorized with NumPy (app.services.extractive_np, opt-in
+via SUMMARY_EXTRACTIVE_ENGINE); both engines return identical summaries.
+
+Long notes (map-reduce, both providers):
+- Split on sentence boundaries into chunks of about SUMMARY_CHUNK_TOKENS tokens.
+- Summarize every chunk (LLM chunks concurrently), then summarize the partial
+  summaries into one.
+- At most SUMMARY_MAX_CHUNKS chunks, spread evenly over the note, are used, so
+  the work per note is bounded however long the note gets.
 """
 
 from __future__ import annotations
 
+import heapq
 import re
-from typing import List, Tuple, Optional
+from array import array
+from typing import Callable, Dict, List, Tuple, Optional, Sequence, Union, TYPE_CHECKING
 
 import os
 import requests
 
+if TYPE_CHECKING:  # pragma: no cover
+    import asyncio
+    from app.services.ollama import OllamaClient
+
 try:
     # Optional settings if available
     from app.core.config import settings  # type: ignore
 except Exception:  # pragma: no cover - fallback when settings import not available
     settings = None  # type: ignore
 
+try:
+    from app.core.metrics import ollama_fallbacks  # type: ignore
+except Exception:  # pragma: no cover - metrics need the app settings
+    ollama_fallbacks = None  # type: ignore
+
+
+class _NoCounter:
+    def inc(self, amount: float = 1.0) -> None:
+        pass
+
+
+# Pre-bound counters: LLM summaries replaced by the extractive fallback, by reason
+_fallbacks = {
+    reason: ollama_fallbacks.labels(reason) if ollama_fallbacks is not None else _NoCounter()
+    for reason in ("error", "empty", "circuit_open")
+}
+
+
+class FallbackSummary(str):
+    """An extractive summary standing in for a failed LLM call (not cached as the LLM's)."""
+
 
 _DEFAULT_MAX_CHARS = 300
 _DEFAULT_MAX_SENTENCES = 3
 _DEFAULT_MIN_SENT_CHARS = 20
+_DEFAULT_EXTRACTIVE_ENGINE = "python"  # "python" | "numpy" | "auto"
+_DEFAULT_CHUNK_TOKENS = 1500
+_DEFAULT_MAX_CHUNKS = 16
+_CHARS_PER_TOKEN = 4  # rough estimate for LLM tokenizers; no tokenizer is loaded
 
 _DEFAULT_OLLAMA_HOST = "http://localhost:11434"
 
@@ -36,17 +78,24 @@ _DEFAULT_SUMMARIZE_PROVIDER = "extractive"  # "extractive" | "ollama"
 _DEFAULT_SUMMARIZE_MODEL = "llama3.1"
 
 
-# Minimal EN + TR stopwords (curated subset to keep it lightweight)
-_STOPWORDS = {
-    # English
-    "the","a","an","and","or","but","if","then","else","when","while","for","to","of","in","on","at","by","with","from","as","is","are","was","were","be","been","being","it","this","that","these","those","i","you","he","she","we","they","them","his","her","their","our","your","my","me","us","do","does","did","doing","so","not","no","yes","can","could","should","would","may","might","will","just","about","into","over","after","before","than","also","too","very",
-    # Turkish (subset)
-    "ve","veya","ama","fakat","ancak","ile","de","da","mi","mu","mı","mü","bir","bu","şu","o","için","gibi","ile","ya","hem","hemde","daha","çok","az","en","ki","ne","nasıl","niçin","neden","çünkü","değil","var","yok","hangi","her","bazı","hiç","şey","biz","siz","ben","sen","onlar","olarak","olan","olanlar","kadar","sonra","önce","ise","yada","veya",
+# Minimal EN + TR stopwords (curated subset to keep it lightweight), one table per
+# language; the extractive path looks each distinct token up once per batch (Vocabulary)
+_STOPWORD_TABLES = {
+    "en": frozenset((
+        "the","a","an","and","or","but","if","then","else","when","while","for","to","of","in","on","at","by","with","from","as","is","are","was","were","be","been","being","it","this","that","these","those","i","you","he","she","we","they","them","his","her","their","our","your","my","me","us","do","does","did","doing","so","not","no","yes","can","could","should","would","may","might","will","just","about","into","over","after","before","than","also","too","very",
+    )),
+    "tr": frozenset((
+        "ve","veya","ama","fakat","ancak","ile","de","da","mi","mu","mı","mü","bir","bu","şu","o","için","gibi","ile","ya","hem","hemde","daha","çok","az","en","ki","ne","nasıl","niçin","neden","çünkü","değil","var","yok","hangi","her","bazı","hiç","şey","biz","siz","ben","sen","onlar","olarak","olan","olanlar","kadar","sonra","önce","ise","yada","veya",
+    )),
 }
+_STOPWORDS = frozenset().union(*_STOPWORD_TABLES.values())
 
 
-_SENT_SPLIT_RE = re.compile(r"(?<=[.!?…])\s+|\n\s*\n+", re.UNICODE)
-_TOKEN_RE = re.compile(r"\b\w+\b", re.UNICODE)
+# Same splits as r"(?<=[.!?…])\s+|\n\s*\n+", but the lookbehind only runs at whitespace
+_SENT_SPLIT_RE = re.compile(r"\s(?:(?<=[.!?…]\s)\s*|(?<=\n)\s*\n+)", re.UNICODE)
+# Word tokens; same as r"\b\w+\b" (a maximal \w+ run is always bounded by \b)
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_TERMINALS = tuple(".!?…")
 
 
 def _limits() -> Tuple[int, int, int]:
@@ -56,6 +105,12 @@ def _limits() -> Tuple[int, int, int]:
     return int(max_chars), int(max_sentences), int(min_sent_chars)
 
 
+def _chunk_limits() -> Tuple[int, int]:
+    chunk_tokens = getattr(settings, "SUMMARY_CHUNK_TOKENS", _DEFAULT_CHUNK_TOKENS) if settings else _DEFAULT_CHUNK_TOKENS
+    max_chunks = getattr(settings, "SUMMARY_MAX_CHUNKS", _DEFAULT_MAX_CHUNKS) if settings else _DEFAULT_MAX_CHUNKS
+    return max(1, int(chunk_tokens)), max(1, int(max_chunks))
+
+
 def _sentences(text: str) -> List[str]:
     parts = [s.strip() for s in _SENT_SPLIT_RE.split(text) if s and s.strip()]
     # Merge overly short fragments with their neighbor to avoid degenerate summaries
@@ -65,7 +120,7 @@ def _sentences(text: str) -> List[str]:
         if not buf:
             buf = p
         else:
-            if len(buf) < 40 or (not buf.endswith(tuple(".!?…")) and len(buf) < 80):
+            if len(buf) < 40 or (not buf.endswith(_TERMINALS) and len(buf) < 80):
                 buf = f"{buf} {p}"
             else:
                 merged.append(buf)
@@ -75,63 +130,293 @@ def _sentences(text: str) -> List[str]:
     return merged if merged else parts
 
 
-def _tokenize(text: str) -> List[str]:
-    return [t.lower() for t in _TOKEN_RE.findall(text)]
+def _split_long(sentence: str, max_chars: int) -> List[str]:
+    # A sentence longer than a whole chunk is cut at word boundaries
+    pieces: List[str] = []
+    while len(sentence) > max_chars:
+        cut = sentence.rfind(" ", 0, max_chars + 1)
+        if cut <= 0:
+            cut = max_chars
+        pieces.append(sentence[:cut].rstrip())
+        sentence = sentence[cut:].lstrip()
+    if sentence:
+        pieces.append(sentence)
+    return pieces
+
+
+def _chunks(text: str, chunk_limits: Optional[Tuple[int, int]] = None) -> List[str]:
+    """`text` split on sentence boundaries into chunks of at most the chunk token budget.
+
+    Beyond the chunk cap, only chunks spread evenly over the text (first and
+    last included) are kept. Text within one chunk comes back unchanged.
+    """
+    chunk_tokens, max_chunks = chunk_limits or _chunk_limits()
+    max_chars = chunk_tokens * _CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return [text]
+
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for sent in _sentences(text):
+        for piece in _split_long(sent, max_chars) if len(sent) > max_chars else (sent,):
+            if current and size + 2 + len(piece) > max_chars:
+                chunks.append("\n\n".join(current))
+                current, size = [], 0
+            size += (2 if current else 0) + len(piece)
+            current.append(piece)
+    if current:
+        chunks.append("\n\n".join(current))
+
+    if len(chunks) > max_chunks:
+        step = (len(chunks) - 1) / (max_chunks - 1) if max_chunks > 1 else 0
+        chunks = [chunks[round(i * step)] for i in range(max_chunks)]
+    return chunks
+
+
+def _map_reduce(text: str, run: Callable[[str], str], chunk_limits: Tuple[int, int]) -> str:
+    # Summarize each chunk, then the chunk summaries (paragraph-separated)
+    chunks = _chunks(text, chunk_limits)
+    if len(chunks) == 1:
+        return run(chunks[0])
+    return run("\n\n".join(p for p in (run(c) for c in chunks) if p))
+
+
+def _fallback_extractive(
+    text: str,
+    *,
+    limits: Optional[Tuple[int, int, int]] = None,
+    vocab: Optional["Vocabulary"] = None,
+) -> str:
+    # Extractive stand-in when the LLM fails; chunked like any other summary
+    limits = limits or _limits()
+    vocab = vocab or Vocabulary()
+    return _map_reduce(text, lambda t: _summarize_extractive(t, limits=limits, vocab=vocab), _chunk_limits())
 
 
-def _summarize_extractive(text: str) -> str:
+class Vocabulary:
+    """Raw token -> term id (-1 for tokens that never score). Reusable across texts.
+
+    Lowercasing and the digit/length/stopword checks run once per distinct raw
+    token, so a batch sharing one vocabulary does that work once overall.
+    """
+
+    __slots__ = ("ids", "terms", "words")
+
+    def __init__(self) -> None:
+        self.ids: Dict[str, int] = {}
+        self.terms: Dict[str, int] = {}
+        self.words: List[str] = []  # term id -> lowercased term
+
+    def add_missing(self, tokens: Sequence[str]) -> None:
+        ids, terms, words = self.ids, self.terms, self.words
+        for tok in set(tokens).difference(ids):
+            low = tok.lower()
+            if low.isdigit() or len(low) <= 2 or low in _STOPWORDS:
+                ids[tok] = -1
+                continue
+            term = terms.get(low)
+            if term is None:
+                term = terms[low] = len(words)
+                words.append(low)
+            ids[tok] = term
+
+    def terms_of(self, text: str) -> "array[int]":
+        """Term ids of the scoring tokens of `text`, in order."""
+        tokens = _WORD_RE.findall(text)
+        self.add_missing(tokens)
+        return array("l", [t for t in map(self.ids.__getitem__, tokens) if t >= 0])
+
+
+def _extractive_engine() -> str:
+    engine = (
+        (getattr(settings, "SUMMARY_EXTRACTIVE_ENGINE", None) if settings else None)
+        or os.environ.get("SUMMARY_EXTRACTIVE_ENGINE")
+        or _DEFAULT_EXTRACTIVE_ENGINE
+    ).lower()
+    if engine == "python":
+        return engine
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        if engine == "numpy":
+            raise
+        return "python"
+    return "numpy"
+
+
+def _extractive_many(texts: Sequence[str], limits: Tuple[int, int, int]) -> List[Union[str, Exception]]:
+    # One engine, vocabulary shared by the whole batch; failures stay per item
+    vocab = Vocabulary()
+    if _extractive_engine() == "numpy":
+        from app.services.extractive_np import summarize_extractive_np
+
+        def run(text: str) -> str:
+            return summarize_extractive_np(text, limits=limits, vocab=vocab)
+    else:
+        def run(text: str) -> str:
+            return _summarize_extractive(text, limits=limits, vocab=vocab)
+
+    chunk_limits = _chunk_limits()
+    results: List[Union[str, Exception]] = []
+    for text in texts:
+        try:
+            results.append(_map_reduce(text, run, chunk_limits))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def _summarize_extractive(
+    text: str,
+    *,
+    limits: Optional[Tuple[int, int, int]] = None,
+    vocab: Optional[Vocabulary] = None,
+) -> str:
     text = (text or "").strip()
     if not text:
         return ""
 
-    max_chars, max_sentences, min_sent_chars = _limits()
+    max_chars, max_sentences, min_sent_chars = limits or _limits()
 
     sents = _sentences(text)
     if not sents:
         return text[:max_chars] + ("…" if len(text) > max_chars else "")
 
-    tokens = _tokenize(text)
-    freqs = {}
-    for tok in tokens:
-        if tok.isdigit() or len(tok) <= 2 or tok in _STOPWORDS:
-            continue
-        freqs[tok] = freqs.get(tok, 0) + 1
+    # One tokenize/filter pass: each sentence becomes an array of term ids,
+    # used for both the counts and the scores
+    vocab = vocab or Vocabulary()
+    per_sent = [vocab.terms_of(s) for s in sents]
+    freqs: Dict[int, int] = {}
+    for ids in per_sent:
+        for t in ids:
+            freqs[t] = freqs.get(t, 0) + 1
 
     if not freqs:
-        out: List[str] = []
-        total = 0
-        for s in sents:
-            if total and total + 1 + len(s) > max_chars:
-                break
-            out.append(s)
-            total += (0 if total == 0 else 1) + len(s)
-            if len(out) >= max_sentences:
-                break
-        result = " ".join(out)
-        return result if len(result) <= max_chars else (result[:max_chars] + "…")
-
-    max_f = max(freqs.values()) or 1
-
-    scored: List[Tuple[int, float, str]] = []
-    for idx, s in enumerate(sents):
-        toks = _tokenize(s)
-        length_penalty = 0.8 if len(s) < min_sent_chars else 1.0
-        score = 0.0
-        for t in toks:
-            if t in _STOPWORDS or t.isdigit() or len(t) <= 2:
-                continue
-            score += (freqs.get(t, 0) / max_f)
-        score *= length_penalty
-        scored.append((idx, score, s))
-
-    top = sorted(scored, key=lambda x: x[1], reverse=True)[:max_sentences]
-    top_sorted = [s for _, _, s in sorted(top, key=lambda x: x[0])]
-    summary = " ".join(top_sorted)
+        return _lead(sents, max_chars, max_sentences)
+
+    n = len(sents)
+    if n <= max_sentences:
+        return _join_selected(sents, range(n), max_chars)
+
+    # Score = sum(freq / max_f) over a sentence's terms, times 0.8 for short ones.
+    # Rank by the exact integer sum(freq) * (4 or 5) instead; float rounding only
+    # matters between sentences with equal integer keys, so ties at the selection
+    # boundary are re-scored with the float arithmetic (same result as the NumPy engine).
+    get = freqs.__getitem__
+    short = [len(s) < min_sent_chars for s in sents]
+    keys = [sum(map(get, ids)) * (4 if sh else 5) for ids, sh in zip(per_sent, short)]
+    boundary = heapq.nlargest(max_sentences, keys)[-1]
+    selected = [i for i, k in enumerate(keys) if k > boundary]
+    tied = [i for i, k in enumerate(keys) if k == boundary]
+    room = max_sentences - len(selected)
+
+    if len(tied) > room:
+        max_f = max(freqs.values())
+
+        def float_score(i: int) -> float:
+            score = 0.0
+            for t in per_sent[i]:
+                score += freqs[t] / max_f
+            return score * (0.8 if short[i] else 1.0)
+
+        scores = {i: float_score(i) for i in tied}
+        # Python's sort is stable: equal floats keep sentence order
+        selected += sorted(tied, key=scores.__getitem__, reverse=True)[:room]
+    else:
+        selected += tied
+
+    return _join_selected(sents, selected, max_chars)
+
+
+def _lead(sents: List[str], max_chars: int, max_sentences: int) -> str:
+    # Nothing to score (only stopwords/numbers): take the leading sentences that fit
+    out: List[str] = []
+    total = 0
+    for s in sents:
+        if total and total + 1 + len(s) > max_chars:
+            break
+        out.append(s)
+        total += (0 if total == 0 else 1) + len(s)
+        if len(out) >= max_sentences:
+            break
+    result = " ".join(out)
+    return result if len(result) <= max_chars else (result[:max_chars] + "…")
+
+
+def _join_selected(sents: Union[Sequence[str], Dict[int, str]], selected: Sequence[int], max_chars: int) -> str:
+    # Selected sentences in original order, truncated to the character limit
+    summary = " ".join(sents[i] for i in sorted(selected))
     if len(summary) > max_chars:
         summary = summary[:max_chars].rstrip() + "…"
     return summary
 
 
+def _ollama_model(model: Optional[str] = None) -> str:
+    return (
+        model
+        or (getattr(settings, "SUMMARIZE_LLM_MODEL", None) if settings else None)
+        or os.environ.get("SUMMARIZE_LLM_MODEL")
+        or _DEFAULT_SUMMARIZE_MODEL
+    )
+
+
+def _ollama_prompt(text: str, max_chars: int, max_sentences: int) -> str:
+    # Prompt geared for concise, faithful summaries
+    return (
+        f"Summarize the following text in at most {max_sentences} sentence(s). "
+        f"Use plain text, no bullets. Keep key facts and names. "
+        f"Hard limit: at most {max_chars} characters total.\n\n"
+        f"=== TEXT START ===\n{text}\n=== TEXT END ==="
+    )
+
+
+def _ollama_update_prompt(summary: str, addition: str, max_chars: int, max_sentences: int) -> str:
+    # An edited note: only the appended text is sent, with the summary of what came before
+    return (
+        f"Below is the summary of a note, followed by text that was appended to the note. "
+        f"Write the updated summary of the whole note in at most {max_sentences} sentence(s). "
+        f"Use plain text, no bullets. Keep key facts and names; prefer newer information where it conflicts. "
+        f"Hard limit: at most {max_chars} characters total.\n\n"
+        f"=== SUMMARY START ===\n{summary}\n=== SUMMARY END ===\n\n"
+        f"=== APPENDED TEXT START ===\n{addition}\n=== APPENDED TEXT END ==="
+    )
+
+
+def _ollama_reduce_prompt(partials: Sequence[str], max_chars: int, max_sentences: int) -> str:
+    # Combine the chunk summaries of a long note
+    parts = "\n\n".join(f"--- Part {i} ---\n{p}" for i, p in enumerate(partials, 1))
+    return (
+        f"Below are summaries of consecutive parts of one long note, in order. "
+        f"Combine them into one summary of the whole note in at most {max_sentences} sentence(s). "
+        f"Use plain text, no bullets. Keep key facts and names. "
+        f"Hard limit: at most {max_chars} characters total.\n\n"
+        f"=== PARTS START ===\n{parts}\n=== PARTS END ==="
+    )
+
+
+def _ollama_result(
+    out: object,
+    fallback_text: str,
+    *,
+    limits: Tuple[int, int, int],
+    vocab: Optional[Vocabulary] = None,
+) -> str:
+    # An LLM reply (or the exception it raised) as a summary; extractive when it failed or was empty
+    if not isinstance(out, str):
+        from app.services.ollama import CircuitOpenError
+
+        _fallbacks["circuit_open" if isinstance(out, CircuitOpenError) else "error"].inc()
+        out = ""
+    elif not out.strip():
+        _fallbacks["empty"].inc()
+    out = out.strip()
+    if not out:
+        return FallbackSummary(_fallback_extractive(fallback_text, limits=limits, vocab=vocab))
+    # Truncate just in case the model ignores constraints
+    return out[:limits[0]].rstrip()
+
+
 def _summarize_ollama(
     text: str,
     *,
@@ -144,59 +429,170 @@ def _summarize_ollama(
     if not text:
         return ""
 
-    max_chars, max_sentences, _ = _limits()
+    limits = _limits()
+    max_chars, max_sentences, _ = limits
     host = (
         host
         or (getattr(settings, "OLLAMA_HOST", None) if settings else None)
         or os.environ.get("OLLAMA_HOST")
         or _DEFAULT_OLLAMA_HOST
     )
-    model = (
-        model
-        or (getattr(settings, "SUMMARIZE_LLM_MODEL", None) if settings else None)
-        or os.environ.get("SUMMARIZE_LLM_MODEL")
-        or _DEFAULT_SUMMARIZE_MODEL
-    )
-
-    # Prompt geared for concise, faithful summaries
-    prompt = (
-        f"Summarize the following text in at most {max_sentences} sentence(s). "
-        f"Use plain text, no bullets. Keep key facts and names. "
-        f"Hard limit: at most {max_chars} characters total.\n\n"
-        f"=== TEXT START ===\n{text}\n=== TEXT END ==="
-    )
-
-    host = host or _DEFAULT_OLLAMA_HOST
     url = str(host).rstrip("/") + "/api/generate"
-    payload = {
-        "model": model,
-        "prompt": prompt,
-        "temperature": temperature,
-        "stream": False,
-    }
+    model = _ollama_model(model)
+
+    def generate(prompt: str, fallback_text: str) -> str:
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "options": {"temperature": temperature},
+            "stream": False,
+        }
+        try:
+            resp = requests.post(url, json=payload, timeout=timeout)
+            resp.raise_for_status()
+            out: object = resp.json().get("response") or ""
+        except Exception as e:
+            # Fallback to extractive if LLM not available
+            out = e
+        return _ollama_result(out, fallback_text, limits=limits)
+
+    chunks = _chunks(text)
+    if len(chunks) == 1:
+        return generate(_ollama_prompt(chunks[0], max_chars, max_sentences), chunks[0])
+    partials = [generate(_ollama_prompt(c, max_chars, max_sentences), c) for c in chunks]
+    summary = generate(_ollama_reduce_prompt(partials, max_chars, max_sentences), "\n\n".join(partials))
+    return _degraded(summary, partials)
+
+
+async def _asummarize_ollama(
+    text: str,
+    *,
+    client: Optional["OllamaClient"] = None,
+    model: Optional[str] = None,
+    temperature: float = 0.2,
+) -> str:
+    """Async variant over the pooled, streaming client in app.services.ollama."""
+    result = (
+        await _asummarize_ollama_many([text], limits=_limits(), client=client, model=model, temperature=temperature)
+    )[0]
+    if isinstance(result, Exception):
+        raise result
+    return result
 
-    try:
-        resp = requests.post(url, json=payload, timeout=timeout)
-        resp.raise_for_status()
-        data = resp.json()
-        out = (data.get("response") or "").strip()
-        if not out:
-            return _summarize_extractive(text)
-        # Truncate just in case the model ignores constraints
-        return out[:max_chars].rstrip()
-    except Exception:
-        # Fallback to extractive if LLM not available
-        return _summarize_extractive(text)
 
+async def _asummarize_ollama_many(
+    texts: Sequence[str],
+    *,
+    limits: Tuple[int, int, int],
+    slots: Optional["asyncio.Semaphore"] = None,
+    client: Optional["OllamaClient"] = None,
+    model: Optional[str] = None,
+    temperature: float = 0.2,
+) -> List[Union[str, Exception]]:
+    from app.services.ollama import get_client
+
+    max_chars, max_sentences, _ = limits
+    client = client or get_client()
+    model = _ollama_model(model)
+    texts = [(t or "").strip() for t in texts]
+    plans = [_chunks(t) if t else [] for t in texts]
+
+    async def generate(prompts: List[str]) -> List[Union[str, Exception]]:
+        if not prompts:
+            return []
+        return await client.generate_many(
+            prompts, model=model, temperature=temperature, max_chars=max_chars, slots=slots
+        )
+
+    # Map: every chunk of every note goes out in one concurrent round
+    outs = await generate([_ollama_prompt(c, max_chars, max_sentences) for plan in plans for c in plan])
+
+    results: List[Union[str, Exception]] = [""] * len(texts)
+    partials: Dict[int, List[str]] = {}
+    vocab = Vocabulary()
+    pos = 0
+    for i, plan in enumerate(plans):
+        replies, pos = outs[pos:pos + len(plan)], pos + len(plan)
+        try:
+            # Fallback to extractive per chunk when the LLM failed or returned nothing
+            done = [_ollama_result(out, chunk, limits=limits, vocab=vocab) for chunk, out in zip(plan, replies)]
+        except Exception as e:
+            results[i] = e
+            continue
+        if len(done) == 1:
+            results[i] = done[0]
+        elif done:
+            partials[i] = done
+
+    # Reduce: one more round for the notes that were split
+    reduced = await generate([_ollama_reduce_prompt(partials[i], max_chars, max_sentences) for i in partials])
+    for (i, parts), out in zip(partials.items(), reduced):
+        try:
+            results[i] = _degraded(_ollama_result(out, "\n\n".join(parts), limits=limits, vocab=vocab), parts)
+        except Exception as e:
+            results[i] = e
+    return results
+
+
+def _degraded(summary: str, partials: Sequence[str]) -> str:
+    # A reduce over partly extractive chunk summaries counts as a fallback too
+    if any(isinstance(p, FallbackSummary) for p in partials):
+        return FallbackSummary(summary)
+    return summary
 
-def summarize(text: str) -> str:
-    provider = (
+
+def provider_name() -> str:
+    return (
         (getattr(settings, "SUMMARIZE_PROVIDER", None) if settings else None)
         or os.environ.get("SUMMARIZE_PROVIDER")
         or _DEFAULT_SUMMARIZE_PROVIDER
     ).lower()
 
+
+def summarize(text: str) -> str:
+    provider = provider_name()
+
     if provider == "ollama":
         return _summarize_ollama(text)
     # default extractive
-    return _summarize_extractive(text)
+    return _extract(text)
+
+
+def _extract(text: str) -> str:
+    result = _extractive_many([text], _limits())[0]
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+def summarize_many(texts: Sequence[str]) -> List[Union[str, Exception]]:
+    """Summarize a batch; results keep input order, failures are returned per item.
+
+    Provider, limits and extractive engine are resolved once for the whole
+    batch, and extractive runs share their token filtering work.
+    """
+    if provider_name() != "ollama":
+        return _extractive_many(texts, _limits())
+    results: List[Union[str, Exception]] = []
+    for text in texts:
+        try:
+            results.append(_summarize_ollama(text))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+async def summarize_many_async(
+    texts: Sequence[str], *, slots: Optional["asyncio.Semaphore"] = None
+) -> List[Union[str, Exception]]:
+    """Batch variant of `summarize_async`; LLM requests go out concurrently (at most `slots`)."""
+    if provider_name() == "ollama":
+        return await _asummarize_ollama_many(texts, limits=_limits(), slots=slots)
+    return summarize_many(texts)
+
+
+async def summarize_async(text: str) -> str:
+    """Like `summarize`, but LLM providers don't block the event loop."""
+    if provider_name() == "ollama":
+        return await _asummarize_ollama(text)
+    return _extract(text)
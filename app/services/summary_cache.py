@@ -0,0 +1,127 @@
+"""
+Content-addressed cache of note summaries.
+
+CRM notes are heavily duplicated (templates, forwarded emails, copy-paste), so
+identical text is summarized once. The key is a SHA-256 over the normalized
+text plus everything that shapes the output (provider, model, limits); changing
+the summarizer configuration therefore never serves stale summaries.
+
+Two layers:
+- an in-process LRU, private to each worker;
+- the `summary_cache` table, shared by every worker.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import unicodedata
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.summary_cache import SummaryCacheEntry
+from app.services.summarizer import _chunk_limits, _limits, _ollama_model, provider_name
+
+_HSPACE_RE = re.compile(r"[^\S\n]+")
+
+# Dialects with INSERT ... ON CONFLICT DO NOTHING
+_UPSERT_INSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form for hashing: NFC, LF line endings, collapsed spaces, trimmed lines."""
+    text = unicodedata.normalize("NFC", text or "").replace("\r\n", "\n").replace("\r", "\n")
+    return "\n".join(_HSPACE_RE.sub(" ", line).strip() for line in text.split("\n")).strip()
+
+
+def _config_fingerprint() -> str:
+    provider = provider_name()
+    model = _ollama_model() if provider != "extractive" else ""
+    max_chars, max_sentences, min_sent_chars = _limits()
+    chunk_tokens, max_chunks = _chunk_limits()
+    return f"v1|{provider}|{model}|{max_chars}|{max_sentences}|{min_sent_chars}|{chunk_tokens}|{max_chunks}"
+
+
+def cache_key(text: str) -> str:
+    payload = _config_fingerprint() + "\0" + normalize_text(text)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    def __init__(self, max_entries: int, ttl: float, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self._memory: TTLCache[str, str] = TTLCache(max_entries, ttl)
+        self.hits_memory = 0
+        self.hits_db = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits_memory": self.hits_memory, "hits_db": self.hits_db, "misses": self.misses}
+
+    async def get(self, session: AsyncSession, text: str) -> Optional[str]:
+        return (await self.get_many(session, [text]))[0]
+
+    async def get_many(self, session: AsyncSession, texts: Sequence[str]) -> List[Optional[str]]:
+        """Batch lookup (one query for everything not in memory); keeps input order."""
+        if not self.enabled:
+            return [None] * len(texts)
+        keys = [cache_key(t) for t in texts]
+        found: Dict[str, str] = {}
+        missing = set()
+        for key in keys:
+            summary = self._memory.get(key)
+            if summary is not None:
+                found[key] = summary
+            else:
+                missing.add(key)
+        if missing:
+            result = await session.execute(
+                select(SummaryCacheEntry.key, SummaryCacheEntry.summary).where(SummaryCacheEntry.key.in_(missing))
+            )
+            for key, summary in result.all():
+                found[key] = summary
+                self._memory.set(key, summary)
+
+        out: List[Optional[str]] = []
+        for key in keys:
+            summary = found.get(key)
+            if summary is None:
+                self.misses += 1
+            elif key in missing:
+                self.hits_db += 1
+            else:
+                self.hits_memory += 1
+            out.append(summary)
+        return out
+
+    async def put(self, session: AsyncSession, text: str, summary: str) -> None:
+        """Stage the entry in `session`; it is written with the caller's next commit."""
+        if not self.enabled or not summary:
+            return
+        key = cache_key(text)
+        self._memory.set(key, summary)
+        values = {"key": key, "summary": summary}
+        upsert_insert = _UPSERT_INSERTS.get(session.bind.dialect.name)
+        if upsert_insert is not None:
+            await session.execute(upsert_insert(SummaryCacheEntry).values(**values).on_conflict_do_nothing())
+            return
+        # Another worker may have stored the same key first; that entry is equivalent
+        try:
+            async with session.begin_nested():
+                await session.execute(insert(SummaryCacheEntry).values(**values))
+        except IntegrityError:
+            pass
+
+
+summary_cache = SummaryCache(
+    settings.SUMMARY_CACHE_MEMORY_ENTRIES,
+    settings.SUMMARY_CACHE_MEMORY_TTL_SECONDS,
+    enabled=settings.SUMMARY_CACHE_ENABLED,
+)
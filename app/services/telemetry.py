@@ -0,0 +1,79 @@
+"""
+Scrape-time collectors and the worker's metrics endpoint.
+
+Importing this module registers collectors that refresh, right before each
+render: queue depth by NoteStatus (one GROUP BY query), summary cache hit
+counts, database pool usage and password hashing queue stats. The API serves the result on
+GET /metrics; the worker has no web framework, so `serve_metrics` runs a tiny
+HTTP server for it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+from sqlalchemy import func, select
+
+from app.core import database, metrics
+from app.core.database import SessionLocal
+from app.core.security import password_hash_stats
+from app.models.note import Note, NoteStatus
+from app.services.summary_cache import summary_cache
+
+summary_cache_lookups = metrics.Counter(
+    "summary_cache_lookups_total", "Summary cache lookups by where they were answered", ("result",)
+)
+password_hash_pending = metrics.Gauge("password_hash_pending", "Password hash jobs queued or running")
+password_hash_rejected = metrics.Counter(
+    "password_hash_rejected_total", "Auth requests shed because the hash queue was full"
+)
+
+
+@metrics.on_collect
+async def refresh_queue_depth() -> None:
+    async with SessionLocal() as session:
+        rows = (await session.execute(select(Note.status, func.count()).group_by(Note.status))).all()
+    counts = {status: 0 for status in NoteStatus}
+    counts.update(rows)
+    for status, count in counts.items():
+        metrics.notes_by_status.labels(status.value).set(count)
+
+
+@metrics.on_collect
+def refresh_process_stats() -> None:
+    # Totals kept by the services themselves; copied as-is
+    for result, count in summary_cache.stats().items():
+        summary_cache_lookups.labels(result).value = count
+    pool = database.engine.pool
+    if hasattr(pool, "checkedout"):  # queue pools; NullPool/StaticPool keep no counts
+        role = database.role
+        metrics.db_pool_connections.labels(role, "checked_out").set(pool.checkedout())
+        metrics.db_pool_connections.labels(role, "idle").set(pool.checkedin())
+        metrics.db_pool_connections.labels(role, "overflow").set(max(0, pool.overflow()))
+    stats = password_hash_stats()
+    password_hash_pending.labels().value = stats["pending"]
+    password_hash_rejected.labels().value = stats["rejected"]
+
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        request_line = await reader.readline()
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+        if request_line.split(b" ")[:2] == [b"GET", b"/metrics"]:
+            body = (await metrics.render()).encode()
+            head = f"HTTP/1.1 200 OK\r\nContent-Type: {metrics.CONTENT_TYPE}\r\n"
+        else:
+            body = b"Not Found\n"
+            head = "HTTP/1.1 404 Not Found\r\nContent-Type: text/plain\r\n"
+        writer.write(f"{head}Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+        await writer.drain()
+    except Exception as e:
+        print(f"Metrics request failed: {e}")
+    finally:
+        writer.close()
+
+
+async def serve_metrics(port: int, host: str = "0.0.0.0") -> asyncio.Server:
+    """Serve GET /metrics on `port` (worker exporter)."""
+    return await asyncio.start_server(_handle, host, port)
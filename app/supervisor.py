@@ -0,0 +1,149 @@
+"""
+Worker supervisor: `python -m app.supervisor` runs WORKER_PROCESSES workers.
+
+- Each worker is its own process with its own event loop and "worker" DB pool
+  (`app.worker.run`), so summarizing scales across cores. Workers wait for
+  the database to be migrated before claiming anything.
+- On SIGTERM / SIGINT the supervisor sets a stop event shared with every
+  worker (signals are not needed, so this also works on Windows). Each worker
+  stops claiming, finishes its in-flight notes (up to
+  WORKER_DRAIN_TIMEOUT_SECONDS) and hands the rest back to the queue, so a
+  deploy loses no work. Workers that are still running after that are killed.
+- A worker that exits on its own is restarted, and its replacement returns
+  the notes it had leased right away instead of waiting for the leases to
+  expire. Workers that keep dying right after start are restarted with backoff.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from multiprocessing.connection import wait
+from typing import Callable
+
+from .core.config import settings
+
+_RESTART_BACKOFF_MAX_SECONDS = 30.0
+_STABLE_AFTER_SECONDS = 60.0  # a worker alive this long is healthy; its crash restarts at once
+
+
+def worker_count() -> int:
+    return max(1, int(settings.WORKER_PROCESSES or os.cpu_count() or 1))
+
+
+def worker_id(pid: int) -> str:
+    # Unique per process, also when WORKER_ID names the whole deployment
+    return f"{settings.WORKER_ID or socket.gethostname()}:{pid}"
+
+
+def _child_main(stop_event, summary_processes: int | None, metrics_port: int | None, reclaim: str | None) -> None:
+    settings.WORKER_SUMMARY_PROCESSES = summary_processes
+    settings.WORKER_METRICS_PORT = metrics_port
+    from .worker import run
+
+    run(worker_id(os.getpid()), reclaim=reclaim, stop_event=stop_event)
+
+
+class _Slot:
+    """One worker position: its current process and restart state."""
+
+    def __init__(self, index: int) -> None:
+        self.index = index
+        self.process: multiprocessing.process.BaseProcess | None = None
+        self.started = 0.0
+        self.failures = 0
+        self.restart_at = 0.0
+        self.reclaim: str | None = None
+
+
+class Supervisor:
+    def __init__(
+        self,
+        processes: int | None = None,
+        *,
+        context=None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.processes = processes or worker_count()
+        # "spawn": each worker starts clean, without the parent's state or sockets
+        self._context = context or multiprocessing.get_context("spawn")
+        self._clock = clock
+        self._slots = [_Slot(i) for i in range(self.processes)]
+        self._stop = self._context.Event()
+        self._stopping = False
+        # Split the cores between the workers' extractive pools (one process each at least)
+        self._summary_processes = settings.WORKER_SUMMARY_PROCESSES
+        if self._summary_processes is None:
+            self._summary_processes = max(1, (os.cpu_count() or 1) // self.processes)
+
+    def _start(self, slot: _Slot) -> None:
+        port = settings.WORKER_METRICS_PORT
+        process = self._context.Process(
+            target=_child_main,
+            args=(self._stop, self._summary_processes, port + slot.index if port else None, slot.reclaim),
+            name=f"worker-{slot.index}",
+        )
+        process.start()
+        slot.process, slot.started, slot.reclaim = process, self._clock(), None
+
+    def stop(self, *_: object) -> None:
+        """Ask every worker to drain and exit (signal handler)."""
+        self._stopping = True
+        self._stop.set()
+
+    def start(self) -> None:
+        for slot in self._slots:
+            self._start(slot)
+
+    def poll(self) -> None:
+        """Restart the workers that exited, once their backoff is over."""
+        for slot in self._slots:
+            if self._stopping:
+                break
+            if slot.process is not None and not slot.process.is_alive():
+                self._reap(slot)
+            if slot.process is None and self._clock() >= slot.restart_at:
+                self._start(slot)
+
+    def _reap(self, slot: _Slot) -> None:
+        process, slot.process = slot.process, None
+        process.join()
+        uptime = self._clock() - slot.started
+        slot.failures = 0 if uptime >= _STABLE_AFTER_SECONDS else slot.failures + 1
+        delay = min(_RESTART_BACKOFF_MAX_SECONDS, 2 ** slot.failures - 1)
+        slot.restart_at = self._clock() + delay
+        slot.reclaim = worker_id(process.pid)
+        print(f"Worker {process.name} (pid {process.pid}) exited with {process.exitcode}, restarting in {delay:.0f}s")
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        print(f"Supervisor starting {self.processes} worker(s)")
+        self.start()
+        while not self._stopping:
+            running = [slot.process.sentinel for slot in self._slots if slot.process is not None]
+            wait(running, timeout=1.0)
+            self.poll()
+
+        # Drain: workers finish their notes, then release their claims
+        deadline = time.monotonic() + settings.WORKER_DRAIN_TIMEOUT_SECONDS + 10
+        for slot in self._slots:
+            if slot.process is not None:
+                slot.process.join(max(0.0, deadline - time.monotonic()))
+                if slot.process.is_alive():
+                    print(f"Worker {slot.process.name} did not stop in time, killing it")
+                    slot.process.kill()
+                    slot.process.join()
+        print("Supervisor stopped")
+        return 0
+
+
+def main() -> int:
+    return Supervisor().run()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,78 +1,627 @@
 import asyncio
+import os
+import random
+import signal
+import socket
 import sys
+import threading
 import time
-from sqlalchemy import select, update
+from collections.abc import Awaitable
+from datetime import datetime, timedelta, UTC
+import anyio
+from sqlalchemy import func, inspect, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from .core.database import SessionLocal
+from sqlalchemy.orm import undefer
+from sqlalchemy.orm.attributes import set_committed_value
+from .core.database import SessionLocal, init_engine, wait_until_ready
 from .core.config import settings
-from .models.note import Note, NoteStatus
-from .services.summarizer import summarize
+from .core import metrics
+from .models.note import Note, NotePriority, NoteStatus
+from .services.events import note_event, publish_note_events
+from .services.executor import SummaryExecutor
+from .services.incremental import resummarize_many_async
+from .services.notify import QueueListener, notify_queued
+from .services.summary_cache import summary_cache
+from .services.telemetry import serve_metrics
+from .services.summarizer import FallbackSummary, provider_name, summarize_many
 
 
-async def process_note(session: AsyncSession, note: Note):
-    # Idempotency check - skip if already processed
-    if note.status in [NoteStatus.processing, NoteStatus.done]:
+def default_worker_id() -> str:
+    return settings.WORKER_ID or f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _lease_expiry() -> datetime:
+    return datetime.now(UTC) + timedelta(seconds=settings.WORKER_LEASE_SECONDS)
+
+
+def retry_delay(attempts: int) -> float:
+    """Backoff before retrying a note that failed `attempts` times: exponential, capped, jittered.
+
+    Equal jitter (half fixed, half random) keeps a burst of notes that failed
+    together, e.g. during an outage, from all coming back at the same moment.
+    """
+    delay = min(
+        settings.RETRY_BACKOFF_MAX_SECONDS,
+        settings.RETRY_BACKOFF_BASE_SECONDS * 2 ** max(0, attempts - 1),
+    )
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def _due():
+    # Queued notes whose retry time (if any) has come
+    return or_(Note.next_attempt_at.is_(None), Note.next_attempt_at <= datetime.now(UTC))
+
+
+def _aware(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes (stored as UTC)
+    return value if value.tzinfo is not None else value.replace(tzinfo=UTC)
+
+
+def _apply(note: Note, **values) -> None:
+    # Mirror a Core UPDATE onto the in-memory object without marking it dirty
+    for key, value in values.items():
+        set_committed_value(note, key, value)
+
+
+class LaneScheduler:
+    """Splits each claim between the priority lanes by weight (deficit round robin).
+
+    Every claim credits each lane `limit * weight / total` slots; a lane takes
+    its whole credits and leftover slots go to the largest fractions. While both
+    lanes have work, interactive notes get WORKER_INTERACTIVE_WEIGHT shares and a
+    bulk backlog still drains at WORKER_BULK_WEIGHT shares. A lane that runs dry
+    loses its credit, and slots it cannot use go to the other lane uncharged.
+    """
+
+    def __init__(self, weights: dict[NotePriority, int] | None = None) -> None:
+        self.weights = weights or {
+            NotePriority.interactive: settings.WORKER_INTERACTIVE_WEIGHT,
+            NotePriority.bulk: settings.WORKER_BULK_WEIGHT,
+        }
+        self._credit = dict.fromkeys(self.weights, 0.0)
+
+    def quotas(self, limit: int) -> dict[NotePriority, int]:
+        total = sum(self.weights.values()) or 1
+        remaining = limit
+        quotas = {}
+        for lane, weight in self.weights.items():
+            self._credit[lane] += limit * weight / total
+            quotas[lane] = min(remaining, max(0, int(self._credit[lane])))
+            remaining -= quotas[lane]
+        for lane in sorted(self.weights, key=lambda lane: self._credit[lane] - quotas[lane], reverse=True):
+            if remaining <= 0:
+                break
+            quotas[lane] += 1
+            remaining -= 1
+        return quotas
+
+    def charge(self, lane: NotePriority, quota: int, claimed: int) -> None:
+        self._credit[lane] = 0.0 if claimed < quota else self._credit[lane] - claimed
+
+
+async def _claim_lane(session: AsyncSession, worker_id: str, lane: NotePriority, limit: int) -> list[Note]:
+    candidates = (
+        select(Note.id)
+        .where(Note.status == NoteStatus.queued, Note.priority == lane, _due())
+        .order_by(Note.fair_rank.asc(), Note.created_at.asc())
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        # Materialized: as a plain IN (subquery), Postgres may rescan the
+        # locking sub-select per row and claim past the limit
+        .cte("candidates")
+        .prefix_with("MATERIALIZED")
+    )
+    stmt = (
+        update(Note)
+        .where(Note.id.in_(select(candidates.c.id)), Note.status == NoteStatus.queued)
+        .values(
+            status=NoteStatus.processing,
+            lease_owner=worker_id,
+            lease_expires_at=_lease_expiry(),
+            next_attempt_at=None,
+            attempts=Note.attempts + 1,
+        )
+        .returning(Note)
+        .options(undefer(Note.summary_state))
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    return list((await session.execute(stmt)).scalars().all())
+
+
+async def claim_notes(
+    session: AsyncSession, worker_id: str, limit: int, scheduler: LaneScheduler | None = None
+) -> list[Note]:
+    """Atomically lease up to `limit` due queued notes to `worker_id`, fairly.
+
+    `scheduler` splits the batch between the priority lanes; within a lane notes
+    are taken by `fair_rank`, which interleaves owners (app/services/scheduling.py).
+    Notes waiting out a retry backoff (`next_attempt_at` in the future) are skipped.
+
+    Each lane is claimed with one UPDATE ... RETURNING that flips the rows to
+    `processing`. On Postgres the candidate sub-select takes FOR UPDATE SKIP
+    LOCKED, so concurrent workers skip rows another worker is claiming instead
+    of blocking on them. SQLite does not render the locking clause, but it
+    serializes writers, which makes the same statement atomic there too.
+    """
+    scheduler = scheduler or LaneScheduler()
+    quotas = scheduler.quotas(limit)
+    notes: list[Note] = []
+    dry = set()
+    for lane, quota in quotas.items():
+        if quota:
+            claimed = await _claim_lane(session, worker_id, lane, quota)
+            scheduler.charge(lane, quota, len(claimed))
+            notes.extend(claimed)
+            if len(claimed) < quota:
+                dry.add(lane)
+    # Work-conserving: slots a lane could not use go to the others
+    for lane in quotas:
+        if len(notes) >= limit:
+            break
+        if lane not in dry:
+            notes.extend(await _claim_lane(session, worker_id, lane, limit - len(notes)))
+
+    now = datetime.now(UTC)
+    for note in notes:
+        if note.attempts == 1:
+            metrics.note_queue_wait.labels(note.priority.value).observe((now - _aware(note.created_at)).total_seconds())
+    notes.sort(key=lambda n: (n.created_at, n.id))
+    await publish_note_events(session, [note_event(n) for n in notes])
+    await session.commit()
+    return notes
+
+
+async def next_retry_in(session: AsyncSession) -> float | None:
+    """Seconds until the earliest queued retry becomes due, or None if none is waiting."""
+    due_at = await session.scalar(
+        select(func.min(Note.next_attempt_at)).where(
+            Note.status == NoteStatus.queued, Note.next_attempt_at > datetime.now(UTC)
+        )
+    )
+    if due_at is None:
+        return None
+    return max(0.0, (_aware(due_at) - datetime.now(UTC)).total_seconds())
+
+
+async def _return_leases(session: AsyncSession, *where, reason: str) -> int:
+    # Leases matching `where` go back to the queue, or to failed once out of attempts
+    released = {"lease_owner": None, "lease_expires_at": None, "last_error": reason}
+    returned = (Note.id, Note.owner_id, Note.status, Note.attempts)
+    exhausted = (
+        await session.execute(
+            update(Note)
+            .where(Note.status == NoteStatus.processing, *where, Note.attempts >= settings.MAX_RETRIES)
+            .values(status=NoteStatus.failed, **released)
+            .returning(*returned)
+            .execution_options(synchronize_session=False)
+        )
+    ).all()
+    requeued = (
+        await session.execute(
+            update(Note)
+            .where(Note.status == NoteStatus.processing, *where)
+            .values(status=NoteStatus.queued, **released)
+            .returning(*returned)
+            .execution_options(synchronize_session=False)
+        )
+    ).all()
+    await publish_note_events(session, [note_event(row) for row in exhausted + requeued])
+    if requeued:
+        await notify_queued(session)
+    await session.commit()
+    return len(exhausted) + len(requeued)
+
+
+async def reap_expired_leases(session: AsyncSession) -> int:
+    """Return notes whose lease expired (crashed or stuck worker) to the queue.
+
+    Notes that already used up their attempts are marked failed instead, so a
+    note that keeps killing its worker cannot cycle forever.
+    """
+    return await _return_leases(session, Note.lease_expires_at < datetime.now(UTC), reason="lease expired")
+
+
+async def reclaim_leases(session: AsyncSession, worker_id: str) -> int:
+    """Return the notes of a worker known to be dead without waiting for their leases to expire.
+
+    The attempt counts as used, exactly as for an expired lease.
+    """
+    return await _return_leases(session, Note.lease_owner == worker_id, reason="worker exited")
+
+
+async def release_claims(session: AsyncSession, worker_id: str) -> int:
+    """Hand the notes still leased to `worker_id` back to the queue (shutdown).
+
+    The note did not fail, so the interrupted attempt is not counted.
+    """
+    requeued = (
+        await session.execute(
+            update(Note)
+            .where(Note.status == NoteStatus.processing, Note.lease_owner == worker_id)
+            .values(
+                status=NoteStatus.queued,
+                lease_owner=None,
+                lease_expires_at=None,
+                attempts=Note.attempts - 1,
+            )
+            .returning(Note.id, Note.owner_id, Note.status, Note.attempts)
+            .execution_options(synchronize_session=False)
+        )
+    ).all()
+    await publish_note_events(session, [note_event(row) for row in requeued])
+    if requeued:
+        await notify_queued(session)
+    await session.commit()
+    return len(requeued)
+
+
+async def extend_leases(session: AsyncSession, worker_id: str, note_ids: list[int]) -> int:
+    """Push back the lease of the notes `worker_id` still holds; returns how many it holds."""
+    result = await session.execute(
+        update(Note)
+        .where(Note.id.in_(note_ids), Note.status == NoteStatus.processing, Note.lease_owner == worker_id)
+        # Bookkeeping only: updated_at (ETag, event polling) stays as it is
+        .values(lease_expires_at=_lease_expiry(), updated_at=Note.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    return result.rowcount
+
+
+async def _keep_leases(worker_id: str, note_ids: list[int]) -> None:
+    # Renew well before expiry, so a slow summarizer stage (e.g. Ollama
+    # map-reduce) is not mistaken for a dead worker and summarized twice
+    while True:
+        await anyio.sleep(settings.WORKER_LEASE_SECONDS / 3)
+        try:
+            async with SessionLocal() as session:
+                await extend_leases(session, worker_id, note_ids)
+        except Exception as e:
+            print(f"Lease renewal failed: {e}")
+
+
+async def _lease_note(session: AsyncSession, note: Note, worker_id: str) -> bool:
+    expires = _lease_expiry()
+    result = await session.execute(
+        update(Note)
+        .where(Note.id == note.id, Note.status == NoteStatus.queued)
+        .values(
+            status=NoteStatus.processing,
+            lease_owner=worker_id,
+            lease_expires_at=expires,
+            next_attempt_at=None,
+            attempts=Note.attempts + 1,
+        )
+        .returning(Note.attempts)
+        .execution_options(synchronize_session=False)
+    )
+    attempts = result.scalar_one_or_none()
+    if attempts is not None:
+        await publish_note_events(session, [note_event(note, status=NoteStatus.processing, attempts=attempts)])
+    await session.commit()
+    if attempts is None:
+        return False
+    _apply(
+        note,
+        status=NoteStatus.processing,
+        lease_owner=worker_id,
+        lease_expires_at=expires,
+        next_attempt_at=None,
+        attempts=attempts,
+    )
+    return True
+
+
+async def _release_note(session: AsyncSession, note: Note, worker_id: str, **values) -> bool:
+    # Only the current lease holder may write the outcome; a worker whose lease
+    # expired and was re-claimed elsewhere must not overwrite the newer result.
+    values.update(lease_owner=None, lease_expires_at=None)
+    result = await session.execute(
+        update(Note)
+        .where(
+            Note.id == note.id,
+            Note.status == NoteStatus.processing,
+            Note.lease_owner == worker_id,
+        )
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    released = result.rowcount == 1
+    if released:
+        await publish_note_events(session, [note_event(note, **values)])
+    await session.commit()
+    if not released:
+        return False
+    _apply(note, **values)
+    return True
+
+
+async def _store_failure(session: AsyncSession, note: Note, worker_id: str, error: BaseException) -> None:
+    """Re-queue the note for a later attempt (backoff stored on the row), or fail it."""
+    attempts = note.attempts or 0
+    values = {"last_error": f"{type(error).__name__}: {error}"[:1000]}
+    if attempts >= settings.MAX_RETRIES:
+        values["status"] = NoteStatus.failed
+    else:
+        delay = retry_delay(attempts)
+        values.update(status=NoteStatus.queued, next_attempt_at=datetime.now(UTC) + timedelta(seconds=delay))
+
+    if not await _release_note(session, note, worker_id, **values):
+        print(f"Note {note.id} lease lost while failing, leaving it to its new owner")
         return
 
-    # Mark as processing with timestamp
-    note.status = NoteStatus.processing
-    note.attempts = (note.attempts or 0) + 1
+    metrics.note_failures.labels(values["status"].value).inc()
+    if values["status"] == NoteStatus.failed:
+        print(f"Note {note.id} failed permanently after {attempts} attempts: {error}")
+    else:
+        print(f"Note {note.id} failed (attempt {attempts}), retrying in {delay:.1f}s")
+
+
+async def process_batch(
+    session: AsyncSession,
+    notes: list[Note],
+    *,
+    worker_id: str | None = None,
+    executor: SummaryExecutor | None = None,
+):
+    """Summarize notes leased to `worker_id` with a single summarizer call.
+
+    Cached summaries are looked up in one query, only the misses go to the
+    summarizer, and each outcome is written back individually. Edited notes
+    (with a `summary_state`) are re-summarized incrementally instead. Without
+    an `executor` the summarizer runs inline.
+    """
+    worker_id = worker_id or default_worker_id()
+    # Idempotency check - skip anything already processed or leased by another worker
+    notes = [n for n in notes if n.status == NoteStatus.processing and n.lease_owner == worker_id]
+    if not notes:
+        return
+    claimed_at = time.perf_counter()  # claims are processed right away
+    # claim_notes loads the deferred state; notes read elsewhere may lack it
+    unloaded = [n.id for n in notes if "summary_state" in inspect(n).unloaded]
+    if unloaded:
+        rows = await session.execute(select(Note.id, Note.summary_state).where(Note.id.in_(unloaded)))
+        states = dict(rows.all())
+        for n in notes:
+            if n.id in states:
+                set_committed_value(n, "summary_state", states[n.id])
+
+    # Edited notes carry incremental state and skip the cache (their text is unique)
+    edited = [n for n in notes if n.summary_state is not None]
+    fresh_notes = [n for n in notes if n.summary_state is None]
+    cached = await summary_cache.get_many(session, [n.raw_text for n in fresh_notes])
+    # Don't hold a transaction open while the summarizer runs
     await session.commit()
 
-    try:
-        result = summarize(note.raw_text)
-        
-        # Update with result
-        note.status = NoteStatus.done
-        note.summary = result
-        await session.commit()
-        await session.refresh(note)
-        print(f"✅ Successfully processed note {note.id}")
-        
-    except Exception as e:
-        attempts = (note.attempts or 0) + 1
-        new_status = NoteStatus.failed if attempts >= settings.MAX_RETRIES else NoteStatus.queued
-        
-        # Exponential backoff for retries
-        retry_delay = min(60, 2 ** attempts)
-        
-        note.status = new_status
-        note.attempts = attempts
-        await session.commit()
-        
-        if new_status == NoteStatus.queued:
-            print(f"Note {note.id} failed (attempt {attempts}), retrying in {retry_delay}s")
-            await asyncio.sleep(retry_delay)
+    pending = [n for n, hit in zip(fresh_notes, cached) if hit is None]
+    texts = [n.raw_text for n in pending]
+    items = [(n.raw_text, n.summary_state, n.summary) for n in edited]
+    provider = executor.provider if executor is not None else provider_name()
+    error: Exception | None = None
+    async with anyio.create_task_group() as renewals:
+        renewals.start_soon(_keep_leases, worker_id, [n.id for n in notes])
+        try:
+            with metrics.summarizer_duration.labels(provider).time():
+                if executor is not None:
+                    fresh = await executor.summarize_many(texts)
+                    updated = await executor.resummarize_many(items)
+                else:
+                    fresh = summarize_many(texts)
+                    updated = await resummarize_many_async(items)
+            metrics.summarizer_notes.labels(provider).inc(len(texts) + len(items))
+        except Exception as e:
+            error = e
+        finally:
+            renewals.cancel_scope.cancel()
+    if error is not None:
+        if executor is not None and executor.stopping:
+            # Shutting down: the notes did not fail, release_claims hands them back
+            print(f"Summarizer stopped during shutdown ({type(error).__name__}), releasing {len(notes)} note(s)")
+            return
+        # The stage itself failed (e.g. broken process pool): every pending note failed
+        fresh, updated = [error] * len(pending), [error] * len(edited)
+    results = dict(zip((n.id for n in pending), fresh))
+    hits = dict(zip((n.id for n in fresh_notes), cached))
+    # Edited notes: (summary, state) pairs, or the exception
+    resummarized = dict(zip((n.id for n in edited), updated))
+
+    for note in notes:
+        hit, state = hits.get(note.id), None
+        if note.id in resummarized:
+            result = resummarized[note.id]
+            if not isinstance(result, BaseException):
+                result, state = result
+        else:
+            result = hit if hit is not None else results[note.id]
+        if isinstance(result, BaseException):
+            # No waiting here: the retry is scheduled on the row and claimed once due
+            await _store_failure(session, note, worker_id, result)
+            metrics.note_claim_to_done.labels("failed").observe(time.perf_counter() - claimed_at)
+            continue
+        values = {"status": NoteStatus.done, "summary": str(result)}
+        if state is not None:
+            values["summary_state"] = state
+        elif hit is None and not isinstance(result, FallbackSummary):
+            # A fallback must not be served later as the LLM's summary of this text
+            await summary_cache.put(session, note.raw_text, result)
+        if await _release_note(session, note, worker_id, **values):
+            metrics.note_claim_to_done.labels("done").observe(time.perf_counter() - claimed_at)
+            print(f"✅ Successfully processed note {note.id}")
         else:
-            print(f"Note {note.id} failed permanently after {attempts} attempts: {e}")
+            print(f"Note {note.id} lease lost before completion, discarding result")
 
 
-async def worker_loop():
+async def process_note(
+    session: AsyncSession,
+    note: Note,
+    *,
+    worker_id: str | None = None,
+    executor: SummaryExecutor | None = None,
+):
+    """Summarize a single note and store the outcome.
+
+    Notes returned by `claim_notes` are already leased to `worker_id`; a note
+    that is still queued is leased here first, so this also works standalone.
+    """
+    worker_id = worker_id or default_worker_id()
+    if note.status == NoteStatus.queued:
+        if not await _lease_note(session, note, worker_id):
+            return
+    await process_batch(session, [note], worker_id=worker_id, executor=executor)
+
+
+async def _process_claimed(notes: list[Note], worker_id: str, executor: SummaryExecutor) -> None:
+    # Each in-flight batch gets its own session; AsyncSession is not concurrency-safe
+    async with SessionLocal() as session:
+        await process_batch(session, notes, worker_id=worker_id, executor=executor)
+
+
+async def _claim_loop(worker_id: str, executor: SummaryExecutor, listener: QueueListener) -> None:
+    scheduler = LaneScheduler()
+    last_reap = 0.0
     while True:
         try:
+            # Backpressure: only lease what we can start working on right away
+            await executor.wait_for_slot()
+            wanted = min(settings.WORKER_BATCH_SIZE, executor.free_slots)
             async with SessionLocal() as session:
-                result = await session.execute(
-                    select(Note)
-                    .where(Note.status == NoteStatus.queued)
-                    .order_by(Note.created_at.asc())
-                    .limit(5)
+                if time.monotonic() - last_reap >= settings.WORKER_REAP_INTERVAL_SECONDS:
+                    reaped = await reap_expired_leases(session)
+                    last_reap = time.monotonic()
+                    if reaped:
+                        print(f"Reaped {reaped} expired lease(s)")
+                    cache_stats = summary_cache.stats()
+                    if any(cache_stats.values()):
+                        print(f"Summary cache: {cache_stats}")
+
+                notes = await claim_notes(session, worker_id, wanted, scheduler)
+                # Retries are not announced; sleep no longer than the next one is due
+                retry_in = await next_retry_in(session) if len(notes) < wanted else None
+            if notes:
+                executor.spawn(_process_claimed(notes, worker_id, executor), slots=len(notes))
+            # A full batch means more work is likely waiting; only wait when drained.
+            # New notes wake us up; polling just covers missed notifications.
+            if len(notes) < wanted:
+                timeout = (
+                    settings.WORKER_SAFETY_POLL_SECONDS
+                    if listener.connected
+                    else settings.WORKER_POLL_INTERVAL_SECONDS
                 )
-                notes = result.scalars().all()
-                for note in notes:
-                    await process_note(session, note)
-            await asyncio.sleep(settings.WORKER_POLL_INTERVAL_SECONDS)
+                await listener.wait(timeout if retry_in is None else min(timeout, retry_in))
         except Exception as e:
             # Keep the worker alive on transient errors (e.g., tables not yet created)
             print(f"Worker loop error: {e}. Retrying shortly...")
             await asyncio.sleep(5)
 
 
-if __name__ == "__main__":
+async def _until_stopped(job: Awaitable, stop: asyncio.Event) -> bool:
+    """Run `job` to completion (True), or cancel it once `stop` is set (False)."""
+    task = asyncio.ensure_future(job)
+    stopped = asyncio.ensure_future(stop.wait())
+    try:
+        await asyncio.wait((task, stopped), return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        stopped.cancel()
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    if task.cancelled():
+        return False
+    task.result()
+    return True
+
+
+async def worker_loop(worker_id: str | None = None, stop: asyncio.Event | None = None):
+    """Claim and summarize notes until `stop` is set, then drain.
+
+    Draining stops claiming, waits up to WORKER_DRAIN_TIMEOUT_SECONDS for the
+    notes in flight to be stored, and hands whatever is left back to the queue.
+    """
+    worker_id = worker_id or default_worker_id()
+    stop = stop or asyncio.Event()
+    executor = SummaryExecutor(stop=stop)
+    await executor.start()
+    print(f"Summarizer provider: {executor.provider} (concurrency {executor.summarizer.concurrency})")
+    listener = QueueListener()
+    await listener.start()
+    metrics_server = None
+    if settings.METRICS_ENABLED and settings.WORKER_METRICS_PORT:
+        metrics_server = await serve_metrics(settings.WORKER_METRICS_PORT)
+        print(f"Worker metrics on :{settings.WORKER_METRICS_PORT}/metrics")
+    try:
+        await _until_stopped(_claim_loop(worker_id, executor, listener), stop)
+        if executor.in_flight:
+            print(f"Worker {worker_id} stopping, finishing {executor.in_flight} in-flight note(s)...")
+        if not await executor.drain(settings.WORKER_DRAIN_TIMEOUT_SECONDS):
+            print(f"Drain timed out after {settings.WORKER_DRAIN_TIMEOUT_SECONDS:g}s")
+    finally:
+        if metrics_server is not None:
+            metrics_server.close()
+        await listener.aclose()
+        await executor.aclose()
+        # Claims not finished (drain timeout, cancellation) go back to the queue now
+        # rather than when their leases expire
+        try:
+            async with SessionLocal() as session:
+                released = await release_claims(session, worker_id)
+            if released:
+                print(f"Released {released} unfinished claim(s)")
+        except Exception as e:
+            print(f"Could not release claims ({e}); they return when their leases expire")
+
+
+def _watch_stop_event(stop_event, stop: asyncio.Event) -> None:
+    # The supervisor's stop channel (a multiprocessing.Event): works where
+    # signals cannot be delivered to one process, e.g. on Windows
+    loop = asyncio.get_running_loop()
+
+    def watch() -> None:
+        stop_event.wait()
+        try:
+            loop.call_soon_threadsafe(stop.set)
+        except RuntimeError:
+            pass  # the loop is already closed
+
+    threading.Thread(target=watch, name="stop-watch", daemon=True).start()
+
+
+async def serve(worker_id: str, *, reclaim: str | None = None, stop_event=None) -> None:
+    """Worker process main: wait for the database, then run until stopped.
+
+    SIGTERM/SIGINT or `stop_event` (set by app.supervisor) stop the worker.
+    `reclaim` is the id of a dead worker whose notes are returned first.
+    """
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: Ctrl+C still interrupts asyncio.run, claims are released on the way out
+    if stop_event is not None:
+        _watch_stop_event(stop_event, stop)
+    if not await _until_stopped(wait_until_ready(settings.WORKER_DB_READY_TIMEOUT_SECONDS), stop):
+        return
+    if reclaim:
+        async with SessionLocal() as session:
+            returned = await reclaim_leases(session, reclaim)
+        if returned:
+            print(f"Returned {returned} note(s) leased to exited worker {reclaim}")
+    print(f"Worker {worker_id} started. Waiting for queued notes...")
+    await worker_loop(worker_id, stop)
+
+
+def run(worker_id: str | None = None, *, reclaim: str | None = None, stop_event=None) -> None:
+    """Run one worker in this process (its own event loop and "worker" DB pool)."""
     # Use a compatible event loop on Windows for psycopg async
     if sys.platform.startswith("win"):
         try:
             asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
         except Exception:
             pass
-    print("Worker started. Polling for queued notes...")
-    asyncio.run(worker_loop())
+    init_engine("worker")
+    asyncio.run(serve(worker_id or default_worker_id(), reclaim=reclaim, stop_event=stop_event))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,69 @@
+"""POST /notes/bulk throughput versus one POST /notes per note.
+
+Streams `--notes` NDJSON lines through the ASGI app in-process. Uses
+DATABASE_URL when set (e.g. a scratch Postgres database), otherwise a
+throwaway SQLite file.
+
+    DATABASE_URL=postgresql+psycopg://... python benchmarks/bench_bulk_ingest.py --notes 20000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+async def run(notes: int, singles: int) -> None:
+    from httpx import ASGITransport, AsyncClient
+
+    from app.core.database import Base, engine
+    from app.main import app
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    text = "Caller asked about the renewal quote and wants a follow-up on Friday. " * 10
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+        creds = {"email": f"bulk{time.time_ns()}@example.com", "password": "Secret123!", "role": "AGENT"}
+        r = await client.post("/auth/signup", json=creds)
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+        t0 = time.perf_counter()
+        for i in range(singles):
+            r = await client.post("/notes", json={"raw_text": f"{i} {text}"}, headers=headers)
+            assert r.status_code == 201, r.text
+        single_rate = singles / (time.perf_counter() - t0)
+
+        async def body():
+            for i in range(notes):
+                yield (json.dumps({"raw_text": f"{i} {text}"}) + "\n").encode()
+
+        t0 = time.perf_counter()
+        r = await client.post("/notes/bulk", content=body(), headers=headers)
+        elapsed = time.perf_counter() - t0
+        assert r.status_code == 200 and r.json()["created"] == notes, r.text[:500]
+
+    print(f"POST /notes      {singles:>7} notes {single_rate:>9.0f} notes/s")
+    print(f"POST /notes/bulk {notes:>7} notes {notes / elapsed:>9.0f} notes/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=20000)
+    parser.add_argument("--singles", type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before the app (and its engine) is imported
+        os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tmp}/bench.db")
+        asyncio.run(run(args.notes, args.singles))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""GET /notes latency while a storm of logins hashes passwords.
+
+Runs the ASGI app in-process on a throwaway SQLite database: one task keeps
+listing notes while `--logins` concurrent logins run. With hashing offloaded
+to the password thread pool the listing latency should barely move; with
+`--inline` (PASSWORD_HASH_THREADS=0) every bcrypt call blocks the event loop.
+
+    python benchmarks/bench_login_storm.py --logins 40
+    python benchmarks/bench_login_storm.py --logins 40 --inline
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+def _summary(timings: list[float]) -> str:
+    timings = sorted(timings)
+    p99 = timings[max(0, int(len(timings) * 0.99) - 1)]
+    return f"{len(timings):>6} {statistics.median(timings):>8.2f} {p99:>8.2f} {timings[-1]:>8.2f}"
+
+
+async def run(logins: int, seconds: float) -> None:
+    from httpx import ASGITransport, AsyncClient
+
+    from app.core.database import Base, engine
+    from app.main import app
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        creds = {"email": "storm@example.com", "password": "Secret123!"}
+        r = await client.post("/auth/signup", json={**creds, "role": "AGENT"})
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        for i in range(20):
+            await client.post("/notes", json={"raw_text": f"Follow up on renewal {i}."}, headers=headers)
+
+        async def sample(until: float) -> list[float]:
+            timings = []
+            while time.perf_counter() < until:
+                t0 = time.perf_counter()
+                resp = await client.get("/notes?limit=10", headers=headers)
+                timings.append((time.perf_counter() - t0) * 1000)
+                assert resp.status_code == 200, resp.text
+                await asyncio.sleep(0.005)
+            return timings
+
+        async def login() -> int:
+            return (await client.post("/auth/login", json=creds)).status_code
+
+        quiet = await sample(time.perf_counter() + seconds)
+
+        t0 = time.perf_counter()
+        storm = asyncio.gather(*(login() for _ in range(logins)))
+        during = await sample(time.perf_counter() + seconds)
+        codes = await storm
+        elapsed = time.perf_counter() - t0
+
+        print(f"{'phase':<14} {'reqs':>6} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        print(f"{'idle':<14} {_summary(quiet)}")
+        print(f"{'login storm':<14} {_summary(during)}")
+        print(f"{logins} logins in {elapsed:.2f}s, statuses: {sorted(set(codes))}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--inline", action="store_true", help="hash on the event loop (PASSWORD_HASH_THREADS=0)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before the app (and its engine) is imported
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tmp}/bench.db"
+        if args.inline:
+            os.environ["PASSWORD_HASH_THREADS"] = "0"
+        asyncio.run(run(args.logins, args.seconds))
+
+
+if __name__ == "__main__":
+    main()
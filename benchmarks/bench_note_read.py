@@ -0,0 +1,84 @@
+"""GET /notes/{id} latency versus the number of notes the caller owns.
+
+Seeds one agent per size into a throwaway SQLite database and times single-note
+reads through the ASGI app. With identity-only auth the latency should stay
+flat as the owner's note count grows.
+
+    python benchmarks/bench_note_read.py --sizes 10 1000 20000 --requests 300
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+async def run(sizes: list[int], requests: int) -> None:
+    from httpx import ASGITransport, AsyncClient
+    from sqlalchemy import insert
+
+    from app.core.database import Base, SessionLocal, engine
+    from app.core.security import create_access_token
+    from app.main import app
+    from app.models.note import Note, NoteStatus
+    from app.models.user import Role, User
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    body = "Customer called about the renewal and asked for a revised quote. " * 40
+    print(f"{'notes/owner':>12} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8}")
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        for size in sizes:
+            async with SessionLocal() as session:
+                user = User(email=f"bench{size}@example.com", hashed_password="x", role=Role.AGENT)
+                session.add(user)
+                await session.flush()
+                for start in range(0, size, 1000):
+                    await session.execute(
+                        insert(Note),
+                        [
+                            {"owner_id": user.id, "raw_text": body, "status": NoteStatus.done}
+                            for _ in range(min(1000, size - start))
+                        ],
+                    )
+                await session.commit()
+                note_id = (
+                    await session.execute(
+                        insert(Note).values(owner_id=user.id, raw_text=body).returning(Note.id)
+                    )
+                ).scalar_one()
+                await session.commit()
+
+            headers = {"Authorization": f"Bearer {create_access_token(str(user.id))}"}
+            timings = []
+            for _ in range(requests):
+                t0 = time.perf_counter()
+                resp = await client.get(f"/notes/{note_id}", headers=headers)
+                timings.append((time.perf_counter() - t0) * 1000)
+                assert resp.status_code == 200, resp.text
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            print(f"{size:>12} {statistics.median(timings):>8.2f} {p95:>8.2f} {statistics.fmean(timings):>8.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 20000])
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before the app (and its engine) is imported
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tmp}/bench.db"
+        asyncio.run(run(args.sizes, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Extractive summarizer engines: reference (pure Python) vs NumPy.
+
+Generates deterministic CRM-like notes, checks that both engines return
+identical summaries and reports the time per note, single and batched.
+With --alloc, also the peak memory allocated per note (tracemalloc).
+
+    python benchmarks/bench_summarizer.py --chars 10000 --notes 200 --alloc
+"""
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+VOCAB = (
+    "customer renewal pricing discount contract invoice meeting follow call email support ticket "
+    "escalation onboarding license seats quarter budget proposal approval legal procurement "
+    "deadline integration outage incident password certificate migration dashboard report "
+    "müşteri teklif fatura sözleşme toplantı indirim yenileme destek arıza İstanbul Ankara "
+    "Alice Bob Carol Acme Globex Initech Q3 Q4 2025 42 100"
+).split()
+FILLER = "the a and to of in for with on at is was it this that we they will also very".split()
+
+
+def make_note(rng: random.Random, chars: int) -> str:
+    sentences = []
+    size = 0
+    while size < chars:
+        words = [rng.choice(VOCAB if rng.random() < 0.55 else FILLER) for _ in range(rng.randint(4, 22))]
+        sentence = " ".join(words).capitalize() + rng.choice([".", ".", ".", "!", "?"])
+        if rng.random() < 0.1:
+            sentence += "\n"
+        sentences.append(sentence)
+        size += len(sentence) + 1
+    return " ".join(sentences)[:chars]
+
+
+def timed(fn, notes) -> float:
+    t0 = time.perf_counter()
+    fn(notes)
+    return (time.perf_counter() - t0) / len(notes) * 1000
+
+
+def peak_kib(fn, notes) -> float:
+    # Mean peak allocation of one note; `fn` is warmed up on the batch first
+    fn(notes)
+    peaks = []
+    tracemalloc.start()
+    try:
+        for note in notes[:20]:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            fn([note])
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+    return sum(peaks) / len(peaks) / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chars", type=int, default=10000)
+    parser.add_argument("--notes", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--alloc", action="store_true", help="also report peak KiB allocated per note")
+    args = parser.parse_args()
+
+    from app.services.extractive_np import summarize_extractive_np
+    from app.services.summarizer import Vocabulary, _limits, _summarize_extractive
+
+    rng = random.Random(args.seed)
+    notes = [make_note(rng, args.chars) for _ in range(args.notes)]
+    limits = _limits()
+
+    reference = [_summarize_extractive(n, limits=limits) for n in notes]
+    assert [summarize_extractive_np(n, limits=limits) for n in notes] == reference, "engines disagree"
+
+    def python_single(batch):
+        for note in batch:
+            _summarize_extractive(note, limits=limits)
+
+    def python_batch(batch):
+        vocab = Vocabulary()
+        for note in batch:
+            _summarize_extractive(note, limits=limits, vocab=vocab)
+
+    def numpy_single(batch):
+        for note in batch:
+            summarize_extractive_np(note, limits=limits)
+
+    def numpy_batch(batch):
+        vocab = Vocabulary()
+        for note in batch:
+            summarize_extractive_np(note, limits=limits, vocab=vocab)
+
+    engines = (
+        ("python (per note)", python_single),
+        ("python (shared vocab)", python_batch),
+        ("numpy (per note)", numpy_single),
+        ("numpy (shared vocab)", numpy_batch),
+    )
+    base = timed(python_single, notes)
+    print(f"{args.notes} notes x {args.chars} chars, outputs identical")
+    print(f"{'engine':<22} {'ms/note':>8} {'speedup':>8}" + (f" {'peak KiB':>9}" if args.alloc else ""))
+    for name, fn in engines:
+        ms = base if fn is python_single else timed(fn, notes)
+        line = f"{name:<22} {ms:>8.3f} {base / ms:>7.1f}x"
+        if args.alloc:
+            line += f" {peak_kib(fn, notes):>9.1f}"
+        print(line)
+
+if __name__ == "__main__":
+    main()
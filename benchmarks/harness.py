@@ -0,0 +1,412 @@
+"""End-to-end benchmark suite for the API and the worker, with baseline comparison.
+
+Seeds `--users` agents with `--notes` realistic notes each, then drives the ASGI
+app in-process with `--concurrency` clients per scenario and reports p50/p95/p99
+latency and throughput:
+
+    create         POST /notes
+    list           GET /notes (first page)
+    list_status    GET /notes?status=done
+    list_search    GET /notes?q=<word>
+    list_offset    GET /notes?offset=<deep>  (within the caller's notes)
+    list_cursor    GET /notes?cursor=...     (walks pages via X-Next-Cursor)
+    get            GET /notes/{id}
+    login          POST /auth/login
+    worker         queued -> done through the real worker loop (extractive)
+    worker_mixed   the same backlog in the bulk lane while another agent queues an
+                   interactive note every 100 ms (reported as worker_interactive)
+
+Uses DATABASE_URL when set (e.g. a scratch Postgres database, which is NOT
+emptied), otherwise a throwaway SQLite file. `--save` writes the report as JSON;
+`--compare` checks it against a saved report and exits with status 1 when a
+scenario's p95 grew or its throughput fell by more than `--threshold`.
+
+    python benchmarks/harness.py --save benchmarks/baseline.json
+    python benchmarks/harness.py --compare benchmarks/baseline.json --threshold 0.2
+    DATABASE_URL=postgresql+psycopg://... python benchmarks/harness.py --only list_search worker
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, UTC
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+PASSWORD = "Secret123!"
+SCENARIOS = (
+    "create",
+    "list",
+    "list_status",
+    "list_search",
+    "list_offset",
+    "list_cursor",
+    "get",
+    "login",
+    "worker",
+    "worker_mixed",
+)
+
+VOCAB = (
+    "customer renewal pricing discount contract invoice meeting follow call email support ticket "
+    "escalation onboarding license seats quarter budget proposal approval legal procurement "
+    "deadline integration outage incident password certificate migration dashboard report "
+    "Alice Bob Carol Acme Globex Initech Q3 Q4 2025"
+).split()
+FILLER = "the a and to of in for with on at is was it this that we they will also very".split()
+SEARCH_TERMS = ("renewal", "invoice", "outage", "procurement", "Acme", "migration")
+
+
+def make_note(rng: random.Random, chars: int) -> str:
+    sentences = []
+    size = 0
+    while size < chars:
+        words = [rng.choice(VOCAB if rng.random() < 0.5 else FILLER) for _ in range(rng.randint(5, 20))]
+        sentence = " ".join(words).capitalize() + rng.choice([".", ".", "!", "?"])
+        sentences.append(sentence)
+        size += len(sentence) + 1
+    return " ".join(sentences)
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values) + 0.5 - 1e-9))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies_ms: list[float], elapsed: float, errors: int, unit: str = "req") -> dict:
+    values = sorted(latencies_ms)
+    return {
+        "count": len(values),
+        "errors": errors,
+        "throughput": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "unit": f"{unit}/s",
+        "p50_ms": round(percentile(values, 50), 3),
+        "p95_ms": round(percentile(values, 95), 3),
+        "p99_ms": round(percentile(values, 99), 3),
+        "mean_ms": round(statistics.fmean(values), 3) if values else 0.0,
+    }
+
+
+async def seed(users: int, notes_per_user: int, note_chars: int, rng: random.Random) -> list[dict]:
+    """Insert agents and their notes (mostly done, some queued/failed) with Core bulk inserts."""
+    from sqlalchemy import insert
+
+    from app.core.database import SessionLocal
+    from app.core.security import hash_password
+    from app.models.note import Note, NoteStatus
+    from app.models.user import Role, User
+
+    hashed = hash_password(PASSWORD)  # one bcrypt call; every agent shares the password
+    run = time.time_ns()
+    now = datetime.now(UTC)
+    statuses = [NoteStatus.done] * 8 + [NoteStatus.queued, NoteStatus.failed]
+    seeded = []
+    async with SessionLocal() as session:
+        for u in range(users):
+            email = f"bench{run}_{u}@example.com"
+            user_id = (
+                await session.execute(
+                    insert(User).values(email=email, hashed_password=hashed, role=Role.AGENT).returning(User.id)
+                )
+            ).scalar_one()
+            rows = []
+            for i in range(notes_per_user):
+                status = rng.choice(statuses)
+                text = make_note(rng, note_chars)
+                rows.append(
+                    {
+                        "owner_id": user_id,
+                        "raw_text": text,
+                        "summary": text[:200] if status == NoteStatus.done else None,
+                        # Already-processed history: keep it out of the worker's queue
+                        "status": NoteStatus.failed if status == NoteStatus.queued else status,
+                        "created_at": now - timedelta(seconds=notes_per_user - i),
+                    }
+                )
+            for start in range(0, len(rows), 1000):
+                await session.execute(insert(Note), rows[start : start + 1000])
+            await session.commit()
+            seeded.append({"id": user_id, "email": email})
+    return seeded
+
+
+async def drive(requests: int, concurrency: int, call) -> dict:
+    """Run `call(i)` `requests` times over `concurrency` tasks; `call` returns True on success."""
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def client() -> None:
+        nonlocal errors
+        for i in counter:
+            t0 = time.perf_counter()
+            ok = await call(i)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            errors += not ok
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - t0, errors)
+
+
+async def bench_worker(
+    owner_id: int, count: int, note_chars: int, rng: random.Random, interactive_owner: int | None = None
+) -> dict[str, dict]:
+    """Queue `count` fresh notes, run the worker loop until they are done, report queue-to-done.
+
+    With `interactive_owner` the notes go to the bulk lane, and that owner keeps
+    adding one interactive note every 100 ms while the backlog drains; their
+    latency is reported as `worker_interactive`.
+    """
+    from sqlalchemy import func, insert, select
+
+    from app.core.database import SessionLocal
+    from app.models.note import Note, NotePriority, NoteStatus
+    from app.services.notify import notify_queued
+    from app.services.scheduling import next_fair_rank
+    from app.worker import worker_loop
+
+    lane = NotePriority.bulk if interactive_owner else NotePriority.interactive
+    async with SessionLocal() as session:
+        rank = await next_fair_rank(session, owner_id, lane)
+        rows = [
+            {"owner_id": owner_id, "raw_text": f"{i}. {make_note(rng, note_chars)}", "priority": lane, "fair_rank": rank + i}
+            for i in range(count)
+        ]
+        ids = (await session.scalars(insert(Note).returning(Note.id), rows)).all()
+        await session.commit()
+
+    interactive_ids: list[int] = []
+
+    async def trickle() -> None:
+        while True:
+            await asyncio.sleep(0.1)
+            async with SessionLocal() as session:
+                note = Note(
+                    owner_id=interactive_owner,
+                    raw_text=make_note(rng, note_chars),
+                    fair_rank=await next_fair_rank(session, interactive_owner, NotePriority.interactive),
+                )
+                session.add(note)
+                await notify_queued(session)
+                await session.commit()
+                interactive_ids.append(note.id)
+
+    pending = select(func.count()).where(Note.id.in_(ids), Note.status.in_([NoteStatus.queued, NoteStatus.processing]))
+    t0 = time.perf_counter()
+    task = asyncio.create_task(worker_loop(f"bench-{os.getpid()}"))
+    producer = asyncio.create_task(trickle()) if interactive_owner else None
+    try:
+        while True:
+            async with SessionLocal() as session:
+                if not await session.scalar(pending):
+                    break
+            if task.done():
+                task.result()
+            await asyncio.sleep(0.05)
+        elapsed = time.perf_counter() - t0
+        if producer:
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+            # Let the last interactive notes finish
+            while interactive_ids:
+                async with SessionLocal() as session:
+                    if not await session.scalar(
+                        select(func.count()).where(Note.id.in_(interactive_ids), Note.status != NoteStatus.done)
+                    ):
+                        break
+                await asyncio.sleep(0.05)
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    async def report(note_ids: list[int], elapsed: float) -> dict:
+        async with SessionLocal() as session:
+            rows = (
+                await session.execute(
+                    select(Note.status, Note.created_at, Note.updated_at).where(Note.id.in_(note_ids))
+                )
+            ).all()
+        latencies = [(done - created).total_seconds() * 1000 for status, created, done in rows if status == NoteStatus.done]
+        return summarize(latencies, elapsed, len(rows) - len(latencies), unit="notes")
+
+    if not interactive_owner:
+        return {"worker": await report(ids, elapsed)}
+    return {
+        "worker_mixed": await report(ids, elapsed),
+        "worker_interactive": await report(interactive_ids, elapsed),
+    }
+
+
+async def run(args) -> dict:
+    from httpx import ASGITransport, AsyncClient
+
+    from app.core.config import settings
+    from app.core.database import Base, engine
+    from app.core.security import create_access_token
+    from app.main import app
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    rng = random.Random(args.seed)
+    t0 = time.perf_counter()
+    users = await seed(args.users, args.notes, args.note_chars, rng)
+    print(f"Seeded {args.users} users x {args.notes} notes in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+
+    tokens = [{"Authorization": f"Bearer {create_access_token(str(u['id']))}"} for u in users]
+    only = set(args.only or SCENARIOS)
+    results: dict[str, dict] = {}
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+
+        def user(i: int) -> dict:
+            return tokens[i % len(tokens)]
+
+        async def get_ok(url: str, headers: dict) -> bool:
+            return (await client.get(url, headers=headers)).status_code == 200
+
+        created: list[tuple[int, dict]] = []  # (note id, owner's headers)
+
+        async def create(i: int) -> bool:
+            r = await client.post("/notes", json={"raw_text": make_note(rng, args.note_chars)}, headers=user(i))
+            if r.status_code == 201:
+                created.append((r.json()["id"], user(i)))
+            return r.status_code == 201
+
+        cursors: dict[int, str | None] = {}
+
+        async def list_cursor(i: int) -> bool:
+            key = i % len(tokens)
+            url = "/notes?limit=20" + (f"&cursor={cursors[key]}" if cursors.get(key) else "")
+            r = await client.get(url, headers=user(i))
+            cursors[key] = r.headers.get("x-next-cursor")
+            return r.status_code == 200
+
+        async def get_one(i: int) -> bool:
+            note_id, headers = created[i % len(created)]
+            return await get_ok(f"/notes/{note_id}", headers)
+
+        async def login(i: int) -> bool:
+            body = {"email": users[i % len(users)]["email"], "password": PASSWORD}
+            return (await client.post("/auth/login", json=body)).status_code == 200
+
+        deep = max(0, args.notes - 40)
+        http = {
+            "create": create,
+            "list": lambda i: get_ok("/notes?limit=20", user(i)),
+            "list_status": lambda i: get_ok("/notes?limit=20&status=done", user(i)),
+            "list_search": lambda i: get_ok(f"/notes?limit=20&q={SEARCH_TERMS[i % len(SEARCH_TERMS)]}", user(i)),
+            "list_offset": lambda i: get_ok(f"/notes?limit=20&offset={deep}", user(i)),
+            "list_cursor": list_cursor,
+            "get": get_one,
+            "login": login,
+        }
+        for name, call in http.items():
+            if name not in only:
+                continue
+            if name == "get" and not created:
+                await drive(len(tokens), 1, create)
+            count = args.logins if name == "login" else args.requests
+            results[name] = await drive(count, args.concurrency, call)
+            print(f"  {name} done", file=sys.stderr)
+
+    if "worker" in only:
+        results.update(await bench_worker(users[0]["id"], args.worker_notes, args.note_chars, rng))
+    if "worker_mixed" in only:
+        results.update(
+            await bench_worker(users[0]["id"], args.worker_notes, args.note_chars, rng, interactive_owner=users[-1]["id"])
+        )
+
+    return {
+        "meta": {
+            "database": engine.dialect.name,
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+            "users": args.users,
+            "notes_per_user": args.notes,
+            "concurrency": args.concurrency,
+            "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+
+
+def print_report(report: dict) -> None:
+    meta = report["meta"]
+    print(f"database={meta['database']} users={meta['users']} notes/user={meta['notes_per_user']} "
+          f"concurrency={meta['concurrency']}")
+    print(f"{'scenario':<18} {'count':>7} {'err':>5} {'throughput':>14} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, r in report["results"].items():
+        rate = f"{r['throughput']:.1f} {r['unit']}"
+        print(f"{name:<18} {r['count']:>7} {r['errors']:>5} {rate:>14} "
+              f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f}")
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list[str]:
+    """Scenarios whose p95 rose, or throughput fell, by more than `threshold` (a fraction)."""
+    regressions = []
+    print(f"\n{'vs baseline':<18} {'p95':>10} {'throughput':>12}")
+    for name, r in report["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        p95 = r["p95_ms"] / base["p95_ms"] - 1 if base["p95_ms"] else 0.0
+        rate = r["throughput"] / base["throughput"] - 1 if base["throughput"] else 0.0
+        flag = ""
+        if p95 > threshold or rate < -threshold or r["errors"] > base["errors"]:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<18} {p95:>+10.1%} {rate:>+12.1%}{flag}")
+    if baseline.get("meta", {}).get("database") != report["meta"]["database"]:
+        print("warning: baseline was recorded on a different database", file=sys.stderr)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--notes", type=int, default=2000, help="seeded notes per user")
+    parser.add_argument("--note-chars", type=int, default=1200)
+    parser.add_argument("--requests", type=int, default=500, help="requests per HTTP scenario")
+    parser.add_argument("--logins", type=int, default=40, help="requests for the login scenario (bcrypt-bound)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--worker-notes", type=int, default=500)
+    parser.add_argument("--only", nargs="+", choices=SCENARIOS)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", type=Path, help="write the report as JSON")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative regression (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before the app (and its engine) is imported
+        os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tmp}/bench.db")
+        os.environ.setdefault("METRICS_ENABLED", "false")
+        report = asyncio.run(run(args))
+
+    print_report(report)
+    if args.save:
+        args.save.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nSaved {args.save}")
+    if args.compare:
+        regressions = compare(report, json.loads(args.compare.read_text()), args.threshold)
+        if regressions:
+            print(f"\nRegressed beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
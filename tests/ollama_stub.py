@@ -0,0 +1,50 @@
+"""Minimal stand-in for Ollama's /api/generate, for tests and local runs.
+
+Streams a canned reply word by word as NDJSON (or returns it whole when
+`stream` is false). Run standalone with:
+
+    python tests/ollama_stub.py --port 11435
+"""
+import json
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+REPLY = "Alice confirmed the Q3 renewal and asked for an updated quote by Friday. " * 20
+
+app = FastAPI()
+app.state.requests = []
+app.state.fail = False
+app.state.malformed = False
+
+
+@app.post("/api/generate")
+async def generate(request: Request):
+    payload = await request.json()
+    app.state.requests.append(payload)
+    if app.state.fail:
+        return JSONResponse({"error": "model not loaded"}, status_code=500)
+    if app.state.malformed:
+        return StreamingResponse(iter(["<html>proxy error</html>\n"]), media_type="text/html")
+
+    words = REPLY.split(" ")
+    if not payload.get("stream", True):
+        return {"model": payload.get("model"), "response": REPLY, "done": True}
+
+    async def chunks():
+        for i, word in enumerate(words):
+            piece = word if i == 0 else " " + word
+            yield json.dumps({"response": piece, "done": False}) + "\n"
+        yield json.dumps({"response": "", "done": True}) + "\n"
+
+    return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import uvicorn
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=11435)
+    uvicorn.run(app, host="127.0.0.1", port=parser.parse_args().port)
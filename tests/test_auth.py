@@ -0,0 +1,84 @@
+import uuid
+import pytest
+from httpx import AsyncClient, ASGITransport
+from passlib.context import CryptContext
+from sqlalchemy import select, text, update
+from app.main import app
+from app.core.config import settings
+from app.core.database import engine, Base, SessionLocal
+from app.core.deps import get_current_user, invalidate_user
+from app.core.security import create_access_token, password_hash_stats
+from app.models.user import User, Role
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.mark.anyio
+async def test_identity_is_cached_until_the_user_changes():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with SessionLocal() as session:
+        user = User(email=f"auth_{uuid.uuid4().hex[:8]}@example.com", hashed_password="x", role=Role.AGENT)
+        session.add(user)
+        await session.commit()
+        token = create_access_token(str(user.id))
+
+        first = await get_current_user(token, session)
+        assert (first.id, first.role) == (user.id, Role.AGENT)
+
+        # Served from the cache until a change commits
+        await session.execute(update(User).where(User.id == user.id).values(role=Role.ADMIN))
+        assert (await get_current_user(token, session)).role == Role.AGENT
+        await session.commit()
+        assert (await get_current_user(token, session)).role == Role.ADMIN
+
+        user.role = Role.AGENT
+        await session.commit()
+        assert (await get_current_user(token, session)).role == Role.AGENT
+
+        # Changes outside the ORM (other processes, raw SQL) need an explicit drop
+        await session.execute(text("UPDATE users SET role = 'ADMIN' WHERE id = :id"), {"id": user.id})
+        await session.commit()
+        assert (await get_current_user(token, session)).role == Role.AGENT
+        invalidate_user(user.id)
+        assert (await get_current_user(token, session)).role == Role.ADMIN
+
+
+@pytest.mark.anyio
+async def test_login_rehashes_password_with_outdated_cost():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    email = f"rehash_{uuid.uuid4().hex[:8]}@example.com"
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("Secret123!")
+    async with SessionLocal() as session:
+        session.add(User(email=email, hashed_password=old_hash, role=Role.AGENT))
+        await session.commit()
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        r = await ac.post("/auth/login", json={"email": email, "password": "Secret123!"})
+        assert r.status_code == 200
+        r = await ac.post("/auth/login", json={"email": email, "password": "wrong-password"})
+        assert r.status_code == 401
+
+    async with SessionLocal() as session:
+        stored = (await session.execute(select(User.hashed_password).where(User.email == email))).scalar_one()
+    assert stored != old_hash
+    assert stored.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+    assert password_hash_stats()["rehashed"] >= 1
+
+
+@pytest.mark.anyio
+async def test_failed_password_check_is_not_counted_as_completed(monkeypatch):
+    from app.core.security import verify_and_update_password
+
+    monkeypatch.setattr(settings, "PASSWORD_HASH_THREADS", 1)
+    before = password_hash_stats()
+    with pytest.raises(ValueError):
+        await verify_and_update_password("Secret123!", "not-a-hash")
+    after = password_hash_stats()
+    assert after["failed"] == before["failed"] + 1
+    assert after["completed"] == before["completed"] and after["pending"] == before["pending"]
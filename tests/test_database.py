@@ -0,0 +1,50 @@
+import pytest
+from app.core import database
+from app.core.config import settings
+from app.services.notify import listen_dsn
+
+
+def test_pool_profiles_per_role():
+    web = database.engine_options("web", "postgresql+psycopg://u:p@db/app")
+    worker = database.engine_options("worker", "postgresql+psycopg://u:p@db/app")
+    assert (web["pool_size"], web["max_overflow"]) == (settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
+    assert (worker["pool_size"], worker["max_overflow"]) == (
+        settings.WORKER_DB_POOL_SIZE,
+        settings.WORKER_DB_MAX_OVERFLOW,
+    )
+    assert web["poolclass"] is database.TimedQueuePool and web["pool_pre_ping"] is settings.DB_POOL_PRE_PING
+    assert "connect_args" not in web
+    with pytest.raises(ValueError):
+        database.engine_options("scheduler", "postgresql+psycopg://u:p@db/app")
+
+
+def test_pgbouncer_mode_disables_server_side_prepares(monkeypatch):
+    cached = database.engine_options("web", "postgresql+asyncpg://u:p@db/app")["connect_args"]
+    assert cached["statement_cache_size"] == settings.DB_STATEMENT_CACHE_SIZE
+
+    monkeypatch.setattr(settings, "DB_PGBOUNCER", True)
+    asyncpg_args = database.engine_options("web", "postgresql+asyncpg://u:p@bouncer/app")["connect_args"]
+    assert asyncpg_args["statement_cache_size"] == asyncpg_args["prepared_statement_cache_size"] == 0
+    assert asyncpg_args["prepared_statement_name_func"]() != asyncpg_args["prepared_statement_name_func"]()
+    psycopg_args = database.engine_options("web", "postgresql+psycopg://u:p@bouncer/app")["connect_args"]
+    assert psycopg_args == {"prepare_threshold": None}
+
+    # LISTEN cannot go through a transaction pooler
+    if database.engine.dialect.name == "postgresql":
+        assert listen_dsn() is None
+        monkeypatch.setattr(settings, "DATABASE_LISTEN_URL", "postgresql+psycopg://u:p@db:5432/app")
+        assert listen_dsn() == "postgresql://u:p@db:5432/app"
+
+
+def test_listen_dsn_keeps_only_libpq_parameters(monkeypatch):
+    if database.engine.dialect.name != "postgresql":
+        pytest.skip("LISTEN is only used on Postgres")
+    monkeypatch.setattr(
+        settings,
+        "DATABASE_LISTEN_URL",
+        "postgresql+asyncpg://u:p@db/app?ssl=require&prepared_statement_cache_size=0"
+        "&statement_cache_size=0&application_name=crm",
+    )
+    assert listen_dsn() == "postgresql://u:p@db/app?application_name=crm&sslmode=require"
+    monkeypatch.setattr(settings, "DATABASE_LISTEN_URL", "postgresql+asyncpg://u:p@db/app?ssl=true&sslmode=verify-full")
+    assert listen_dsn() == "postgresql://u:p@db/app?sslmode=verify-full"
@@ -0,0 +1,65 @@
+import asyncio
+import uuid
+import pytest
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.core import metrics
+from app.core.database import engine, Base
+from app.services.telemetry import serve_metrics
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def _sample(text: str, prefix: str) -> float:
+    return sum(float(line.rsplit(" ", 1)[1]) for line in text.splitlines() if line.startswith(prefix))
+
+
+@pytest.mark.anyio
+async def test_metrics_endpoint_reports_routes_queries_and_queue_depth():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        email = f"metrics_{uuid.uuid4().hex[:8]}@example.com"
+        r = await ac.post("/auth/signup", json={"email": email, "password": "Secret123!", "role": "AGENT"})
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        note = (await ac.post("/notes", headers=headers, json={"raw_text": "Metrics test note."})).json()
+        await ac.get(f"/notes/{note['id']}", headers=headers)
+
+        r = await ac.get("/metrics")
+        assert r.status_code == 200 and r.headers["content-type"].startswith("text/plain")
+        text = r.text
+
+    # Route templates, not raw paths, keep label cardinality bounded
+    assert _sample(text, 'http_request_duration_seconds_count{method="GET",route="/notes/{note_id}",status="200"}') >= 1
+    assert f"/notes/{note['id']}" not in text
+    assert _sample(text, 'db_query_duration_seconds_count{operation="insert"}') >= 1
+    assert _sample(text, 'notes{status="queued"}') >= 1
+    assert 'notes{status="failed"}' in text
+
+    metrics.set_enabled(False)
+    try:
+        before = metrics.http_request_duration.labels("GET", "/health", "200").counts[:]
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            await ac.get("/health")
+        assert metrics.http_request_duration.labels("GET", "/health", "200").counts == before
+    finally:
+        metrics.set_enabled(True)
+
+
+@pytest.mark.anyio
+async def test_worker_exporter_serves_metrics():
+    server = await serve_metrics(0, host="127.0.0.1")
+    port = server.sockets[0].getsockname()[1]
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /metrics HTTP/1.1\r\nHost: worker\r\n\r\n")
+        response = (await reader.read()).decode()
+        writer.close()
+    finally:
+        server.close()
+    assert response.startswith("HTTP/1.1 200 OK")
+    assert "# TYPE note_claim_to_done_seconds histogram" in response
+    assert "# TYPE worker_in_flight_notes gauge" in response
@@ -0,0 +1,377 @@
+import asyncio
+import csv
+import io
+import json
+import uuid
+from datetime import UTC, datetime, timedelta
+import pytest
+from sqlalchemy import inspect, select, update
+from sqlalchemy.orm import undefer
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.core.database import engine, Base, SessionLocal
+from app.models.note import Note
+from app.services.events import broker
+from app.services.ingest import iter_items
+from app.worker import process_note
+
+
+async def _agent(ac: AsyncClient) -> dict:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    email = f"notes_{uuid.uuid4().hex[:8]}@example.com"
+    r = await ac.post("/auth/signup", json={"email": email, "password": "Secret123!", "role": "AGENT"})
+    assert r.status_code == 200
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+@pytest.mark.anyio
+async def test_cursor_pagination_walks_all_notes_newest_first():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        headers = await _agent(ac)
+        created = []
+        for i in range(5):
+            r = await ac.post("/notes", headers=headers, json={"raw_text": f"Paging note number {i}."})
+            created.append(r.json()["id"])
+
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            r = await ac.get("/notes", headers=headers, params=params)
+            assert r.status_code == 200
+            assert "X-Total-Count" not in r.headers
+            seen += [n["id"] for n in r.json()]
+            cursor = r.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert seen == list(reversed(created))
+
+        r = await ac.get("/notes", headers=headers, params={"limit": 2, "offset": 2})
+        assert [n["id"] for n in r.json()] == seen[2:4]
+
+
+@pytest.mark.anyio
+async def test_count_modes_and_bad_cursor():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        headers = await _agent(ac)
+        for i in range(3):
+            await ac.post("/notes", headers=headers, json={"raw_text": f"Counted note {i}."})
+
+        r = await ac.get("/notes", headers=headers, params={"count": "exact"})
+        assert r.headers["X-Total-Count"] == "3"
+
+        r = await ac.get("/notes", headers=headers, params={"count": "estimate"})
+        assert r.headers["X-Total-Count-Estimated"] == "true"
+        assert int(r.headers["X-Total-Count"]) >= 0
+
+        r = await ac.get("/notes", headers=headers, params={"cursor": "not-a-cursor"})
+        assert r.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_search_matches_words_and_ranks():
+    tag = uuid.uuid4().hex[:8]
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        headers = await _agent(ac)
+        texts = [
+            f"Renewal call with Acme{tag}. Acme{tag} wants Acme{tag} pricing.",
+            f"Unrelated onboarding note for Globex{tag}.",
+            f"Short mention of Acme{tag} in passing, mostly about the weather and travel plans.",
+        ]
+        ids = [(await ac.post("/notes", headers=headers, json={"raw_text": t})).json()["id"] for t in texts]
+
+        r = await ac.get("/notes", headers=headers, params={"q": f"acme{tag}", "count": "exact"})
+        assert r.status_code == 200
+        assert [n["id"] for n in r.json()] == [ids[0], ids[2]]
+        assert r.headers["X-Total-Count"] == "2"
+        assert "X-Next-Cursor" not in r.headers
+
+        # Prefix match, several words must all match, punctuation is ignored
+        r = await ac.get("/notes", headers=headers, params={"q": f"Globex{tag}, onboard!"})
+        assert [n["id"] for n in r.json()] == [ids[1]]
+        r = await ac.get("/notes", headers=headers, params={"q": '") OR *'})
+        assert r.status_code == 200 and r.json() == []
+
+
+@pytest.mark.anyio
+async def test_bulk_ingest_ndjson_and_json_array():
+    tag = uuid.uuid4().hex[:8]
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        headers = await _agent(ac)
+        lines = [
+            json.dumps({"raw_text": f"First bulk{tag} note."}),
+            "{not json",
+            json.dumps({"raw_text": "   "}),
+            "",
+            json.dumps({"text": "wrong field"}),
+            json.dumps({"raw_text": f"Second bulk{tag} note, çağrı merkezi."}),
+        ]
+        r = await ac.post("/notes/bulk", headers=headers, content="\n".join(lines).encode())
+        assert r.status_code == 200
+        body = r.json()
+        assert body["created"] == 2
+        assert [i is not None for i in body["ids"]] == [True, False, False, False, True]
+        assert [e["index"] for e in body["errors"]] == [1, 2, 3]
+
+        r = await ac.get(f"/notes/{body['ids'][4]}", headers=headers)
+        assert r.json()["raw_text"].endswith("çağrı merkezi.") and r.json()["status"] == "queued"
+
+        items = [{"raw_text": f"Array bulk{tag} item {i}."} for i in range(5)]
+        r = await ac.post("/notes/bulk", headers=headers, content=json.dumps(items))
+        assert r.json()["created"] == 5 and r.json()["errors"] == []
+
+        # A broken array stops the upload; earlier items are kept
+        r = await ac.post("/notes/bulk", headers=headers, content=json.dumps(items[:2])[:-1] + ' {"raw_text": "x"}]')
+        assert r.json()["created"] == 2
+        assert r.json()["errors"][0]["index"] == 2
+
+        r = await ac.post("/notes/bulk", headers=headers, content=b"  ")
+        assert r.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_bulk_ingest_publishes_note_events(monkeypatch):
+    import app.routers.notes as notes_router
+
+    published, original = [], notes_router.publish_note_events
+
+    async def publish(session, events):
+        published.extend(events)
+        await original(session, events)
+
+    monkeypatch.setattr(notes_router, "publish_note_events", publish)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        headers = await _agent(ac)
+        items = [{"raw_text": f"Evented bulk item {i}."} for i in range(3)]
+        ids = (await ac.post("/notes/bulk", headers=headers, content=json.dumps(items))).json()["ids"]
+    assert [e["id"] for e in published] == ids
+    assert all(e["status"] == "queued" and e["attempts"] == 0 and e["summary"] is None for e in published)
+
+
+@pytest.mark.anyio
+async def test_bulk_parser_handles_arbitrary_chunk_boundaries():
+    items = [{"raw_text": f"Müşteri {i} ☃ \"quoted\" [x], {{y}}"} for i in range(3)] + [7, [1, 2]]
+    for body in (json.dumps(items), "\n".join(json.dumps(i) for i in items) + "\n"):
+        data = body.encode()
+
+        async def one_byte_chunks(data: bytes):
+            for i in range(len(data)):
+                yield data[i:i + 1]
+
+        assert [item async for item in iter_items(one_byte_chunks(data), max_item_bytes=1024)] == items
+
+
+@pytest.mark.anyio
+async def test_bulk_parser_skips_oversized_items_counting_utf8_bytes():
+    from app.services.ingest import ItemError
+
+    # 40 characters, but 80 bytes: over a 64-byte limit
+    wide = {"raw_text": "ş" * 40}
+    # Brackets, commas and escaped quotes inside strings must not end the skipped item
+    nested = {"raw_text": 'x ], {"y": [1, 2]} \\"' * 10, "tags": [[1], {"a": "]"}]}
+    items = [{"raw_text": "small"}, wide, nested, {"raw_text": "after"}]
+    for body in (json.dumps(items, ensure_ascii=False), "\n".join(json.dumps(i, ensure_ascii=False) for i in items)):
+        data = body.encode()
+        for size in (1, 7, len(data)):
+
+            async def chunks(data: bytes, size: int):
+                for i in range(0, len(data), size):
+                    yield data[i:i + size]
+
+            parsed = [item async for item in iter_items(chunks(data, size), max_item_bytes=64)]
+            assert parsed[0] == items[0] and parsed[3] == items[3]
+            assert all(isinstance(item, ItemError) for item in parsed[1:3])
+
+
+@pytest.mark.anyio
+async def test_export_streams_ndjson_and_csv_with_filters():
+    tag = uuid.uuid4().hex[:8]
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        headers = await _agent(ac)
+        other = await _agent(ac)
+        await ac.post("/notes", headers=other, json={"raw_text": f"Someone else's export{tag} note."})
+        texts = [f"Export{tag} note {i}, with \"quotes\" and\nnewlines." for i in range(3)]
+        ids = [(await ac.post("/notes", headers=headers, json={"raw_text": t})).json()["id"] for t in texts]
+
+        r = await ac.get("/notes/export", headers=headers)
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in r.text.splitlines()]
+        assert [row["id"] for row in rows] == ids
+        assert rows[0]["raw_text"] == texts[0] and rows[0]["status"] == "queued"
+
+        r = await ac.get("/notes/export", headers=headers, params={"format": "csv", "q": f"export{tag}"})
+        rows = list(csv.DictReader(io.StringIO(r.text)))
+        assert [int(row["id"]) for row in rows] == ids
+        assert rows[2]["raw_text"] == texts[2]
+
+        r = await ac.get("/notes/export", headers=headers, params={"status": "done"})
+        assert r.text == ""
+
+
+async def _watch(path: str, headers: dict, received: list, stop: asyncio.Event) -> None:
+    # Drive the ASGI app directly: the httpx test transport buffers whole responses
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await stop.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body", b"").startswith(b"event: note"):
+            received.append(json.loads(message["body"].decode().split("data: ", 1)[1]))
+
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": query.encode(), "root_path": "",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        "server": ("test", 80), "client": ("test", 1),
+    }
+    await app(scope, receive, send)
+
+
+@pytest.mark.anyio
+async def test_events_stream_status_transitions(anyio_backend, monkeypatch):
+    from app.core.config import settings
+    from app.worker import claim_notes, process_batch
+
+    if anyio_backend != "asyncio":
+        pytest.skip("the event broker runs on asyncio")
+    # Without LISTEN, subscribers are fed by polling the database; changes made
+    # here are only seen that way, exactly like a worker process's
+    monkeypatch.setattr(settings, "SSE_POLL_SECONDS", 0.05)
+
+    async def until(check):
+        for _ in range(500):
+            if check():
+                return
+            await asyncio.sleep(0.01)
+        raise AssertionError("event not received")
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        headers = await _agent(ac)
+        stop = asyncio.Event()
+        everything, one = [], []
+        watchers = [
+            asyncio.create_task(_watch("/notes/events", headers, everything, stop)),
+        ]
+        await until(lambda: len(broker) >= 1)
+
+        note = (await ac.post("/notes", headers=headers, json={"raw_text": "Customer wants a callback about pricing."})).json()
+        watchers.append(asyncio.create_task(_watch(f"/notes/events?note_id={note['id']}", headers, one, stop)))
+        await until(lambda: len(broker) >= 2 and everything and one)
+
+        async with SessionLocal() as session:
+            claimed = [n for n in await claim_notes(session, "sse-test", 1000) if n.id == note["id"]]
+            await until(lambda: one[-1]["status"] == "processing" and everything[-1]["status"] == "processing")
+            await process_batch(session, claimed, worker_id="sse-test")
+        await until(lambda: one[-1]["status"] == "done" and everything[-1]["status"] == "done")
+        stop.set()
+        await asyncio.wait_for(asyncio.gather(*watchers), 5)
+
+    assert [e["status"] for e in everything] == ["queued", "processing", "done"]
+    assert [e["status"] for e in one] == ["queued", "processing", "done"]
+    assert one[-1]["summary"] and one[-1]["id"] == note["id"]
+    assert len(broker) == 0
+
+
+@pytest.mark.anyio
+async def test_patch_append_resummarizes_incrementally():
+    from app.services.summarizer import summarize
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        headers = await _agent(ac)
+        other = await _agent(ac)
+        first = "Acme asked about renewal pricing for 40 seats. Legal needs the contract draft by Friday."
+        note = (await ac.post("/notes", headers=headers, json={"raw_text": first})).json()
+        async with SessionLocal() as session:
+            await process_note(session, await session.get(Note, note["id"]), worker_id="patch-test")
+
+        assert (await ac.patch(f"/notes/{note['id']}", headers=other, json={"append": "x"})).status_code == 403
+        r = await ac.patch(f"/notes/{note['id']}", headers=headers, json={"append": "a", "raw_text": "b"})
+        assert r.status_code == 422
+
+        full = first
+        for follow_up in (
+            "Follow-up call: Acme wants a multi-year discount on the renewal pricing.",
+            "Procurement approved the contract. Renewal pricing is final at 38 seats.",
+        ):
+            r = await ac.patch(f"/notes/{note['id']}", headers=headers, json={"append": follow_up})
+            assert r.status_code == 200 and r.json()["status"] == "queued"
+            full += "\n\n" + follow_up
+            assert r.json()["raw_text"] == full
+            async with SessionLocal() as session:
+                stored = await session.get(Note, note["id"], options=[undefer(Note.summary_state)])
+                assert stored.summary_state is not None
+                await process_note(session, stored, worker_id="patch-test")
+            assert stored.status.value == "done"
+            assert stored.summary == summarize(full)
+
+        r = await ac.patch(f"/notes/{note['id']}", headers=headers, json={"raw_text": "Replaced text about onboarding."})
+        assert r.json()["summary"] is None
+        async with SessionLocal() as session:
+            # Deferred: plain reads (lists, search, GET) don't load it
+            assert "summary_state" in inspect(await session.get(Note, note["id"])).unloaded
+            assert (await session.scalar(select(Note.summary_state).where(Note.id == note["id"]))) is None
+
+
+@pytest.mark.anyio
+async def test_get_note_conditional_requests_and_read_cache(anyio_backend):
+    from app.services.note_cache import note_cache
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        headers = await _agent(ac)
+        other = await _agent(ac)
+        note = (await ac.post("/notes", headers=headers, json={"raw_text": "Acme renewal call. Pricing agreed for 40 seats."})).json()
+        async with SessionLocal() as session:
+            await process_note(session, await session.get(Note, note["id"]), worker_id="etag-test")
+            # Done a while ago, so Last-Modified is given out
+            await session.execute(
+                update(Note).where(Note.id == note["id"]).values(updated_at=datetime.now(UTC) - timedelta(seconds=5))
+            )
+            await session.commit()
+
+        if engine.dialect.name == "postgresql" and anyio_backend == "asyncio":
+            for _ in range(50):  # the cache is only used while LISTEN is connected
+                if broker.listening():
+                    break
+                await asyncio.sleep(0.1)
+        r = await ac.get(f"/notes/{note['id']}", headers=headers)
+        assert r.status_code == 200 and r.json()["status"] == "done"
+        etag, last_modified = r.headers["etag"], r.headers["last-modified"]
+        assert (note_cache.get(note["id"]) is not None) == broker.listening()
+
+        for conditional in ({"If-None-Match": etag}, {"If-None-Match": f'W/{etag}, "x"'}, {"If-Modified-Since": last_modified}):
+            r = await ac.get(f"/notes/{note['id']}", headers={**headers, **conditional})
+            assert r.status_code == 304 and r.content == b"" and r.headers["etag"] == etag
+        # Access is checked before anything is revealed, cached or not
+        assert (await ac.get(f"/notes/{note['id']}", headers={**other, "If-None-Match": etag})).status_code == 403
+
+        await ac.patch(f"/notes/{note['id']}", headers=headers, json={"append": "Legal sent the contract."})
+        assert note_cache.get(note["id"]) is None
+        r = await ac.get(f"/notes/{note['id']}", headers={**headers, "If-None-Match": etag})
+        assert r.status_code == 200 and r.headers["etag"] != etag and r.json()["status"] == "queued"
+        # Changed within its second: no Last-Modified until that second is over
+        assert "last-modified" not in r.headers
+        r = await ac.get(f"/notes/{note['id']}", headers={**headers, "If-Modified-Since": last_modified})
+        assert r.status_code == 200
+
+
+def test_last_modified_is_not_reused_within_a_second():
+    from app.services.note_cache import last_modified, not_modified
+
+    queued = datetime(2026, 1, 5, 12, 0, 0, 100_000, tzinfo=UTC)
+    done = queued + timedelta(milliseconds=400)  # same second
+    # Served while that second is running, a date would also match `done`
+    assert last_modified(queued, now=queued + timedelta(milliseconds=50)) is None
+    sent = last_modified(queued, now=queued + timedelta(seconds=1))
+    assert sent == "Mon, 05 Jan 2026 12:00:00 GMT"
+    assert not_modified({"if-modified-since": sent}, "", queued)
+    # Any change after a date was sent lands in a later second
+    assert not not_modified({"if-modified-since": sent}, "", done + timedelta(seconds=1))
+    assert not not_modified({"if-modified-since": "yesterday"}, "", queued)
@@ -0,0 +1,149 @@
+import httpx
+import pytest
+
+import ollama_stub
+from app.services.ollama import OllamaClient, OllamaError
+from app.services.summarizer import _asummarize_ollama, _limits, _summarize_extractive
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def stub():
+    ollama_stub.app.state.requests = []
+    ollama_stub.app.state.fail = False
+    ollama_stub.app.state.malformed = False
+    yield ollama_stub.app
+
+
+def _client(app) -> OllamaClient:
+    return OllamaClient("http://ollama.test", transport=httpx.ASGITransport(app=app))
+
+
+@pytest.mark.anyio
+async def test_streaming_generation_stops_at_char_budget(stub):
+    client = _client(stub)
+    try:
+        out = await client.generate("prompt", model="llama3.1", max_chars=50)
+    finally:
+        await client.aclose()
+    assert 50 <= len(out) < len(ollama_stub.REPLY)
+    assert ollama_stub.REPLY.startswith(out)
+    sent = stub.state.requests[0]
+    assert sent["stream"] is True
+    assert sent["options"]["num_predict"] == 50
+
+
+@pytest.mark.anyio
+async def test_generate_many_keeps_order_and_reports_errors(stub):
+    client = _client(stub)
+    try:
+        ok = await client.generate_many(["a", "b", "c"], model="llama3.1", max_chars=20)
+        stub.state.fail = True
+        failed = await client.generate_many(["d"], model="llama3.1")
+    finally:
+        await client.aclose()
+    assert [p["prompt"] for p in stub.state.requests[:3]] == ["a", "b", "c"]
+    assert all(isinstance(r, str) and r for r in ok)
+    assert isinstance(failed[0], OllamaError)
+
+
+@pytest.mark.anyio
+async def test_malformed_response_is_an_ollama_error_and_trips_the_breaker(stub):
+    from app.services.providers import CircuitBreaker
+
+    stub.state.malformed = True
+    client = OllamaClient("http://ollama.test", breaker=CircuitBreaker("ollama", 1, 60), transport=httpx.ASGITransport(app=stub))
+    try:
+        with pytest.raises(OllamaError):
+            await client.generate("prompt", model="llama3.1")
+    finally:
+        await client.aclose()
+    assert client.breaker.open
+
+
+@pytest.mark.anyio
+async def test_async_summary_respects_limit_and_falls_back(stub):
+    text = "Alice called about the renewal. She wants a discount on the enterprise tier this quarter."
+    max_chars = _limits()[0]
+    client = _client(stub)
+    try:
+        summary = await _asummarize_ollama(text, client=client)
+        assert 0 < len(summary) <= max_chars
+        stub.state.fail = True
+        assert await _asummarize_ollama(text, client=client) == _summarize_extractive(text)
+    finally:
+        await client.aclose()
+
+
+@pytest.mark.anyio
+async def test_long_note_is_mapped_per_chunk_then_reduced(stub, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "SUMMARY_CHUNK_TOKENS", 50)
+    monkeypatch.setattr(settings, "SUMMARY_MAX_CHUNKS", 3)
+    text = " ".join(f"Meeting {i} with Acme covered pricing, seats and the legal review timeline." for i in range(40))
+    client = _client(stub)
+    try:
+        summary = await _asummarize_ollama(text, client=client)
+    finally:
+        await client.aclose()
+    prompts = [r["prompt"] for r in stub.state.requests]
+    assert len(prompts) == 4  # three chunks, one reduce
+    assert all(len(p) < 600 for p in prompts[:3])
+    assert "--- Part 3 ---" in prompts[3]
+    assert 0 < len(summary) <= _limits()[0]
+
+
+@pytest.mark.anyio
+async def test_circuit_breaker_stops_requests_and_falls_back(stub, monkeypatch):
+    from app.core.config import settings
+    from app.services.providers import OllamaProvider, create_provider
+    from app.services.summarizer import FallbackSummary
+
+    monkeypatch.setattr(settings, "OLLAMA_BREAKER_FAILURES", 2)
+    assert isinstance(create_provider("ollama"), OllamaProvider)
+    provider = OllamaProvider(concurrency=1, transport=httpx.ASGITransport(app=stub))
+    await provider.startup()
+    texts = [f"Note {i}: the customer asked about the renewal quote and onboarding." for i in range(5)]
+    try:
+        assert not any(isinstance(s, FallbackSummary) for s in await provider.summarize_many(texts[:1]))
+        stub.state.fail = True
+        results = await provider.summarize_many(texts)
+        assert provider.breaker.open
+        assert len(stub.state.requests) == 1 + 2  # the rest never left the worker
+        assert results == [_summarize_extractive(t) for t in texts]
+        assert all(isinstance(s, FallbackSummary) for s in results)
+
+        # After the cooldown one probe goes out; a success closes the breaker
+        stub.state.fail = False
+        provider.breaker.cooldown = 0
+        assert not isinstance((await provider.summarize_many(texts[:1]))[0], FallbackSummary)
+        assert not provider.breaker.open
+    finally:
+        await provider.shutdown()
+
+    with pytest.raises(ValueError):
+        create_provider("gpt-in-a-box")
+
+
+@pytest.mark.anyio
+async def test_extractive_provider_ignores_configured_llm(monkeypatch):
+    from app.core.config import settings
+    from app.services.providers import ExtractiveProvider
+    from app.services.summarizer import FallbackSummary
+
+    # Built explicitly, it must not fall through to Ollama (unreachable here)
+    monkeypatch.setattr(settings, "SUMMARIZE_PROVIDER", "ollama")
+    monkeypatch.setattr(settings, "OLLAMA_HOST", "http://127.0.0.1:9")
+    provider = ExtractiveProvider(concurrency=0)
+    texts = ["The customer asked about the renewal quote. Onboarding starts next week."]
+    try:
+        results = await provider.summarize_many(texts)
+        assert results == [_summarize_extractive(t) for t in texts]
+        assert not any(isinstance(r, FallbackSummary) for r in results)
+    finally:
+        await provider.shutdown()
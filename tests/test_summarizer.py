@@ -0,0 +1,112 @@
+import random
+
+import pytest
+
+from app.core.config import settings
+from app.services import summarizer
+from app.services.summarizer import summarize, summarize_many
+
+TEXTS = [
+    "The customer reported login failures since Monday. Support reset the password twice. "
+    "The issue was traced to an expired SSO certificate, which IT renewed on Wednesday.",
+    "",
+    "Kısa not. Müşteri yeni fiyat teklifini bekliyor ve cuma gününe kadar dönüş yapılmasını istiyor.",
+    "Call with Bob. 42 licenses. Renewal in Q3. Bob wants a discount for multi-year commitment.",
+]
+
+
+def test_summarize_many_matches_single_calls_in_order():
+    assert summarize_many(TEXTS) == [summarize(t) for t in TEXTS]
+
+
+def test_summarize_many_reports_errors_per_item(monkeypatch):
+    monkeypatch.setattr(settings, "SUMMARY_EXTRACTIVE_ENGINE", "python")
+    real = summarizer._summarize_extractive
+
+    def flaky(text, **kwargs):
+        if "Bob" in text:
+            raise RuntimeError("boom")
+        return real(text, **kwargs)
+
+    monkeypatch.setattr(summarizer, "_summarize_extractive", flaky)
+    results = summarize_many(TEXTS)
+    assert isinstance(results[3], RuntimeError)
+    assert results[:3] == [real(t) for t in TEXTS[:3]]
+
+
+def test_vocabulary_filters_each_token_once_and_is_shared():
+    vocab = summarizer.Vocabulary()
+    ids = vocab.terms_of("The Renewal and the renewal: 42 ok, değil teklif")
+    assert [vocab.words[t] for t in ids] == ["renewal", "renewal", "teklif"]
+    assert vocab.ids["The"] == vocab.ids["42"] == vocab.ids["değil"] == -1
+    shared = [summarizer._summarize_extractive(t, vocab=vocab) for t in TEXTS]
+    assert shared == [summarizer._summarize_extractive(t) for t in TEXTS]
+
+
+def test_numpy_engine_matches_reference():
+    pytest.importorskip("numpy")
+    from app.services.extractive_np import Vocabulary, summarize_extractive_np
+
+    # Repeated words in shuffled order: many exact score ties at the selection boundary
+    rng = random.Random(3)
+    words = ["renewal", "pricing", "contract", "Acme", "müşteri", "teklif", "the", "and", "42", "ok"]
+    texts = list(TEXTS)
+    for _ in range(300):
+        sentences = [" ".join(rng.choices(words, k=rng.randint(1, 9))) + rng.choice(".!?") for _ in range(rng.randint(1, 12))]
+        texts.append(rng.choice([" ", "\n\n"]).join(sentences))
+
+    vocab = Vocabulary()
+    for limits in [(300, 3, 20), (120, 1, 40), (1000, 5, 10)]:
+        for text in texts:
+            assert summarize_extractive_np(text, limits=limits, vocab=vocab) == summarizer._summarize_extractive(text, limits=limits)
+
+
+def test_incremental_appends_match_full_summaries():
+    from app.services.incremental import APPEND_SEPARATOR, resummarize_extractive
+
+    limits = (300, 3, 20)
+    text, state = TEXTS[0], None
+    summary, state = resummarize_extractive(text, state, limits=limits)
+    for extra in TEXTS[2:] + TEXTS[:1] + ["Thanks.", "Bob called again about the renewal discount."]:
+        text += APPEND_SEPARATOR + extra
+        summary, state = resummarize_extractive(text, state, limits=limits)
+        assert summary == summarizer._summarize_extractive(text, limits=limits)
+
+
+def test_incremental_appends_match_summarizing_the_new_text(monkeypatch):
+    from app.services.incremental import APPEND_SEPARATOR, resummarize_extractive
+
+    # Repeated words: many score ties at the selection boundary
+    rng = random.Random(11)
+    words = ["renewal", "pricing", "contract", "Acme", "müşteri", "teklif", "the", "and", "42", "ok", "Bob"]
+
+    def paragraph() -> str:
+        return " ".join(" ".join(rng.choices(words, k=rng.randint(2, 10))) + "." for _ in range(rng.randint(1, 5)))
+
+    # A short note (one chunk), then one far past the chunk size (map-reduced)
+    for chunk_tokens in (1500, 40):
+        monkeypatch.setattr(settings, "SUMMARY_CHUNK_TOKENS", chunk_tokens)
+        for _ in range(20):
+            text = paragraph()
+            summary, state = resummarize_extractive(text, None)
+            for _ in range(6):
+                text += APPEND_SEPARATOR + paragraph()
+                summary, state = resummarize_extractive(text, state)
+                assert summary == summarize(text)
+
+
+def test_long_notes_are_chunked_on_sentences_with_a_cap(monkeypatch):
+    monkeypatch.setattr(settings, "SUMMARY_CHUNK_TOKENS", 50)
+    monkeypatch.setattr(settings, "SUMMARY_MAX_CHUNKS", 4)
+    sentences = [f"Call {i} covered the renewal quote and the onboarding plan for team {i}." for i in range(60)]
+    text = " ".join(sentences)
+
+    chunks = summarizer._chunks(text, (50, 1000))
+    assert all(len(c) <= 200 for c in chunks)
+    assert "\n\n".join(chunks).replace("\n\n", " ") == text  # split between sentences only
+    capped = summarizer._chunks(text)
+    assert len(capped) == 4 and capped[0] == chunks[0] and capped[-1] == chunks[-1]
+
+    assert summarizer._chunks(sentences[0]) == [sentences[0]]
+    summary = summarize(text)
+    assert summary and len(summary) <= settings.SUMMARY_MAX_CHARS
@@ -0,0 +1,80 @@
+import itertools
+import threading
+
+from app.supervisor import Supervisor, worker_id
+
+_pids = itertools.count(1000)
+
+
+class _FakeProcess:
+    def __init__(self, target, args, name) -> None:
+        self.args, self.name = args, name
+        self.pid = None
+        self.exitcode = None
+
+    def start(self) -> None:
+        self.pid = next(_pids)
+
+    def is_alive(self) -> bool:
+        return self.exitcode is None
+
+    def join(self, timeout=None) -> None:
+        pass
+
+    def crash(self) -> None:
+        self.exitcode = 1
+
+
+class _FakeContext:
+    def __init__(self) -> None:
+        self.started: list[_FakeProcess] = []
+
+    def Process(self, target, args, name) -> _FakeProcess:
+        process = _FakeProcess(target, args, name)
+        self.started.append(process)
+        return process
+
+    def Event(self) -> threading.Event:
+        return threading.Event()
+
+
+def test_supervisor_restarts_crashed_workers_with_backoff_and_hands_over_their_notes():
+    now = [0.0]
+    context = _FakeContext()
+    supervisor = Supervisor(2, context=context, clock=lambda: now[0])
+    supervisor.start()
+    first, other = context.started
+
+    # A crash right after start: restarted after 1s, and the replacement
+    # returns the dead worker's notes
+    first.crash()
+    supervisor.poll()
+    assert len(context.started) == 2
+    now[0] += 1
+    supervisor.poll()
+    replacement = context.started[-1]
+    assert replacement.args[-1] == worker_id(first.pid)
+    assert other.args[-1] is None
+
+    # Crashing again right away doubles the backoff (3s)...
+    replacement.crash()
+    supervisor.poll()
+    now[0] += 2
+    supervisor.poll()
+    assert len(context.started) == 3
+    now[0] += 1
+    supervisor.poll()
+    assert len(context.started) == 4
+
+    # ...while a worker that ran for a while is restarted at once
+    now[0] += 120
+    context.started[-1].crash()
+    supervisor.poll()
+    assert len(context.started) == 5
+
+    # Stopping sets the event every worker watches, and nothing is restarted
+    supervisor.stop()
+    context.started[-1].crash()
+    supervisor.poll()
+    assert len(context.started) == 5
+    assert all(p.args[0].is_set() for p in context.started)